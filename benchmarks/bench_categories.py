@@ -0,0 +1,31 @@
+"""Micro-benchmark: búsqueda lineal por EXTENSIONS frente al índice de sufijos.
+
+Uso: python benchmarks/bench_categories.py [cantidad_de_archivos]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from organizador.categories import EXTENSIONS, get_category
+
+def linear_get_category(filename: str) -> str:
+    """Implementación anterior: recorre cada lista con `in`."""
+    ext = os.path.splitext(filename.lower())[1]
+    return next((cat for cat, exts in EXTENSIONS.items() if ext in exts), 'others')
+
+def make_names(count: int):
+    suffixes = [ext for exts in EXTENSIONS.values() for ext in exts] + ['.bin', '', '.html', '.json']
+    rng = random.Random(42)
+    return [f"archivo_{i}{rng.choice(suffixes)}" for i in range(count)]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = make_names(count)
+    for label, func in [('lineal', linear_get_category), ('indice', get_category)]:
+        best = min(timeit.repeat(lambda: [func(n) for n in names], number=1, repeat=5))
+        print(f"{label:>7}: {best * 1000:8.1f} ms  ({best / count * 1e9:6.0f} ns/archivo)")
+
+if __name__ == "__main__":
+    main()
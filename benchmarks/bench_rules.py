@@ -0,0 +1,95 @@
+"""Micro-benchmark: reglas evaluadas una a una frente al RuleSet compilado.
+
+Tres juegos de reglas: globs con prefijo fijo, globs que empiezan por un
+comodín y regex. La mitad de los nombres se arma para que coincida con
+alguna regla; la otra mitad son nombres de descarga sin regla.
+
+Uso: python benchmarks/bench_rules.py [cantidad_de_archivos]
+"""
+import fnmatch
+import functools
+import os
+import random
+import re
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from organizador.categories import get_category
+from organizador.rules import RuleSet
+from organizador.scanner import FILE, Entry
+from synthetic import make_names
+
+WORDS = ['invoice', 'report', 'setup', 'photo', 'backup', 'scan', 'ticket', 'statement']
+EXTS = ['.pdf', '.exe', '.jpg', '.zip', '.docx', '.iso']
+KINDS = ('prefijo', 'comodín', 'regex')
+
+def make_rules(count: int, kind: str):
+    """Reglas de patrón variadas más unas pocas de tamaño y antigüedad al final.
+
+    Devuelve las reglas y, por cada una, un nombre que le corresponde.
+    """
+    rng = random.Random(7)
+    rules, names = [], []
+    for i in range(count):
+        word, ext = rng.choice(WORDS), rng.choice(EXTS)
+        if kind == 'prefijo':
+            match = {'glob': f"{word}_{i}_*{ext}"}
+            names.append(f"{word}_{i}_2024{ext}")
+        elif kind == 'comodín':
+            match = {'glob': f"*_{word}{i}_*{ext}"}
+            names.append(f"2024_{word}{i}_final{ext}")
+        else:
+            match = {'regex': f"(?:.*[-_])?{word}-{i}-\\d+\\{ext}"}
+            names.append(f"mayo_{word}-{i}-17{ext}")
+        rules.append({'match': match, 'destination': f"rules/{i}"})
+    rules.append({'match': {'categories': ['programs'], 'min_size': '1GB'}, 'destination': 'programs/large'})
+    rules.append({'match': {'older_than_days': 30}, 'destination': 'archive'})
+    return rules, names
+
+@functools.lru_cache(maxsize=None)
+def _compiled(regex: str):
+    return re.compile(regex, re.IGNORECASE)
+
+def naive_route(specs, entry: Entry, category: str, now: float):
+    """Lo que haría un bucle directo: fnmatch/re y predicados regla por regla."""
+    for spec in specs:
+        match = spec['match']
+        if 'glob' in match and not fnmatch.fnmatch(entry.name.lower(), match['glob'].lower()):
+            continue
+        if 'regex' in match and not _compiled(match['regex']).fullmatch(entry.name):
+            continue
+        if 'categories' in match and category not in match['categories']:
+            continue
+        if 'min_size' in match and entry.size < 10 ** 9:
+            continue
+        if 'older_than_days' in match and now - entry.mtime < match['older_than_days'] * 86400:
+            continue
+        return spec['destination']
+    return None
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    now = time.time()
+    rng = random.Random(42)
+    plain = make_names(count // 2)
+    for kind in KINDS:
+        for rule_count in (10, 100, 1000):
+            specs, matching = make_rules(rule_count, kind)
+            names = plain + [rng.choice(matching) for _ in range(count - len(plain))]
+            entries = [Entry(name, os.path.join('/d', name), FILE, rng.randrange(1, 2 * 10 ** 9),
+                             now - rng.randrange(0, 60 * 86400)) for name in names]
+            work = [(entry, get_category(entry.name)) for entry in entries]
+            start = time.perf_counter()
+            rules = RuleSet(specs)
+            compile_ms = (time.perf_counter() - start) * 1000
+            naive = min(timeit.repeat(lambda: [naive_route(specs, e, c, now) for e, c in work],
+                                      number=1, repeat=3))
+            compiled = min(timeit.repeat(lambda: [rules.route(e, '/d', c, now) for e, c in work],
+                                         number=1, repeat=3))
+            print(f"{kind:>8} {rule_count:>5} reglas: lineal {naive / count * 1e6:8.2f} us/archivo, "
+                  f"compilado {compiled / count * 1e6:6.2f} us/archivo (compilación {compile_ms:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Benchmarks del organizador sobre carpetas de Descargas sintéticas.
+
+Uso:
+    python benchmarks/run_benchmarks.py --files 1000 10000 --output resultados.json
+
+Los resultados se escriben en JSON junto con el commit actual para poder
+comparar ejecuciones. Por defecto se trabaja en /dev/shm (tmpfs) si existe.
+Los puntos de entrada que no se pueden importar en esta plataforma (p. ej.
+server.py sin watchdog) se anotan como omitidos.
+"""
+import argparse
+import contextlib
+import importlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(SRC, 'extension_organizador'))
+
+from synthetic import build_tree, make_names
+
+def _default_root() -> str:
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=HERE, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _import(name: str):
+    """Importa un punto de entrada; devuelve (módulo, error)."""
+    try:
+        return importlib.import_module(name), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+@contextlib.contextmanager
+def _workdir(base: str):
+    path = tempfile.mkdtemp(prefix='bench_descargas_', dir=base)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def _quiet(module) -> None:
+    """Sin iconos ni una línea de log por archivo durante la medición."""
+    module.CONFIG['enable_icons'] = False
+    module.print_colored = lambda *args, **kwargs: None
+    logging.disable(logging.INFO)
+
+def _result(name: str, files: int, seconds: float, **extra) -> Dict:
+    return dict(name=name, files=files, seconds=round(seconds, 6),
+                per_file_us=round(seconds / files * 1e6, 3) if files else None, **extra)
+
+def bench_get_category(files: int, base: str) -> Dict:
+    from organizador.categories import get_category
+    names = make_names(files)
+    start = time.perf_counter()
+    for name in names:
+        get_category(name)
+    return _result('get_category', files, time.perf_counter() - start)
+
+def bench_sniff(files: int, base: str) -> Dict:
+    from organizador.scanner import scan_directory
+    from organizador.sniffing import ContentSniffer, classify
+    with _workdir(base) as root:
+        build_tree(root, files, duplicate_ratio=0)
+        entries = [entry for entry in scan_directory(root) if entry.is_file]
+        sniffer = ContentSniffer('all')
+        start = time.perf_counter()
+        for entry in entries:
+            classify(entry, sniffer)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for entry in entries:
+            classify(entry, sniffer)
+        cached = time.perf_counter() - start
+    return _result('sniff', len(entries), cold, cached_seconds=round(cached, 6))
+
+def bench_organize_downloads(files: int, base: str, folders: int = 0, duplicate_ratio: float = 0.1,
+                             name: str = 'organize_downloads') -> Dict:
+    organizar, error = _import('organizar')
+    if organizar is None:
+        return {'name': name, 'files': files, 'skipped': error}
+    _quiet(organizar)
+    with _workdir(base) as root:
+        build_tree(root, files, duplicate_ratio=duplicate_ratio, folders=folders)
+        organizar.find_downloads_folder = lambda: root
+        start = time.perf_counter()
+        success, failed = organizar.organize_downloads()
+        seconds = time.perf_counter() - start
+    return _result(name, files, seconds, success=success, failed=failed,
+                   folders=folders, duplicate_ratio=duplicate_ratio)
+
+def bench_move_item(files: int, base: str, duplicate_ratio: float = 0.5) -> Dict:
+    organizar, error = _import('organizar')
+    if organizar is None:
+        return {'name': 'move_item', 'files': files, 'skipped': error}
+    _quiet(organizar)
+    with _workdir(base) as root:
+        build_tree(root, files, duplicate_ratio=duplicate_ratio, mix={'.pdf': 1})
+        dest = os.path.join(root, 'documents')
+        paths = [entry.path for entry in os.scandir(root) if entry.is_file()]
+        start = time.perf_counter()
+        for path in paths:
+            organizar.move_item(path, dest)
+        seconds = time.perf_counter() - start
+    return _result('move_item', len(paths), seconds, duplicate_ratio=duplicate_ratio)
+
+def bench_watcher_events(files: int, base: str) -> Dict:
+    server, error = _import('server')
+    if server is None:
+        return {'name': 'watcher_events', 'files': files, 'skipped': error}
+    _quiet(server)
+    with _workdir(base) as root:
+        build_tree(root, files, duplicate_ratio=0)
+        handler = server.DownloadEventHandler(server.parse_roots([root]))
+        paths = [entry.path for entry in os.scandir(root) if entry.is_file()]
+        start = time.perf_counter()
+        # Mismo camino que la cola de eventos: lotes de max_batch rutas
+        futures = []
+        for i in range(0, len(paths), handler.queue.max_batch):
+            futures += handler.process_batch(paths[i:i + handler.queue.max_batch])
+        # Los movimientos van al ejecutor compartido: se mide hasta que terminan
+        for future in futures:
+            future.result()
+        seconds = time.perf_counter() - start
+    return _result('watcher_events', len(paths), seconds)
+
+BENCHMARKS: Dict[str, Callable[[int, str], Dict]] = {
+    'get_category': bench_get_category,
+    'sniff': bench_sniff,
+    'organize_downloads': bench_organize_downloads,
+    'organize_downloads_folders': lambda files, base: bench_organize_downloads(
+        files, base, folders=max(1, files // 100), name='organize_downloads_folders'),
+    'move_item': bench_move_item,
+    'watcher_events': bench_watcher_events,
+}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000],
+                        help="cantidades de archivos a generar (1k a 1M)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="benchmarks a ejecutar")
+    parser.add_argument('--root', default=_default_root(), help="carpeta base (idealmente tmpfs)")
+    parser.add_argument('--output', help="archivo JSON de resultados (por defecto, salida estándar)")
+    args = parser.parse_args(argv)
+
+    # Catálogo, caché de hashes, etc. en una carpeta temporal, no en la del usuario
+    data_dir = tempfile.mkdtemp(prefix='bench_datos_', dir=args.root)
+    os.environ['XDG_DATA_HOME'] = os.environ['LOCALAPPDATA'] = data_dir
+
+    results = []
+    try:
+        for files in args.files:
+            for name in args.only or BENCHMARKS:
+                result = BENCHMARKS[name](files, args.root)
+                print(json.dumps(result), file=sys.stderr)
+                results.append(result)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.time(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'root': args.root,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Generador de carpetas de Descargas sintéticas para los benchmarks."""
+import os
+import random
+from typing import Dict, List, Optional
+
+# Mezcla por defecto: peso relativo de cada extensión
+DEFAULT_MIX: Dict[str, float] = {
+    '.pdf': 12, '.docx': 5, '.xlsx': 3, '.txt': 4, '.csv': 2,
+    '.jpg': 14, '.png': 12, '.gif': 2, '.webp': 2,
+    '.mp4': 4, '.mkv': 1, '.mp3': 4, '.wav': 1,
+    '.zip': 6, '.tar.gz': 2, '.7z': 1, '.iso': 1,
+    '.exe': 4, '.msi': 2,
+    '': 3, '.bin': 2, '.html': 3, '.json': 2,
+}
+
+COMMON_NAMES = ['invoice', 'image', 'document', 'download', 'setup', 'report', 'photo', 'file']
+
+def _category_for(ext: str) -> str:
+    from organizador.categories import get_category
+    return get_category(f"x{ext}")
+
+def build_tree(root: str, files: int = 1000, mix: Optional[Dict[str, float]] = None,
+               min_size: int = 0, max_size: int = 4096, duplicate_ratio: float = 0.1,
+               folders: int = 0, folder_depth: int = 2, files_per_folder: int = 5,
+               old_mtime: bool = True, seed: int = 42) -> Dict[str, int]:
+    """Crea `files` archivos sueltos y `folders` carpetas anidadas en root.
+
+    Una fracción `duplicate_ratio` de los archivos reutiliza nombres
+    comunes que ya existen en su carpeta de categoría, para ejercitar la
+    resolución de duplicados. Los tamaños se crean con truncate (sin
+    escribir datos). Con old_mtime las fechas se dejan en el pasado para
+    que los detectores de completitud los den por terminados.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    exts: List[str] = list(mix)
+    weights = [mix[ext] for ext in exts]
+    os.makedirs(root, exist_ok=True)
+
+    duplicates = 0
+    for i in range(files):
+        ext = rng.choices(exts, weights)[0]
+        if rng.random() < duplicate_ratio:
+            name = f"{rng.choice(COMMON_NAMES)}{ext}"
+            # Ya existe en destino con ese nombre...
+            category_dir = os.path.join(root, _category_for(ext))
+            os.makedirs(category_dir, exist_ok=True)
+            open(os.path.join(category_dir, name), 'a').close()
+            # ...y en Descargas lleva un prefijo para no chocar entre sí
+            name = f"{i}_{name}" if os.path.exists(os.path.join(root, name)) else name
+            duplicates += 1
+        else:
+            name = f"archivo_{i}{ext}"
+        path = os.path.join(root, name)
+        with open(path, 'wb') as f:
+            f.truncate(rng.randint(min_size, max_size))
+        if old_mtime:
+            os.utime(path, (0, 0))
+
+    for i in range(folders):
+        path = os.path.join(root, f"carpeta_{i}")
+        for depth in range(folder_depth):
+            os.makedirs(path, exist_ok=True)
+            for j in range(files_per_folder):
+                with open(os.path.join(path, f"f{depth}_{j}{rng.choice(exts)}"), 'wb') as f:
+                    f.truncate(rng.randint(min_size, max_size))
+            path = os.path.join(path, f"nivel_{depth + 1}")
+
+    return {'files': files, 'duplicates': duplicates, 'folders': folders}
+
+def make_names(count: int, mix: Optional[Dict[str, float]] = None, seed: int = 42) -> List[str]:
+    """Nombres sin crear archivos, para medir solo la clasificación."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    exts = list(mix)
+    weights = [mix[ext] for ext in exts]
+    return [f"archivo_{i}{ext}" for i, ext in enumerate(rng.choices(exts, weights, k=count))]
@@ -1,22 +1,24 @@
 import os
 import shutil
 import sys
-import winreg
-from typing import Tuple, Dict, List
+from typing import Tuple
 
-EXTENSIONS: Dict[str, List[str]] = {
-    'videos': ['.avi', '.flv', '.m4v', '.mkv', '.mov', '.mp4', '.wmv', '.webm', '.3gp'],
-    'documents': ['.csv', '.doc', '.docx', '.odt', '.pdf', '.ppt', '.pptx', '.txt', '.xlsx'],
-    'music': ['.aac', '.flac', '.m4a', '.midi', '.mp3', '.ogg', '.wav', '.wma'],
-    'programs': ['.app', '.bat', '.cmd', '.dll', '.exe', '.jar', '.msi', '.py'],
-    'compressed': ['.7z', '.bz2', '.gz', '.iso', '.rar', '.tar', '.xz', '.zip'],
-    'images': ['.bmp', '.gif', '.ico', '.jpeg', '.jpg', '.png', '.svg', '.tiff', '.webp'],
-    'others': []
-}
+# El paquete compartido vive en src/; PyInstaller lo incluye vía pathex
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from organizador.categories import EXTENSIONS, get_category
+from organizador.executor import DEFAULT_WORKERS, MoveExecutor
+from organizador.icons import IconProvisioner
+from organizador.naming import NameIndex
+from organizador.paths import find_downloads_folder
+from organizador.scanner import scan_directory
+from organizador.snapshot import ScanSnapshot
 
 CONFIG = { 
     'enable_icons': True,
-    'move_folders': True
+    'move_folders': True,
+    'workers': DEFAULT_WORKERS,
+    # Si Descargas no cambió desde la última ejecución, no se vuelve a listar
+    'snapshot': True
 }
 
 COLORS = {
@@ -27,32 +29,17 @@ COLORS = {
     'reset': '\033[0m'
 }
 
+prepared_folders = set()
+name_index = NameIndex()
+
 def print_colored(message: str, color: str) -> None:
     print(f"{COLORS.get(color, '')}{message}{COLORS['reset']}")
 
-def find_downloads_folder() -> str:
-    try:
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders") as key:
-            downloads_path = winreg.QueryValueEx(key, "{374DE290-123F-4565-9164-39C4925E467B}")[0]
-            if os.path.exists(downloads_path):
-                return downloads_path
-    except Exception:
-        pass
-    
-    user_profile = os.environ.get('USERPROFILE', '')
-    for folder in ['Downloads', 'Descargas']:
-        path = os.path.join(user_profile, folder)
-        if os.path.exists(path):
-            return path
-    return os.path.join(user_profile, 'Downloads')
-
-def get_category(filename: str) -> str:
-    ext = os.path.splitext(filename.lower())[1]
-    return next((cat for cat, exts in EXTENSIONS.items() if ext in exts), 'others')
+def icons_folder(downloads: str) -> str:
+    return os.path.join(downloads, 'images', 'folder_icons')
 
-def setup_folder_icons() -> str:
-    downloads = find_downloads_folder()
-    icons_path = os.path.join(downloads, 'images', 'folder_icons')
+def setup_folder_icons(downloads: str) -> str:
+    icons_path = icons_folder(downloads)
     if not os.path.exists(icons_path):
         os.makedirs(icons_path)
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -66,12 +53,11 @@ def setup_folder_icons() -> str:
             print_colored(f"✅ Icono copiado: {icon_name}", 'success')
     return icons_path
 
-def validate_icons() -> bool:
-    downloads = find_downloads_folder()
-    icons_path = os.path.join(downloads, 'images', 'folder_icons')
+def validate_icons(downloads: str) -> bool:
+    icons_path = icons_folder(downloads)
     if not os.path.exists(icons_path):
         print_colored("📁 Creando carpeta de iconos...", 'info')
-        return setup_folder_icons() is not None
+        return setup_folder_icons(downloads) is not None
     missing_icons = [category for category in EXTENSIONS if not os.path.exists(os.path.join(icons_path, f"{category}.ico"))]
     if missing_icons:
         print_colored(f"⚠️ Faltan los siguientes iconos: {', '.join(missing_icons)}", 'warning')
@@ -89,26 +75,6 @@ def validate_icons() -> bool:
                 return False
     return True
 
-def setup_folder_icon(folder_path: str, category: str) -> bool:
-    if not CONFIG['enable_icons']:
-        return False
-    try:
-        downloads = find_downloads_folder()
-        icons_path = os.path.join(downloads, 'images', 'folder_icons')
-        icon_path = os.path.join(icons_path, f"{category}.ico")
-        ini_path = os.path.join(folder_path, "desktop.ini")
-        if not validate_icons():
-            return False
-        os.system(f'attrib +s "{folder_path}"')
-        with open(ini_path, 'w') as f:
-            f.write(f"[.ShellClassInfo]\nIconFile={icon_path}\nIconIndex=0\nConfirmFileOp=0\n")
-        os.system(f'attrib +s +h "{ini_path}"')
-        return True
-    except Exception as e:
-        if isinstance(e, PermissionError) and os.path.exists(ini_path):
-            return True
-        return False
-
 def move_item(src, dest) -> bool:
     src_norm = os.path.normcase(os.path.abspath(src))
     py_path = os.path.normcase(os.path.abspath(__file__))
@@ -116,53 +82,57 @@ def move_item(src, dest) -> bool:
     if src_norm == py_path or (exe_path and src_norm == exe_path):
         return True  
     try:
-        if not os.path.exists(dest):
-            os.makedirs(dest)
-        if os.path.exists(os.path.join(dest, os.path.basename(src))):
-            base, ext = os.path.splitext(os.path.basename(src))
-            counter = 1
-            while os.path.exists(os.path.join(dest, f"{base}_{counter}{ext}")):
-                counter += 1
-            shutil.move(src, os.path.join(dest, f"{base}_{counter}{ext}"))
-        else:
-            shutil.move(src, dest)
+        if dest not in prepared_folders:
+            os.makedirs(dest, exist_ok=True)
+            prepared_folders.add(dest)
+        name_index.move(src, dest)
         return True
     except Exception as e:
         print_colored(f"❌ Error moviendo {src}: {str(e)}", 'error')
         return False
 
-def organize_downloads() -> Tuple[int, int]:
-    downloads = find_downloads_folder()
+def organize_downloads(downloads: str) -> Tuple[int, int]:
     print_colored(f"📂 Organizando: {downloads}", 'info')
-    success = failed = 0
+    moves = []
+    folders = {}
     for category in EXTENSIONS:
         category_path = os.path.join(downloads, category)
         os.makedirs(category_path, exist_ok=True)
-        setup_folder_icon(category_path, category)
-    for item in os.listdir(downloads):
-        item_path = os.path.join(downloads, item)
-        if item in EXTENSIONS:
+        prepared_folders.add(category_path)
+        folders[category_path] = category
+    if CONFIG['enable_icons']:
+        # Sin cambios desde la última vez no se escribe nada ni se lanza attrib
+        IconProvisioner(icons_folder(downloads)).ensure(folders)
+    snapshot = ScanSnapshot() if CONFIG['snapshot'] else None
+    entries = snapshot.entries(downloads) if snapshot is not None else None
+    if entries is None:
+        entries = scan_directory(downloads)
+    for entry in entries:
+        item_path = entry.path
+        if entry.name in EXTENSIONS:
             continue
-        if os.path.isfile(item_path):
-            category = get_category(item)
+        if entry.is_file:
+            category = get_category(entry.name)
             dest = os.path.join(downloads, category)
-        elif os.path.isdir(item_path) and CONFIG['move_folders']:
+        elif entry.is_dir and CONFIG['move_folders']:
             dest = os.path.join(downloads, 'others')
         else:
             continue
-        if move_item(item_path, dest):
-            success += 1
-        else:
-            failed += 1
-    return success, failed
+        moves.append((item_path, dest))
+    with MoveExecutor(move_item, CONFIG['workers']) as executor:
+        result = executor.run(moves)
+    if snapshot is not None:
+        snapshot.record(downloads)
+    return result
 
 def main():
     try:
         print_colored("🚀 Iniciando organización...", 'info')
-        if CONFIG['enable_icons'] and not validate_icons():
+        downloads = find_downloads_folder()
+        if CONFIG['enable_icons'] and not validate_icons(downloads):
             print_colored("⚠️ Error validando iconos, continuando sin iconos", 'warning')
             CONFIG['enable_icons'] = False
-        success, failed = organize_downloads()
+        success, failed = organize_downloads(downloads)
         if success > 0 or failed > 0:
             if success > 0:
                 print_colored(f"🎉 Completado: {success} elementos organizados", 'success')
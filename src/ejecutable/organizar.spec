@@ -4,7 +4,7 @@ block_cipher = None
 
 a = Analysis(
     ['organizar.py'],
-    pathex=[],
+    pathex=['..'],  # Paquete compartido src/organizador
     binaries=[],
     datas=[('icons', 'icons')],
     hiddenimports=[],
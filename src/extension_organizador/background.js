@@ -1,9 +1,10 @@
 const NOTIFICATION_DELAY = 500;
+const API_URL = 'http://localhost:8000/batch';
 const notificationQueue = new Set();
 let timeoutId;
 
 const getPathInfo = path => {
-  const parts = path.split('\\');
+  const parts = path.split(/[\\/]/);
   return {
     fileName: parts.pop(),
     folderName: parts.pop()
@@ -16,25 +17,32 @@ chrome.downloads.onChanged.addListener(({id, state}) => {
   clearTimeout(timeoutId);
   notificationQueue.add(id);
   timeoutId = setTimeout(async () => {
+    const downloadIds = [...notificationQueue];
+    notificationQueue.clear();
     try {
-      const downloads = await Promise.all([...notificationQueue].map(async downloadId => {
+      const filePaths = await Promise.all(downloadIds.map(async downloadId => {
         const [download] = await chrome.downloads.search({id: downloadId});
         if (!download) throw new Error(`Download ${downloadId} not found`);
-        
-        const response = await fetch('http://localhost:8000', {
-          method: 'POST',
-          headers: {'Content-Type': 'application/json'},
-          body: JSON.stringify({file_path: download.filename})
-        });
-        return response.json();
+        return download.filename;
       }));
 
-      const message = downloads
+      // Una sola petición por ventana de notificación
+      const response = await fetch(API_URL, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({file_paths: filePaths})
+      });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      const {results} = await response.json();
+
+      const message = results
+        .filter(data => data.destination)
         .map(data => {
           const {fileName, folderName} = getPathInfo(data.destination);
           return `Archivo: ${fileName}\nCarpeta: ${folderName}`;
         })
         .join('\n\n');
+      if (!message) throw new Error('No se organizó ningún archivo');
 
       chrome.notifications.create(`download-${Date.now()}`, {
         type: "basic",
@@ -50,6 +58,5 @@ chrome.downloads.onChanged.addListener(({id, state}) => {
         message: "Error al organizar los archivos"
       });
     }
-    notificationQueue.clear();
   }, NOTIFICATION_DELAY);
-});
\ No newline at end of file
+});
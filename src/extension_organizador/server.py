@@ -1,16 +1,36 @@
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-import json
+import asyncio
 import os
-import shutil
-import winreg
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
-import signal
 import sys
 import time
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from collections import deque
+from collections import OrderedDict
+
+# El paquete compartido vive en src/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from organizador.archive import compact_folder
+from organizador.catalog import open_catalog
+from organizador.categories import EXTENSIONS
+from organizador.completeness import DEFAULT_STABLE_SECONDS, build_detector
+from organizador.daemon import AsyncDaemon, AsyncEventBridge, LoopTimers
+from organizador.dedup import Deduplicator
+from organizador.events import DEFAULT_DEBOUNCE, EventCoalescer
+from organizador.executor import DEFAULT_WORKERS, MoveExecutor
+from organizador.metrics import metrics
+from organizador.icons import IconProvisioner
+from organizador.journal import open_journal
+from organizador.naming import NameIndex
+from organizador.paths import find_downloads_folder
+from organizador.roots import WatchRoot, parse_roots, root_finder
+from organizador.rules import RuleError, load_rules, parse_size
+from organizador.scanner import Entry, entry_from_path, scan_directory
+from organizador.snapshot import ScanSnapshot
+from organizador.sniffing import ContentSniffer, classify
+from organizador.throttle import MIN_BANDWIDTH, MIN_OPERATIONS, set_background_priority, throttle
+from organizador.timers import DeadlineScheduler
+from organizador.tree import DEFAULT_MAX_DEPTH, folder_ids, prune_empty_dirs, walk_tree
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,22 +38,61 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Variable para desactivar los prints
 ENABLE_PRINTS = False
 
-# Constantes
-EXTENSIONS: Dict[str, List[str]] = {
-    'videos': ['.avi', '.flv', '.m4v', '.mkv', '.mov', '.mp4', '.wmv', '.webm', '.3gp'],
-    'documents': ['.csv', '.doc', '.docx', '.odt', '.pdf', '.ppt', '.pptx', '.txt', '.xlsx'],
-    'music': ['.aac', '.flac', '.m4a', '.midi', '.mp3', '.ogg', '.wav', '.wma'],
-    'programs': ['.app', '.bat', '.cmd', '.dll', '.exe', '.jar', '.msi', '.py'],
-    'compressed': ['.7z', '.bz2', '.gz', '.iso', '.rar', '.tar', '.xz', '.zip'],
-    'images': ['.bmp', '.gif', '.ico', '.jpeg', '.jpg', '.png', '.svg', '.tiff', '.webp'],
-    'others': []
-}
-
 TEMP_EXTENSIONS = ['.crdownload', '.part', '.tmp']
 
 CONFIG = {
     'enable_icons': True,
-    'move_folders': True
+    'move_folders': True,
+    'workers': DEFAULT_WORKERS,
+    # None, 'delete', 'link' o 'skip' para descargas repetidas
+    'dedup': None,
+    # Catálogo SQLite de movimientos en la carpeta de datos del usuario
+    'catalog': True,
+    # Segundos sin eventos de un archivo antes de procesarlo
+    'debounce_seconds': DEFAULT_DEBOUNCE,
+    # Segundos sin actividad tras los que se revisa una descarga en curso
+    'stall_timeout': 30,
+    # 'stable' (tamaño y fecha sin cambios), 'inotify' (Linux), 'lock' o 'suffix'
+    'completeness': 'stable',
+    'stable_seconds': DEFAULT_STABLE_SECONDS,
+    # API local para la extensión del navegador
+    'api_host': '127.0.0.1',
+    'api_port': 8000,
+    # Conexiones atendidas a la vez; el resto espera en el bucle sin ocupar hilos
+    'api_connections': 256,
+    # Una línea de log por archivo; desactivar bajo carga y usar /metrics
+    'log_each_file': True,
+    # Segundos entre resúmenes de métricas en el log (0 para desactivar)
+    'metrics_interval': 300,
+    # None, 'unknown' (solo lo que iría a 'others') o 'all': clasificar también por contenido
+    'sniff': None,
+    # Recorrer también las subcarpetas (p. ej. zips extraídos) en lugar de moverlas enteras
+    'recursive': False,
+    'max_depth': DEFAULT_MAX_DEPTH,
+    # Archivo de reglas de destino (JSON o TOML); None usa rules.json en la carpeta de datos
+    'rules': None,
+    # Diario de movimientos compartido con organizar.py --undo
+    'journal': True,
+    # Carpetas vigiladas: rutas o {"path", "target", "categories": {categoría: carpeta}};
+    # vacío usa la carpeta de descargas del usuario
+    'roots': [],
+    # Guardar el listado de cada carpeta al detenerse para no repetirlo al arrancar si no cambió
+    'snapshot': True,
+    # Límites para no competir con el uso normal del disco; se cambian en caliente con POST /throttle
+    # Bytes por segundo de las copias entre unidades (número o '20MB'); None sin límite
+    'bandwidth_limit': None,
+    # Movimientos por segundo; None sin límite
+    'operations_limit': None,
+    # Prioridad baja de CPU y E/S en los hilos que mueven
+    'background_priority': False,
+    # Días tras los que los archivos de las categorías pasan a zips mensuales en '.archive';
+    # None lo desactiva
+    'archive_after_days': None,
+    # 'lzma', 'deflate' o 'store'; imágenes, vídeo, música y comprimidos se guardan sin recomprimir
+    'archive_compression': 'lzma',
+    # Segundos entre pasadas de archivado y archivos como máximo por carpeta en cada pasada
+    'archive_interval': 3600,
+    'archive_batch': 200
 }
 
 COLORS = {
@@ -44,152 +103,502 @@ COLORS = {
     'reset': '\033[0m'
 }
 
-# Registro de archivos procesados
-processed_files = deque(maxlen=10)
+# Últimos destinos por ruta de origen, para responder a la extensión
+# aunque el watcher haya movido el archivo antes que la API
+recent_destinations = OrderedDict()
+recent_destinations_lock = threading.Lock()
+RECENT_DESTINATIONS_SIZE = 1000
+
+# Carpetas de categorías ya creadas y con ícono en esta sesión
+prepared_folders = set()
+
+# Nombres ocupados en cada carpeta de destino
+name_index = NameIndex()
+
+# Deduplicador por contenido, activo solo si CONFIG['dedup'] tiene un modo
+deduplicator = Deduplicator(CONFIG['dedup']) if CONFIG['dedup'] else None
+
+# Detector de descargas terminadas; setup_completeness() lo ajusta a la carpeta
+completeness = build_detector(CONFIG['completeness'], TEMP_EXTENSIONS, CONFIG['stable_seconds'])
+
+# Catálogo persistente: recuerda lo procesado entre reinicios
+catalog = open_catalog() if CONFIG['catalog'] else None
+
+# Diario de movimientos: cada arranque del servicio es una ejecución
+journal = open_journal() if CONFIG['journal'] else None
+
+# Íconos de las carpetas de categorías, aplicados solo cuando faltan
+icons = IconProvisioner(os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons"))
+
+# Clasificador por contenido, activo solo si CONFIG['sniff'] tiene un modo
+sniffer = ContentSniffer(CONFIG['sniff']) if CONFIG['sniff'] else None
+
+# Reglas de destino compiladas; setup_rules() las carga al iniciar
+rules = None
+
+# Listados guardados al detenerse; solo sirven sin modo recursivo
+snapshot = ScanSnapshot() if CONFIG['snapshot'] and not CONFIG['recursive'] else None
+
+LOG_LEVELS = {'error': logging.ERROR, 'warning': logging.WARNING}
 
 def print_colored(message: str, color: str) -> None:
     if ENABLE_PRINTS:
         print(f"{COLORS.get(color, '')}{message}{COLORS['reset']}")
-    logging.info(message)
+    logging.log(LOG_LEVELS.get(color, logging.INFO), message)
 
-def find_downloads_folder() -> str:
-    """Encuentra la carpeta de descargas del usuario."""
-    try:
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders") as key:
-            downloads_path = winreg.QueryValueEx(key, "{374DE290-123F-4565-9164-39C4925E467B}")[0]
-            if os.path.exists(downloads_path):
-                return downloads_path
-    except FileNotFoundError:
-        logging.warning("No se encontró la clave del registro.")
-    except OSError as e:
-        logging.error(f"Error al acceder al registro: {e}")
-
-    user_profile = os.environ.get('USERPROFILE', '')
-    for folder in ['Downloads', 'Descargas']:
-        path = os.path.join(user_profile, folder)
-        if os.path.exists(path):
-            return path
-    return os.path.join(user_profile, 'Downloads')
-
-def get_category(filename: str) -> str:
-    """Determina la categoría de un archivo por su extensión."""
-    ext = os.path.splitext(filename.lower())[1]
-    return next((cat for cat, exts in EXTENSIONS.items() if ext in exts), 'others')
-
-def is_file_complete(file_path):
-    """Verifica si el archivo ha terminado de descargarse."""
-    try:
-        # Si el archivo tiene extensión temporal, no está completo
-        if any(file_path.lower().endswith(ext.lower()) for ext in TEMP_EXTENSIONS):
-            return False
-            
-        if not os.path.exists(file_path):
-            return False
+def log_file_event(message: str, color: str) -> None:
+    """Mensaje por archivo; se omite con CONFIG['log_each_file'] desactivado."""
+    if CONFIG['log_each_file']:
+        print_colored(message, color)
 
-        # Verifica si el archivo está siendo usado
-        try:
-            with open(file_path, 'rb') as f:
-                if os.name == 'nt':
-                    import msvcrt
-                    msvcrt.locking(f.fileno(), 1, 1)
-                    msvcrt.locking(f.fileno(), 0, 1)
-                return True
-        except (IOError, PermissionError):
-            return False
-            
-        return True
+def is_file_complete(file_path, entry: Entry = None):
+    """Verifica si el archivo ha terminado de descargarse.
+
+    Usa la estrategia de CONFIG['completeness']; salvo 'lock', ninguna abre
+    el archivo. Si se pasa el Entry del escaneo no se hace ningún stat.
+    """
+    try:
+        with metrics.timer('completeness'):
+            return completeness.is_complete(file_path, entry)
     except Exception as e:
         logging.error(f"Error al verificar archivo: {e}")
         return False
 
-def setup_folder_icon(folder_path: str, category: str) -> bool:
-    """Configura el ícono de una carpeta."""
-    if not CONFIG['enable_icons']:
-        return False
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    icon_path = os.path.join(script_dir, "icons", f"{category}.ico")
-    ini_path = os.path.join(folder_path, "desktop.ini")
+def setup_roots() -> List[WatchRoot]:
+    """Carpetas vigiladas según CONFIG['roots'], o solo la de descargas."""
+    return parse_roots(CONFIG['roots'] or [find_downloads_folder()])
+
+def setup_completeness(roots: List[WatchRoot]) -> None:
+    """Crea el detector configurado; 'inotify' necesita conocer las carpetas vigiladas."""
+    global completeness
+    completeness.close()
+    completeness = build_detector(CONFIG['completeness'], TEMP_EXTENSIONS,
+                                  CONFIG['stable_seconds'], [root.path for root in roots])
+
+def remember_destination(src: str, destination: str) -> None:
+    with recent_destinations_lock:
+        recent_destinations[os.path.normcase(src)] = destination
+        recent_destinations.move_to_end(os.path.normcase(src))
+        while len(recent_destinations) > RECENT_DESTINATIONS_SIZE:
+            recent_destinations.popitem(last=False)
+
+def recent_destination(src: str) -> Optional[str]:
+    """Destino de un archivo ya organizado, en memoria o en el catálogo."""
+    with recent_destinations_lock:
+        destination = recent_destinations.get(os.path.normcase(src))
+    if destination is None and catalog is not None:
+        destination = catalog.find_destination(src)
+    return destination
+
+def move_item(src: str, dest_folder: str) -> Optional[str]:
+    """Mueve un archivo o carpeta manejando duplicados; devuelve el destino o None."""
+    if dest_folder not in prepared_folders:
+        os.makedirs(dest_folder, exist_ok=True)
+        prepared_folders.add(dest_folder)
 
-    if not os.path.exists(icon_path):
-        return False
+    name = os.path.basename(src)
+    category = os.path.basename(dest_folder)
 
     try:
-        os.system(f'attrib +s "{folder_path}"')
-        with open(ini_path, 'w') as f:
-            f.write(f"[.ShellClassInfo]\nIconFile={icon_path}\nIconIndex=0\nConfirmFileOp=0\n")
-        os.system(f'attrib +s +h "{ini_path}"')
-        return True
-    except Exception:
-        return False
-
-def move_item(src: str, dest_folder: str) -> bool:
-    """Mueve un archivo o carpeta manejando duplicados."""
-    if not os.path.exists(dest_folder):
-        os.makedirs(dest_folder)
+        if deduplicator is not None:
+            st = os.stat(src)
+            duplicate = deduplicator.find_duplicate(src, dest_folder)
+            if duplicate and deduplicator.resolve(src, duplicate, name_index):
+                message = f"♻️ Duplicado ({deduplicator.mode}): {name} = {os.path.basename(duplicate)}"
+                log_file_event(message, 'info')
+                metrics.incr(f"dedup.{deduplicator.mode}")
+                if catalog is not None:
+                    catalog.record(src, duplicate, st.st_size, st.st_mtime, category, action=deduplicator.mode)
+                remember_destination(src, duplicate)
+                return duplicate
+
+        dest_path = name_index.move(src, dest_folder)
+        if deduplicator is not None:
+            deduplicator.register(dest_path, src)
+        if journal is not None:
+            journal.record(src, dest_path)
+        if catalog is not None:
+            catalog.record_move(src, dest_path, category, deduplicator and deduplicator.known_hash(dest_path))
+        remember_destination(src, dest_path)
+        metrics.incr('moves.ok')
+        message = f"✅ Movido: {name} -> {os.path.basename(dest_folder)}"
+        log_file_event(message, 'success')
+        return dest_path
+    except Exception as e:
+        metrics.incr('moves.failed')
+        message = f"❌ Error al mover {name}: {e}"
+        print_colored(message, 'error')
+        return None
 
-    name = os.path.basename(src)
-    dest_path = os.path.join(dest_folder, name)
+# Ejecutor compartido por el rescaneo, el watcher y la API
+move_executor = MoveExecutor(move_item, CONFIG['workers'])
 
-    if os.path.exists(dest_path):
-        base, ext = os.path.splitext(name)
-        counter = 1
-        while os.path.exists(dest_path):
-            dest_path = os.path.join(dest_folder, f"{base}_{counter}{ext}")
-            counter += 1
+# Un solo hilo de prioridad baja para el archivado: nunca compite con los movimientos
+archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive',
+                                      initializer=set_background_priority, initargs=(True,))
+# Pausa entre pasadas mientras quede trabajo atrasado
+ARCHIVE_BACKLOG_PAUSE = 5
 
+def ensure_category_folder(root: WatchRoot, category: str) -> str:
+    """Crea la carpeta de una categoría y su ícono una sola vez por sesión."""
+    category_path = root.category_folder(category)
+    if category_path not in prepared_folders:
+        os.makedirs(category_path, exist_ok=True)
+        if CONFIG['enable_icons']:
+            icons.ensure({category_path: category})
+        prepared_folders.add(category_path)
+    return category_path
+
+def setup_rules() -> None:
+    """Carga las reglas de destino; si el archivo tiene errores se sigue sin reglas."""
+    global rules
     try:
-        shutil.move(src, dest_path)
-        message = f"\n✅ Movido: {name} -> {os.path.basename(dest_folder)}\n"
-        print_colored(message, 'success')
-        logging.info(message)
+        rules = load_rules(CONFIG['rules'])
+    except (RuleError, OSError) as e:
+        print_colored(f"❌ Error en las reglas, se ignoran: {e}", 'error')
+        rules = None
+
+def parse_throttle(settings: Dict) -> Dict:
+    """Valida {bandwidth, operations, background}; falla con ValueError si algo no es válido.
+
+    null o 0 quitan el límite; por debajo de MIN_BANDWIDTH y MIN_OPERATIONS
+    no se acepta, porque dejaría los movimientos parados.
+    """
+    unknown = set(settings) - {'bandwidth', 'operations', 'background'}
+    if unknown:
+        raise ValueError(f"Claves desconocidas: {', '.join(sorted(unknown))}")
+    parsed = {}
+    if settings.get('bandwidth') is not None:
+        bandwidth = parse_size(settings['bandwidth'])
+        if bandwidth < 0 or 0 < bandwidth < MIN_BANDWIDTH:
+            raise ValueError(f"bandwidth debe ser al menos {MIN_BANDWIDTH} bytes por segundo")
+        parsed['bandwidth'] = bandwidth or None
+    elif 'bandwidth' in settings:
+        parsed['bandwidth'] = None
+    if settings.get('operations') is not None:
+        operations = settings['operations']
+        if isinstance(operations, bool) or not isinstance(operations, (int, float)) or operations < 0:
+            raise ValueError(f"operations no válido: {operations!r}")
+        if 0 < operations < MIN_OPERATIONS:
+            raise ValueError(f"operations debe ser al menos {MIN_OPERATIONS} por segundo")
+        parsed['operations'] = operations or None
+    elif 'operations' in settings:
+        parsed['operations'] = None
+    if 'background' in settings:
+        if not isinstance(settings['background'], bool):
+            raise ValueError(f"background no válido: {settings['background']!r}")
+        parsed['background'] = settings['background']
+    return parsed
+
+def setup_throttle() -> None:
+    """Aplica los límites de CONFIG; si no son válidos se sigue sin límites."""
+    try:
+        limits = parse_throttle({'bandwidth': CONFIG['bandwidth_limit'],
+                                 'operations': CONFIG['operations_limit'],
+                                 'background': CONFIG['background_priority']})
+    except ValueError as e:
+        print_colored(f"❌ Límites no válidos, se ignoran: {e}", 'error')
+        return
+    throttle.configure(**limits)
+
+def category_folder_ids(root: WatchRoot) -> set:
+    """Inodos de las carpetas de categorías y de reglas; se recalculan por si se recrearon."""
+    managed = [root.category_folder(category) for category in EXTENSIONS]
+    if rules is not None:
+        managed += rules.folders(root.target)
+    return folder_ids(managed)
+
+def destination_for(entry: Entry, root: WatchRoot) -> str:
+    """Carpeta de destino de un archivo: la de la primera regla que coincide o su categoría."""
+    with metrics.timer('classify'):
+        category = classify(entry, sniffer)
+        routed = rules.route(entry, root.path, category, target=root.target) if rules else None
+    if routed is not None:
+        if routed not in prepared_folders:
+            os.makedirs(routed, exist_ok=True)
+            prepared_folders.add(routed)
+        return routed
+    return ensure_category_folder(root, category)
+
+def in_scope(file_path: str, root: WatchRoot) -> bool:
+    """True si la ruta está en la zona que se organiza (primer nivel o subcarpetas)."""
+    parent = os.path.normcase(os.path.dirname(os.path.abspath(file_path)))
+    if parent == root.key:
         return True
-    except Exception as e:
-        message = f"❌ Error al mover {name}: {e}"
-        print_colored(message, 'error')
-        logging.error(message)
+    if not CONFIG['recursive'] or not parent.startswith(root.key + os.sep):
+        return False
+    parts = parent[len(root.key) + 1:].split(os.sep)
+    if len(parts) > CONFIG['max_depth']:
         return False
+    # Dentro de una carpeta de categoría no se toca nada (comparado por inodo)
+    try:
+        top_level = os.stat(os.path.join(root.path, parts[0])).st_ino
+    except OSError:
+        return False
+    return top_level not in category_folder_ids(root)
 
-def organize_downloads():
-    """Organiza los archivos en la carpeta de descargas."""
-    downloads = find_downloads_folder()
-    message = f"📂 Organizando: {downloads}..."
+def plan_file(file_path: str, root: WatchRoot) -> Optional[str]:
+    """Carpeta de destino de un archivo suelto, o None si no hay que moverlo."""
+    name = os.path.basename(file_path)
+
+    # Solo archivos del primer nivel de la carpeta vigilada (o de sus subcarpetas en modo recursivo)
+    if not in_scope(file_path, root):
+        return None
+    if any(name.lower().endswith(ext.lower()) for ext in TEMP_EXTENSIONS):
+        return None
+    try:
+        entry = entry_from_path(file_path)
+    except OSError:
+        return None
+    if not entry.is_file:
+        return None
+    if catalog is not None and catalog.is_processed(file_path, entry.size, entry.mtime):
+        return None
+    return destination_for(entry, root)
+
+def save_state() -> None:
+    """Persiste caché de hashes, catálogo y diario tras un lote de movimientos."""
+    if deduplicator is not None:
+        deduplicator.cache.save()
+    if catalog is not None:
+        catalog.flush()
+    if journal is not None:
+        journal.flush()
+
+def organize_file(file_path: str, root: WatchRoot) -> Optional[Future]:
+    """Clasifica solo el archivo indicado y encola su movimiento, sin recorrer toda la carpeta.
+
+    Devuelve el Future del movimiento (None si no hay que moverlo); el
+    movimiento va al ejecutor compartido, por turnos con las demás
+    carpetas vigiladas.
+    """
+    dest = plan_file(file_path, root)
+    if dest is None:
+        return None
+    future = move_executor.submit(file_path, dest, root)
+    if CONFIG['recursive']:
+        def prune(done: Future) -> None:
+            if not done.exception() and done.result():
+                prune_empty_dirs([file_path], root.path)
+        future.add_done_callback(prune)
+    return future
+
+def when_all_done(futures: List[Future], callback: Callable[[], None]) -> None:
+    """Llama a callback una vez, cuando termine el último de futures."""
+    if not futures:
+        return
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback()
+    for future in futures:
+        future.add_done_callback(done)
+
+def organize_downloads(root: WatchRoot = None, use_snapshot: bool = False,
+                       on_incomplete: Optional[Callable[[str], None]] = None):
+    """Organiza todos los archivos de una carpeta vigilada (inicio y reconciliación).
+
+    Con use_snapshot, si la carpeta no cambió desde que se detuvo el
+    servicio solo se revisa lo que quedó en ella en lugar de listarla.
+    Las descargas sin terminar se pasan a on_incomplete para volver a
+    revisarlas: puede que ningún evento del watcher lo haga.
+    """
+    root = root or WatchRoot(find_downloads_folder())
+    message = f"📂 Organizando: {root.path}..."
     logging.info(message)
     
-    success = 0
-    failed = 0
+    moves = []
 
     # Crear carpetas si no existen
     for category in EXTENSIONS:
-        category_path = os.path.join(downloads, category)
-        os.makedirs(category_path, exist_ok=True)
-        setup_folder_icon(category_path, category)
-
-    for item in os.listdir(downloads):
-        item_path = os.path.join(downloads, item)
+        ensure_category_folder(root, category)
+
+    category_ids = category_folder_ids(root)
+    scan_start = time.perf_counter()
+    entries = None
+    if CONFIG['recursive']:
+        entries = walk_tree(root.path, CONFIG['max_depth'], CONFIG['workers'], skip=category_ids)
+    elif use_snapshot and snapshot is not None:
+        entries = snapshot.entries(root.path)
+        if entries is not None:
+            metrics.incr('snapshot.hits')
+    if entries is None:
+        entries = scan_directory(root.path)
+    for entry in entries:
+        metrics.incr('scan.entries')
+        item = entry.name
+        item_path = entry.path
+
+        # Ignorar archivos temporales y carpetas de categorías (por inodo: una 'music' anidada no lo es)
+        if (entry.is_dir and entry.inode in category_ids) or any(item.lower().endswith(ext.lower()) for ext in TEMP_EXTENSIONS):
+            continue
 
-        # Ignorar archivos temporales y carpetas de categorías
-        if item in EXTENSIONS or any(item.lower().endswith(ext.lower()) for ext in TEMP_EXTENSIONS):
+        if entry.is_file and catalog is not None and catalog.is_processed(item_path, entry.size, entry.mtime):
             continue
 
-        if os.path.isfile(item_path) and is_file_complete(item_path):
-            category = get_category(item)
-            dest = os.path.join(downloads, category)
-        elif os.path.isdir(item_path) and CONFIG['move_folders']:
-            dest = os.path.join(downloads, 'others')
+        if entry.is_file and is_file_complete(item_path, entry):
+            dest = destination_for(entry, root)
+        elif entry.is_file:
+            if on_incomplete is not None:
+                on_incomplete(item_path)
+            continue
+        elif entry.is_dir and CONFIG['move_folders'] and not CONFIG['recursive']:
+            dest = root.category_folder('others')
         else:
             continue
 
-        if move_item(item_path, dest):
-            success += 1
+        moves.append((item_path, dest))
+    metrics.observe('scan', time.perf_counter() - scan_start)
+
+    # Agrupado por carpeta vigilada: se turna con las demás en los destinos compartidos
+    result = move_executor.run(moves, group=root)
+    if CONFIG['recursive']:
+        prune_empty_dirs((src for src, _ in moves), root.path)
+
+    save_state()
+    return result
+
+def submit_paths(file_paths: List, find_root: Callable[[str], Optional[WatchRoot]]) -> List[Optional[Future]]:
+    """Planifica las rutas recibidas y encola en el ejecutor las que hay que mover."""
+    futures = []
+    for file_path in file_paths:
+        root = find_root(file_path) if isinstance(file_path, str) else None
+        dest = plan_file(file_path, root) if root is not None else None
+        futures.append(move_executor.submit(file_path, dest, root) if dest else None)
+    return futures
+
+def collect_results(file_paths: List, destinations: List[Optional[str]]) -> List[Dict[str, str]]:
+    """Arma la respuesta para la extensión a partir de los destinos obtenidos."""
+    results = []
+    for file_path, destination in zip(file_paths, destinations):
+        if destination is None and isinstance(file_path, str):
+            # Puede que el watcher ya lo haya movido
+            destination = recent_destination(file_path)
+        if destination is not None:
+            results.append({'file_path': file_path, 'destination': destination})
         else:
-            failed += 1
-
-    return success, failed
-
-class DownloadEventHandler(FileSystemEventHandler):
-    def __init__(self):
+            results.append({'file_path': file_path, 'error': 'No se pudo organizar el archivo'})
+
+    save_state()
+    return results
+
+def organize_paths(file_paths: List, find_root: Callable[[str], Optional[WatchRoot]]) -> List[Dict[str, str]]:
+    """Organiza un lote de rutas enviadas por la extensión y devuelve sus destinos."""
+    futures = submit_paths(file_paths, find_root)
+    return collect_results(file_paths, [f.result() if f is not None else None for f in futures])
+
+async def organize_paths_async(file_paths: List,
+                               find_root: Callable[[str], Optional[WatchRoot]]) -> List[Dict[str, str]]:
+    """Igual que organize_paths, pero esperando los movimientos sin ocupar un hilo."""
+    loop = asyncio.get_running_loop()
+    futures = await loop.run_in_executor(None, submit_paths, file_paths, find_root)
+    destinations = [await asyncio.wrap_future(f) if f is not None else None for f in futures]
+    return await loop.run_in_executor(None, collect_results, file_paths, destinations)
+
+def register_api(daemon: AsyncDaemon, roots: List[WatchRoot]) -> None:
+    """API local: POST / con {file_path}, POST /batch con {file_paths: [...]}
+    y GET/POST /throttle para ver o cambiar los límites en caliente.
+
+    Cada ruta se organiza según la carpeta vigilada que la contiene.
+    """
+    find_root = root_finder(roots)
+
+    async def organize_one(payload):
+        file_path = payload.get('file_path') if isinstance(payload, dict) else None
+        result = (await organize_paths_async([file_path], find_root))[0]
+        return (200 if 'destination' in result else 404), result
+
+    async def organize_batch(payload):
+        file_paths = payload.get('file_paths') if isinstance(payload, dict) else None
+        if not isinstance(file_paths, list):
+            return 400, {'error': 'Se esperaba file_paths: [...]'}
+        return 200, {'results': await organize_paths_async(file_paths, find_root)}
+
+    async def metrics_snapshot(payload):
+        return 200, metrics.snapshot()
+
+    async def catalog_stats(payload):
+        if catalog is None:
+            return 503, {'error': 'Catálogo no disponible'}
+        stats = await asyncio.get_running_loop().run_in_executor(None, catalog.stats)
+        return 200, {category or 'otros': {'count': count, 'bytes': total}
+                     for category, (count, total) in stats.items()}
+
+    async def throttle_settings(payload):
+        return 200, throttle.settings()
+
+    async def update_throttle(payload):
+        # Solo cambian las claves enviadas; null quita ese límite
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Se esperaba {bandwidth, operations, background}'}
+        try:
+            changes = parse_throttle(payload)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        settings = throttle.configure(**{**throttle.settings(), **changes})
+        print_colored(f"🐢 Límites: {settings}", 'info')
+        return 200, settings
+
+    daemon.route('POST', '/', organize_one)
+    daemon.route('POST', '/batch', organize_batch)
+    daemon.route('GET', '/metrics', metrics_snapshot)
+    daemon.route('GET', '/stats', catalog_stats)
+    daemon.route('GET', '/throttle', throttle_settings)
+    daemon.route('POST', '/throttle', update_throttle)
+
+async def log_metrics_periodically(interval: float) -> None:
+    """Resumen periódico de métricas: visibilidad sin una línea por archivo."""
+    while True:
+        await asyncio.sleep(interval)
+        logging.info(f"📊 {metrics.summary()}")
+
+def archive_roots(roots: List[WatchRoot]) -> Tuple[int, int]:
+    """Una pasada acotada de archivado por las carpetas de categorías de cada raíz."""
+    files = freed = 0
+    for root in roots:
+        for category in EXTENSIONS:
+            try:
+                count, size = compact_folder(root.category_folder(category), CONFIG['archive_after_days'],
+                                             CONFIG['archive_compression'], category, CONFIG['archive_batch'],
+                                             arrivals=catalog and catalog.moved_at)
+            except (OSError, ValueError) as e:
+                logging.error(f"Error archivando {root.category_folder(category)}: {e}")
+                continue
+            files += count
+            freed += size
+    return files, freed
+
+async def archive_periodically(roots: List[WatchRoot], interval: float) -> None:
+    """Archivado en segundo plano por lotes; repite pronto mientras haya atraso."""
+    loop = asyncio.get_running_loop()
+    while True:
+        files, freed = await loop.run_in_executor(archive_executor, archive_roots, roots)
+        if files:
+            print_colored(f"🗜️ Archivados {files} archivos ({freed / 1e6:.1f} MB)", 'info')
+        await asyncio.sleep(ARCHIVE_BACKLOG_PAUSE if files else interval)
+
+class DownloadEventHandler:
+    """Un solo handler para todas las carpetas vigiladas; cada ruta sabe de cuál es.
+
+    Implementa dispatch() como FileSystemEventHandler para no importar
+    watchdog hasta que se arranca el observer.
+    """
+
+    def __init__(self, roots: List[WatchRoot], queue_factory=EventCoalescer, timers_factory=DeadlineScheduler):
+        self.roots = roots
+        self.find_root = root_finder(roots)
         self.processing_files = {}
+        # Rutas con un movimiento encolado o en curso
+        self.moving = set()
+        # Los eventos del watchdog se agrupan por ruta y se procesan en lotes
+        self.queue = queue_factory(self.process_batch, CONFIG['debounce_seconds'])
+        # Un plazo por descarga en curso; se rearma con cada evento nuevo
+        self.stall_timers = timers_factory(self.queue.push)
         
     def clean_processing_files(self):
         """Limpia los archivos que ya no existen de processing_files"""
@@ -197,98 +606,203 @@ class DownloadEventHandler(FileSystemEventHandler):
             if not os.path.exists(file_path):
                 del self.processing_files[file_path]
                 message = f"✅ Proceso completado: {file_path}"
-                print_colored(message, 'success')
-                logging.info(message)
+                log_file_event(message, 'success')
+
+    def process_batch(self, file_paths) -> List[Future]:
+        """Procesa un lote de rutas ya agrupadas por la cola de eventos.
 
-    def handle_file_event(self, file_path):
-        """Maneja los eventos de archivo."""
-        # Primero limpiamos archivos que ya no existen
+        Los movimientos quedan en el ejecutor compartido y no se esperan:
+        una copia grande o limitada no frena los eventos de las demás
+        carpetas. Devuelve sus Futures.
+        """
+        # Primero limpiamos archivos que ya no existen, una vez por lote
         self.clean_processing_files()
-        
+        futures = [future for future in map(self.handle_file_event, file_paths) if future is not None]
+        # Un guardado (y un fsync del diario) por lote, cuando termina su último movimiento
+        when_all_done(futures, save_state)
+        metrics.incr('events.batches')
+        metrics.incr('events.paths', len(file_paths))
+        return futures
+
+    def handle_file_event(self, file_path) -> Optional[Future]:
+        """Maneja los eventos de archivo; devuelve el Future del movimiento si lo encoló."""
         # Si el archivo no existe, no hacemos nada
         if not os.path.exists(file_path):
             if file_path in self.processing_files:
                 del self.processing_files[file_path]
-            return
-            
-        if file_path not in processed_files:
-            base_path = file_path
-            # Si es un archivo temporal, obtén el nombre base
-            for ext in TEMP_EXTENSIONS:
-                if file_path.endswith(ext):
-                    base_path = file_path[:-len(ext)]
-                    break
-                    
-            if is_file_complete(file_path):
-                if file_path not in processed_files:
-                    processed_files.append(file_path)
-                    if file_path in self.processing_files:
-                        del self.processing_files[file_path]
-                    message = f"📂 Archivo completado: {file_path}"
-                    print_colored(message, 'info')
-                    logging.info(message)
-                    organize_downloads()
-            else:
-                if file_path not in self.processing_files:
-                    self.processing_files[file_path] = time.time()
-                    message = f"⏳ Archivo descargándose: {file_path}"
-                    print_colored(message, 'warning')
-                    logging.info(message)
+            self.stall_timers.cancel(file_path)
+            completeness.forget(file_path)
+            return None
+        # Ya encolado: los eventos que genere mientras espera su turno no lo repiten
+        if file_path in self.moving:
+            return None
+
+        # Lo ya organizado no vuelve a estar en esta ruta; una descarga nueva con el
+        # mismo nombre sí, y el catálogo la distingue por tamaño y fecha en plan_file
+        if is_file_complete(file_path):
+            if file_path in self.processing_files:
+                del self.processing_files[file_path]
+            self.stall_timers.cancel(file_path)
+            message = f"📂 Archivo completado: {file_path}"
+            log_file_event(message, 'info')
+            root = self.find_root(file_path)
+            future = organize_file(file_path, root) if root is not None else None
+            if future is not None:
+                self.moving.add(file_path)
+                future.add_done_callback(lambda _: self.moving.discard(file_path))
+            return future
+        self.wait_for(file_path)
+        return None
+
+    def wait_for(self, file_path):
+        """Anota una descarga en curso y la vuelve a revisar al vencer su plazo."""
+        if file_path not in self.processing_files:
+            self.processing_files[file_path] = time.time()
+            message = f"⏳ Archivo descargándose: {file_path}"
+            log_file_event(message, 'warning')
+        # Si no llegan más eventos, se vuelve a revisar al vencer el plazo
+        recheck = completeness.recheck_after or CONFIG['stall_timeout']
+        self.stall_timers.schedule(file_path, min(recheck, CONFIG['stall_timeout']))
+
+    def dispatch(self, event):
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler is not None:
+            handler(event)
 
     def on_created(self, event):
         if not event.is_directory:
-            self.handle_file_event(event.src_path)
+            self.queue.push(event.src_path)
 
     def on_modified(self, event):
         if not event.is_directory:
-            self.handle_file_event(event.src_path)
+            self.queue.push(event.src_path)
+
+    def on_moved(self, event):
+        """Maneja el renombrado final de las descargas (p. ej. .crdownload -> .pdf)."""
+        if not event.is_directory:
+            # El origen ya no existe: al procesarse sale de processing_files
+            self.queue.push(event.src_path)
+            self.queue.push(event.dest_path)
 
     def on_deleted(self, event):
         """Maneja cuando se elimina un archivo."""
         if not event.is_directory:
-            if event.src_path in self.processing_files:
-                del self.processing_files[event.src_path]
-
-def monitor_downloads():
-    """Monitorea la carpeta de descargas y organiza los archivos."""
-    downloads_folder = find_downloads_folder()
-    event_handler = DownloadEventHandler()
+            self.queue.push(event.src_path)
+
+async def run_daemon(roots: List[WatchRoot]) -> None:
+    """Servicio completo en un bucle asyncio: API, watcher, temporizadores y movimientos.
+
+    Todas las carpetas vigiladas comparten el observer, la cola de eventos
+    y el ejecutor de movimientos; la cola y el ejecutor las atienden por
+    turnos para que una carpeta muy activa no frene a las demás.
+    """
+    daemon = AsyncDaemon(CONFIG['api_host'], CONFIG['api_port'], CONFIG['api_connections'])
+    register_api(daemon, roots)
+    loop = asyncio.get_running_loop()
+    if journal is not None:
+        journal.start_run(os.pathsep.join(root.path for root in roots), kind='daemon')
+
+    def reconcile(root: Optional[WatchRoot]):
+        # La cola de esa carpeta se desbordó: un rescaneo completo recupera lo que se descartó
+        if root is not None:
+            loop.run_in_executor(None, organize_downloads, root, False, event_handler.wait_for)
+
+    event_handler = DownloadEventHandler(
+        roots,
+        queue_factory=lambda handler, debounce: AsyncEventBridge(
+            loop, handler, debounce, on_overflow=reconcile, partition=root_finder(roots)),
+        timers_factory=lambda callback: LoopTimers(loop, callback))
+    from watchdog.observers import Observer
     observer = Observer()
-    observer.schedule(event_handler, downloads_folder, recursive=False)
-    observer.start()
+    for root in roots:
+        observer.schedule(event_handler, root.path, recursive=CONFIG['recursive'])
+    metrics.gauge('event_queue.depth', lambda: event_handler.queue.metrics()['depth'])
+    metrics.gauge('event_queue', event_handler.queue.metrics)
+    metrics.gauge('downloads_in_progress', lambda: len(event_handler.processing_files))
+    metrics.gauge('throttle', throttle.settings)
+
+    async def initial_scan() -> None:
+        # Rescaneo inicial con el watcher ya activo para no perder eventos
+        results = await asyncio.gather(*(loop.run_in_executor(None, organize_downloads, root, True,
+                                                              event_handler.wait_for)
+                                         for root in roots))
+        success = sum(ok for ok, _ in results)
+        failed = sum(ko for _, ko in results)
+        message = f"🎉 Completado: {success} elementos organizados"
+        print_colored(message, 'success')
+        if failed > 0:
+            message = f"⚠️ {failed} errores"
+            print_colored(message, 'error')
+        message = "👀 Monitoreando cambios...\n"
+        print_colored(message, 'info')
+
+    # El bucle solo guarda referencias débiles: sin estas, el recolector puede cortar una tarea
+    background = []
+
+    async def startup(daemon: AsyncDaemon) -> None:
+        event_handler.queue.start()
+        observer.start()
+        if CONFIG['metrics_interval']:
+            background.append(loop.create_task(log_metrics_periodically(CONFIG['metrics_interval'])))
+        if CONFIG['archive_after_days'] is not None:
+            background.append(loop.create_task(archive_periodically(roots, CONFIG['archive_interval'])))
+        print_colored(f"🌐 API escuchando en http://{CONFIG['api_host']}:{daemon.port}", 'info')
+        # En segundo plano: una señal de parada se atiende aunque el rescaneo siga
+        background.append(loop.create_task(initial_scan()))
+
+    async def stopping(daemon: AsyncDaemon) -> None:
+        print_colored("🛑 Deteniendo servicio...", 'info')
+        event_handler.queue.stop()
+        event_handler.stall_timers.stop()
+        # No se acepta más trabajo y lo encolado falla: rescaneos y /batch dejan de esperar
+        await loop.run_in_executor(None, stop_moves)
 
     try:
-        while True:
-            time.sleep(1)
-            # Verifica archivos que llevan mucho tiempo procesando
-            current_time = time.time()
-            for file_path, start_time in list(event_handler.processing_files.items()):
-                if current_time - start_time > 30:  # 30 segundos de timeout
-                    if is_file_complete(file_path):
-                        event_handler.handle_file_event(file_path)
-    except KeyboardInterrupt:
-        observer.stop()
+        await daemon.serve(startup, stopping)
+    finally:
+        await loop.run_in_executor(None, shutdown, observer, roots)
+
+def stop_moves() -> None:
+    """Suelta los límites y falla los movimientos pendientes sin esperar a los que corren."""
+    throttle.close()
+    move_executor.shutdown(wait=False)
+
+def shutdown(observer, roots: List[WatchRoot] = ()) -> None:
+    """Cierre ordenado: termina los movimientos en curso y guarda el estado."""
+    observer.stop()
     observer.join()
+    stop_moves()
+    # Los movimientos en curso terminan; los pendientes ya fallaron
+    move_executor.shutdown(wait=True)
+    # La pasada en curso está acotada por archive_batch; se deja terminar
+    archive_executor.shutdown(wait=True)
+    if snapshot is not None:
+        for root in roots:
+            try:
+                snapshot.record(root.path)
+            except OSError:
+                pass
+    completeness.close()
+    if deduplicator is not None:
+        deduplicator.cache.save()
+    if catalog is not None:
+        catalog.close()
+    if journal is not None:
+        journal.close()
+
+def main():
+    try:
+        message = "🚀 Iniciando organización automática..."
+        print_colored(message, 'info')
+        roots = setup_roots()
+        setup_completeness(roots)
+        setup_rules()
+        setup_throttle()
+        asyncio.run(run_daemon(roots))
+    except Exception as e:
+        message = f"❌ Error: {e}"
+        print_colored(message, 'error')
+        sys.exit(1)
 
 if __name__ == "__main__":
-    def signal_handler(sig, frame):
-        sys.exit(0)
-
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-try:
-    message = "🚀 Iniciando organización automática..."
-    print_colored(message, 'info')
-    success, failed = organize_downloads()
-    message = f"🎉 Completado: {success} elementos organizados"
-    print_colored(message, 'success')
-    if failed > 0:
-        message = f"⚠️ {failed} errores"
-        print_colored(message, 'error')
-    message = "👀 Monitoreando cambios...\n"
-    print_colored(message, 'info')
-    monitor_downloads()
-except Exception as e:
-    message = f"❌ Error: {e}"
-    print_colored(message, 'error')
-    sys.exit(1)
\ No newline at end of file
+    main()
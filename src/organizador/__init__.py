@@ -0,0 +1 @@
+"""Módulos compartidos por organizar.py, el ejecutable y server.py."""
@@ -0,0 +1,365 @@
+"""Archivado de los archivos antiguos de las carpetas de categorías en zips mensuales.
+
+Cada carpeta de categoría guarda sus archivos en '.archive/AAAA-MM.zip'
+según el mes en que llegaron, más un índice JSON Lines (index.jsonl) con
+una línea por archivo: nombre original, miembro, zip, tamaño y fecha. Con
+el índice se sabe en qué zip está un archivo sin abrirlos todos, y el
+directorio central del zip permite sacarlo sin descomprimir el resto.
+
+Los datos se copian por bloques directamente al zip (memoria acotada sin
+importar el tamaño). Antes de añadir a un zip existente se guarda aparte
+su directorio central: si el proceso muere a mitad, la siguiente pasada
+deja el zip como estaba, y los originales solo se borran después de
+cerrar y sincronizar el zip y el índice.
+"""
+import json
+import os
+import shutil
+import time
+import zipfile
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from organizador.metrics import metrics
+from organizador.naming import NameIndex
+from organizador.throttle import throttle
+
+ARCHIVE_DIR = '.archive'
+INDEX_NAME = 'index.jsonl'
+# Copia del directorio central previo a una escritura en curso
+TAIL_SUFFIX = '.tail'
+COMPRESSIONS = {'lzma': zipfile.ZIP_LZMA, 'deflate': zipfile.ZIP_DEFLATED, 'store': zipfile.ZIP_STORED}
+# Categorías cuyo contenido ya viene comprimido: recomprimirlo solo gasta CPU
+STORED_CATEGORIES = ('images', 'videos', 'music', 'compressed')
+BUFFER_SIZE = 1024 * 1024
+# Archivos de la propia carpeta (íconos) que nunca se archivan
+_KEEP_NAMES = ('desktop.ini',)
+
+class ArchivedFile(NamedTuple):
+    name: str
+    member: str
+    archive: str
+    size: int
+    mtime: float
+    archived: float
+
+# Fecha en que se movió un archivo a su carpeta (p. ej. Catalog.moved_at), o None si no consta
+ArrivalLookup = Callable[[str], Optional[float]]
+
+def arrival_time(st: os.stat_result, moved_at: Optional[float] = None) -> float:
+    """Cuándo llegó el archivo a la carpeta.
+
+    Lo más fiable es la fecha del movimiento registrada en el catálogo. Sin
+    ella se usa la fecha de creación donde el sistema la da (st_birthtime)
+    y, si no, la de modificación. st_ctime no sirve: en POSIX cambia con
+    cada renombrado o chmod, y como creación en Windows está obsoleto.
+    """
+    if moved_at is not None:
+        return moved_at
+    birthtime = getattr(st, 'st_birthtime', None)
+    return birthtime if birthtime else st.st_mtime
+
+def archive_dir(folder: str) -> str:
+    return os.path.join(folder, ARCHIVE_DIR)
+
+def find_candidates(folder: str, older_than: float,
+                    arrivals: Optional[ArrivalLookup] = None) -> Iterator[Tuple[str, os.stat_result, float]]:
+    """(ruta, stat, llegada) de los archivos de folder (sin subcarpetas ni ocultos) llegados antes de older_than."""
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name.lower() in _KEEP_NAMES:
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            arrived = arrival_time(st, arrivals(entry.path) if arrivals else None)
+            if arrived < older_than:
+                yield entry.path, st, arrived
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _save_tail(zip_path: str) -> Dict[str, zipfile.ZipInfo]:
+    """Guarda el directorio central actual del zip y devuelve sus miembros por nombre."""
+    members: Dict[str, zipfile.ZipInfo] = {}
+    start, tail = 0, b''
+    if os.path.exists(zip_path):
+        with zipfile.ZipFile(zip_path) as zf:
+            members = {info.filename: info for info in zf.infolist()}
+            start = zf.start_dir
+        with open(zip_path, 'rb') as f:
+            f.seek(start)
+            tail = f.read()
+    tmp_path = f"{zip_path}{TAIL_SUFFIX}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(start.to_bytes(8, 'little'))
+        f.write(tail)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, zip_path + TAIL_SUFFIX)
+    return members
+
+def recover(zip_path: str) -> bool:
+    """Deshace una escritura interrumpida dejando el zip como antes; True si hizo falta."""
+    tail_path = zip_path + TAIL_SUFFIX
+    try:
+        with open(tail_path, 'rb') as f:
+            start = int.from_bytes(f.read(8), 'little')
+            tail = f.read()
+    except FileNotFoundError:
+        return False
+    if not tail:
+        # El zip se estaba creando: no había nada que conservar
+        try:
+            os.unlink(zip_path)
+        except FileNotFoundError:
+            pass
+    elif os.path.exists(zip_path):
+        with open(zip_path, 'r+b') as f:
+            f.truncate(start)
+            f.seek(start)
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+    os.unlink(tail_path)
+    return True
+
+def _unique_member(name: str, members: Dict[str, zipfile.ZipInfo]) -> str:
+    if name not in members:
+        return name
+    base, ext = os.path.splitext(name)
+    counter = 1
+    while f"{base}_{counter}{ext}" in members:
+        counter += 1
+    return f"{base}_{counter}{ext}"
+
+def _zip_time(date_time: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Fecha tal como queda en un zip: entre 1980 y 2107, con segundos pares."""
+    if date_time[0] < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    if date_time[0] > 2107:
+        return (2107, 12, 31, 23, 59, 58)
+    return tuple(date_time[:5]) + (date_time[5] // 2 * 2,)
+
+def _already_archived(name: str, st: os.stat_result, members: Dict[str, zipfile.ZipInfo]) -> bool:
+    # Una pasada anterior cerró el zip pero no llegó a borrar el original
+    info = members.get(name)
+    return (info is not None and info.file_size == st.st_size
+            and _zip_time(info.date_time) == _zip_time(time.localtime(st.st_mtime)[:6]))
+
+def _copy_into(zf: zipfile.ZipFile, src: str, member: str, compress_type: int) -> bool:
+    """Copia src al zip por bloques; False si no se pudo abrir (no se escribe nada)."""
+    try:
+        info = zipfile.ZipInfo.from_file(src, member, strict_timestamps=False)
+        fsrc = open(src, 'rb')
+    except OSError:
+        return False
+    info.compress_type = compress_type
+    with fsrc, zf.open(info, 'w') as fdst:
+        while True:
+            data = fsrc.read(throttle.chunk_size(BUFFER_SIZE))
+            if not data:
+                break
+            fdst.write(data)
+            throttle.transferred(len(data))
+    return True
+
+def _append_index(folder: str, archived: List[ArchivedFile]) -> None:
+    with open(os.path.join(archive_dir(folder), INDEX_NAME), 'a', encoding='utf-8') as f:
+        for item in archived:
+            f.write(json.dumps(item._asdict(), ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def _archive_month(folder: str, month: str, files: List[Tuple[str, os.stat_result]],
+                   compress_type: int) -> Tuple[int, int]:
+    """Añade files al zip del mes; devuelve (archivos, bytes) quitados de la carpeta."""
+    zip_name = f"{month}.zip"
+    zip_path = os.path.join(archive_dir(folder), zip_name)
+    recover(zip_path)
+    members = _save_tail(zip_path)
+    archived: List[ArchivedFile] = []
+    done: List[Tuple[str, os.stat_result]] = []
+    try:
+        with zipfile.ZipFile(zip_path, 'a', allowZip64=True) as zf:
+            for src, st in files:
+                name = os.path.basename(src)
+                if _already_archived(name, st, members):
+                    done.append((src, st))
+                    continue
+                throttle.operations.take(1)
+                member = _unique_member(name, members)
+                if not _copy_into(zf, src, member, compress_type):
+                    # Se movió, se borró o está bloqueado: queda para la próxima pasada
+                    continue
+                members[member] = zf.getinfo(member)
+                archived.append(ArchivedFile(name, member, zip_name, st.st_size, st.st_mtime, time.time()))
+                done.append((src, st))
+        _fsync_path(zip_path)
+        if archived:
+            _append_index(folder, archived)
+    except BaseException:
+        # Nada se borró todavía: el zip vuelve a su estado anterior
+        recover(zip_path)
+        raise
+    os.unlink(zip_path + TAIL_SUFFIX)
+
+    removed = freed = 0
+    for src, st in done:
+        try:
+            current = os.stat(src)
+            # Si cambió mientras se copiaba, se conserva: el zip tiene la versión anterior
+            if current.st_size == st.st_size and current.st_mtime_ns == st.st_mtime_ns:
+                os.unlink(src)
+                removed += 1
+                freed += st.st_size
+        except OSError:
+            pass
+    return removed, freed
+
+def compact_folder(folder: str, older_than_days: float, compression: str = 'lzma',
+                   category: Optional[str] = None, limit: Optional[int] = None,
+                   now: Optional[float] = None, arrivals: Optional[ArrivalLookup] = None) -> Tuple[int, int]:
+    """Archiva hasta limit archivos de folder llegados hace más de older_than_days.
+
+    Devuelve (archivos, bytes) que salieron de la carpeta. Con limit cada
+    pasada hace un trabajo acotado y la siguiente sigue donde quedó.
+    arrivals da la fecha de llegada registrada de cada ruta (ver
+    arrival_time).
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compresión no válida: {compression}")
+    category = category or os.path.basename(folder)
+    compress_type = zipfile.ZIP_STORED if category in STORED_CATEGORIES else COMPRESSIONS[compression]
+    cutoff = (time.time() if now is None else now) - older_than_days * 86400
+    candidates = list(islice(find_candidates(folder, cutoff, arrivals), limit))
+    if not candidates:
+        return 0, 0
+
+    months: Dict[str, List[Tuple[str, os.stat_result]]] = {}
+    for src, st, arrived in candidates:
+        month = time.strftime('%Y-%m', time.localtime(arrived))
+        months.setdefault(month, []).append((src, st))
+    os.makedirs(archive_dir(folder), exist_ok=True)
+    if not os.path.exists(os.path.join(archive_dir(folder), INDEX_NAME)) and _has_archives(folder):
+        # Sin índice lo nuevo se anotaría solo; antes se recupera lo que ya hay en los zips
+        rebuild_index(folder)
+    removed = freed = 0
+    for month in sorted(months):
+        with metrics.timer('archive.month'):
+            files, size = _archive_month(folder, month, months[month], compress_type)
+        removed += files
+        freed += size
+    metrics.incr('archive.files', removed)
+    metrics.incr('archive.bytes', freed)
+    return removed, freed
+
+def _parse_index(path: str) -> Optional[List[ArchivedFile]]:
+    """Entradas de un índice, o None si falta o no se puede leer.
+
+    Una línea cortada (p. ej. por un corte de luz) se salta; si no queda
+    ninguna entrada válida el índice se da por perdido.
+    """
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except OSError:
+        return None
+    items: List[ArchivedFile] = []
+    damaged = 0
+    with f:
+        for line in f:
+            try:
+                items.append(ArchivedFile(**json.loads(line)))
+            except (TypeError, ValueError):
+                damaged += 1
+    return None if damaged and not items else items
+
+def _has_archives(folder: str) -> bool:
+    try:
+        return any(name.endswith('.zip') for name in os.listdir(archive_dir(folder)))
+    except OSError:
+        return False
+
+def _load_index(folder: str) -> List[ArchivedFile]:
+    """Entradas del índice; si falta o está ilegible y hay zips, se rehace a partir de ellos."""
+    path = os.path.join(archive_dir(folder), INDEX_NAME)
+    items = _parse_index(path)
+    if items is None and _has_archives(folder):
+        try:
+            rebuild_index(folder)
+        except (OSError, zipfile.BadZipFile):
+            return []
+        items = _parse_index(path)
+    return items or []
+
+def read_index(folder: str) -> Iterator[ArchivedFile]:
+    """Recorre el índice en orden; las líneas dañadas se saltan."""
+    return iter(_load_index(folder))
+
+def find_archived(folder: str, name: str) -> Optional[ArchivedFile]:
+    """Última versión archivada de name (nombre original o de miembro)."""
+    found = None
+    for item in read_index(folder):
+        if item.name == name or item.member == name:
+            found = item
+    return found
+
+def extract_file(folder: str, name: str, dest_folder: Optional[str] = None,
+                 names: Optional[NameIndex] = None) -> str:
+    """Saca un archivo de su zip a dest_folder (la propia carpeta por defecto).
+
+    Solo se lee ese miembro; el nombre se reserva como cualquier
+    movimiento para no pisar un archivo que ya esté. Devuelve la ruta.
+    """
+    item = find_archived(folder, name)
+    if item is None:
+        raise FileNotFoundError(f"{name} no está archivado en {folder}")
+    dest_folder = dest_folder or folder
+    names = names or NameIndex()
+    dest_path = names.claim(dest_folder, item.name)
+    try:
+        with zipfile.ZipFile(os.path.join(archive_dir(folder), item.archive)) as zf:
+            with zf.open(item.member) as fsrc, open(dest_path, 'wb') as fdst:
+                shutil.copyfileobj(fsrc, fdst, BUFFER_SIZE)
+    except BaseException:
+        os.unlink(dest_path)
+        names.release(dest_path)
+        raise
+    names.settle(dest_path)
+    os.utime(dest_path, (item.mtime, item.mtime))
+    return dest_path
+
+def rebuild_index(folder: str) -> int:
+    """Rehace index.jsonl a partir de los zips (p. ej. si se perdió); devuelve las entradas.
+
+    El nombre original de un miembro renombrado por repetido (informe_1.pdf)
+    no está en el zip: se usa el del miembro.
+    """
+    folder_archive = archive_dir(folder)
+    items = []
+    for zip_name in sorted(os.listdir(folder_archive)):
+        if not zip_name.endswith('.zip'):
+            continue
+        zip_path = os.path.join(folder_archive, zip_name)
+        recover(zip_path)
+        with zipfile.ZipFile(zip_path) as zf:
+            for info in zf.infolist():
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                items.append(ArchivedFile(info.filename, info.filename, zip_name, info.file_size, mtime, mtime))
+    tmp_path = os.path.join(folder_archive, f"{INDEX_NAME}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item._asdict(), ensure_ascii=False) + '\n')
+    os.replace(tmp_path, os.path.join(folder_archive, INDEX_NAME))
+    return len(items)
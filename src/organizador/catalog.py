@@ -0,0 +1,171 @@
+"""Catálogo persistente (SQLite) de los elementos organizados."""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from organizador.paths import user_data_dir
+
+# Registros acumulados antes de confirmar la transacción
+COMMIT_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    size INTEGER,
+    mtime REAL,
+    category TEXT,
+    hash TEXT,
+    action TEXT NOT NULL DEFAULT 'move',
+    moved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_source ON moves(source, size, mtime);
+CREATE INDEX IF NOT EXISTS moves_name ON moves(name);
+CREATE INDEX IF NOT EXISTS moves_hash ON moves(hash);
+CREATE INDEX IF NOT EXISTS moves_destination ON moves(destination);
+"""
+
+class Catalog:
+    """Registro de cada movimiento: origen, destino, tamaño, fecha, categoría y hash.
+
+    Permite saber si un archivo ya se procesó aunque el proceso se haya
+    reiniciado, y sirve de base para deshacer, deduplicar y estadísticas
+    sin volver a recorrer las carpetas de categorías. El hash de contenido
+    solo se guarda cuando la deduplicación ya lo calculó: hashear cada
+    movimiento obligaría a leer cada archivo entero.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(user_data_dir(), 'catalog.sqlite3')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def record(self, source: str, destination: str, size: Optional[int] = None,
+               mtime: Optional[float] = None, category: Optional[str] = None,
+               hash: Optional[str] = None, action: str = 'move') -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO moves (source, name, destination, size, mtime, category, hash, action, moved_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (source, os.path.basename(source), destination, size, mtime, category, hash, action, time.time()))
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def record_move(self, source: str, destination: str, category: Optional[str] = None,
+                    hash: Optional[str] = None) -> None:
+        """Registra un movimiento tomando tamaño y fecha del destino (se conservan al mover)."""
+        try:
+            st = os.stat(destination)
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size = mtime = None
+        self.record(source, destination, size, mtime, category, hash)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def is_processed(self, source: str, size: int, mtime: float) -> bool:
+        """True si este mismo archivo (ruta, tamaño y fecha) no debe organizarse otra vez.
+
+        Es así mientras el destino de su último movimiento siga ahí; si ya
+        no existe, el usuario lo devolvió a mano (o lo borró) y vuelve a
+        organizarse. Un movimiento deshecho deja el archivo retenido en
+        source hasta que se libere con release().
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT destination, action FROM moves WHERE source = ? AND size = ? AND mtime = ? '
+                'ORDER BY id DESC LIMIT 1', (source, size, mtime)).fetchone()
+        if row is None:
+            return False
+        destination, action = row
+        return action == 'undone' or (action != 'released' and os.path.lexists(destination))
+
+    def hold(self, moves: Iterable[Tuple[str, str]], action: str = 'undone') -> None:
+        """Marca como deshechos los movimientos (origen, destino) antes de devolverlos.
+
+        Se confirma enseguida: el servicio lee el catálogo desde otro
+        proceso y no debe reorganizar los archivos al verlos volver. Con
+        action='move' se quita la marca de los que no se pudieron devolver.
+        """
+        with self._lock:
+            self._conn.executemany('UPDATE moves SET action = ? WHERE source = ? AND destination = ?',
+                                   [(action, source, destination) for source, destination in moves])
+            self._conn.commit()
+            self._pending = 0
+
+    def release(self, moves: Optional[Iterable[Tuple[str, str]]] = None) -> int:
+        """Suelta los movimientos deshechos (todos si moves es None) para que vuelvan a organizarse."""
+        with self._lock:
+            if moves is None:
+                cursor = self._conn.execute("UPDATE moves SET action = 'released' WHERE action = 'undone'")
+            else:
+                cursor = self._conn.executemany(
+                    "UPDATE moves SET action = 'released' WHERE source = ? AND destination = ? AND action = 'undone'",
+                    list(moves))
+            self._conn.commit()
+            self._pending = 0
+        return cursor.rowcount
+
+    def find_by_name(self, name: str) -> List[Tuple[str, str]]:
+        """(origen, destino) de los movimientos de un nombre de archivo."""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT source, destination FROM moves WHERE name = ? ORDER BY id', (name,)).fetchall()
+
+    def find_destination(self, source: str) -> Optional[str]:
+        """Destino del último movimiento registrado desde source."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT destination FROM moves WHERE source = ? ORDER BY id DESC LIMIT 1', (source,)).fetchone()
+        return row[0] if row else None
+
+    def moved_at(self, destination: str) -> Optional[float]:
+        """Cuándo llegó a destination su archivo actual, o None si no consta en el catálogo."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT moved_at FROM moves WHERE destination = ? AND action NOT IN ('undone', 'released') "
+                'ORDER BY id DESC LIMIT 1', (destination,)).fetchone()
+        return row[0] if row else None
+
+    def find_by_hash(self, hash: str) -> List[str]:
+        """Destinos registrados con ese contenido (solo movimientos y enlaces vigentes)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT destination FROM moves WHERE hash = ? AND action IN ('move', 'link') ORDER BY id",
+                (hash,)).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Cantidad de elementos y bytes por categoría (sin los movimientos deshechos)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT category, COUNT(*), COALESCE(SUM(size), 0) FROM moves "
+                "WHERE action NOT IN ('undone', 'released') GROUP BY category").fetchall()
+        return {category: (count, total) for category, count, total in rows}
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+def open_catalog(path: Optional[str] = None) -> Optional[Catalog]:
+    """Abre el catálogo o devuelve None si no se puede (p. ej. disco de solo lectura)."""
+    try:
+        return Catalog(path)
+    except (OSError, sqlite3.Error):
+        return None
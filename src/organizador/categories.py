@@ -0,0 +1,72 @@
+"""Índice de extensiones a categorías compartido por todos los puntos de entrada."""
+from typing import Dict, List, Mapping, Sequence
+
+DEFAULT_CATEGORY = 'others'
+
+_SEPARATORS = '/\\'
+
+EXTENSIONS: Dict[str, List[str]] = {
+    'videos': ['.avi', '.flv', '.m4v', '.mkv', '.mov', '.mp4', '.wmv', '.webm', '.3gp'],
+    'documents': ['.csv', '.doc', '.docx', '.odt', '.pdf', '.ppt', '.pptx', '.txt', '.xlsx'],
+    'music': ['.aac', '.flac', '.m4a', '.midi', '.mp3', '.ogg', '.wav', '.wma'],
+    'programs': ['.app', '.bat', '.cmd', '.dll', '.exe', '.jar', '.msi', '.py'],
+    'compressed': ['.7z', '.bz2', '.gz', '.iso', '.rar', '.tar', '.xz', '.zip',
+                   '.tar.bz2', '.tar.gz', '.tar.xz', '.tgz'],
+    'images': ['.bmp', '.gif', '.ico', '.jpeg', '.jpg', '.png', '.svg', '.tiff', '.webp'],
+    DEFAULT_CATEGORY: []
+}
+
+class CategoryIndex:
+    """Índice inverso sufijo -> categoría con coincidencia del sufijo más largo."""
+
+    def __init__(self, extensions: Mapping[str, Sequence[str]]):
+        self._index: Dict[str, str] = {}
+        self._max_parts = 1
+        self.rebuild(extensions)
+
+    def rebuild(self, extensions: Mapping[str, Sequence[str]]) -> None:
+        """Recalcula el índice; se llama solo cuando cambia la configuración."""
+        index: Dict[str, str] = {}
+        max_parts = 1
+        for category, exts in extensions.items():
+            for ext in exts:
+                ext = ext.lower()
+                if not ext.startswith('.'):
+                    ext = f".{ext}"
+                # Igual que antes: si una extensión se repite, gana la primera categoría
+                index.setdefault(ext, category)
+                max_parts = max(max_parts, ext.count('.'))
+        self._index = index
+        self._max_parts = max_parts
+
+    def lookup(self, filename: str) -> str:
+        """Devuelve la categoría probando primero el sufijo compuesto más largo."""
+        name = filename.lower()
+        index = self._index
+        best = DEFAULT_CATEGORY
+        end = len(name)
+        # Se recorren los puntos de derecha a izquierda: .gz, luego .tar.gz, ...
+        # Un punto inicial (".bashrc") no cuenta como extensión, igual que splitext
+        for _ in range(self._max_parts):
+            end = name.rfind('.', 0, end)
+            if end <= 0 or name[end - 1] in _SEPARATORS:
+                break
+            category = index.get(name[end:])
+            if category is not None:
+                best = category
+        return best
+
+_index = CategoryIndex(EXTENSIONS)
+
+def configure(extensions: Mapping[str, Sequence[str]]) -> None:
+    """Reemplaza las extensiones configuradas y reconstruye el índice una sola vez."""
+    new_extensions = {category: list(exts) for category, exts in extensions.items()}
+    new_extensions.setdefault(DEFAULT_CATEGORY, [])
+    # Se modifica en sitio para que los módulos que importaron EXTENSIONS vean el cambio
+    EXTENSIONS.clear()
+    EXTENSIONS.update(new_extensions)
+    _index.rebuild(EXTENSIONS)
+
+def get_category(filename: str) -> str:
+    """Determina la categoría de un archivo por su extensión."""
+    return _index.lookup(filename)
@@ -0,0 +1,222 @@
+"""Estrategias para decidir si una descarga ha terminado sin abrir el archivo."""
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from organizador.scanner import Entry
+
+DEFAULT_TEMP_SUFFIXES = ('.crdownload', '.part', '.tmp')
+DEFAULT_STABLE_SECONDS = 2.0
+
+class CompletenessDetector:
+    """Interfaz común: is_complete(ruta, entry) sin efectos sobre el archivo."""
+
+    # Segundos tras los que conviene volver a preguntar por un archivo incompleto
+    recheck_after: Optional[float] = None
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        raise NotImplementedError
+
+    def forget(self, path: str) -> None:
+        """Descarta el estado guardado de una ruta (movida o borrada)."""
+
+    def close(self) -> None:
+        pass
+
+class TempSuffixDetector(CompletenessDetector):
+    """Regla de siempre: incompleto mientras tenga un sufijo temporal del navegador."""
+
+    def __init__(self, suffixes: Iterable[str] = DEFAULT_TEMP_SUFFIXES):
+        self.suffixes = tuple(s.lower() for s in suffixes)
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        return not path.lower().endswith(self.suffixes)
+
+class StableStatDetector(CompletenessDetector):
+    """Completo cuando tamaño y fecha no cambian durante `stable_seconds`.
+
+    Solo usa stat (o el Entry del escaneo, sin ninguna llamada). Un archivo
+    cuya última modificación ya es más antigua que la ventana se da por
+    terminado de inmediato; si es reciente se anota y se confirma en la
+    siguiente consulta.
+    """
+
+    def __init__(self, stable_seconds: float = DEFAULT_STABLE_SECONDS):
+        self.stable_seconds = stable_seconds
+        self.recheck_after = stable_seconds
+        self._lock = threading.Lock()
+        self._seen: Dict[str, Tuple[int, float, float]] = {}
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        if entry is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            size, mtime = st.st_size, st.st_mtime
+        else:
+            size, mtime = entry.size, entry.mtime
+
+        now = time.time()
+        if now - mtime >= self.stable_seconds:
+            self.forget(path)
+            return True
+
+        with self._lock:
+            previous = self._seen.get(path)
+            if previous is None or previous[:2] != (size, mtime):
+                self._seen[path] = (size, mtime, now)
+                return False
+            if now - previous[2] >= self.stable_seconds:
+                del self._seen[path]
+                return True
+            return False
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            self._seen.pop(path, None)
+
+class LockCheckDetector(CompletenessDetector):
+    """Comportamiento anterior: abrir el archivo y, en Windows, probar un bloqueo."""
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                if os.name == 'nt':
+                    import msvcrt
+                    msvcrt.locking(f.fileno(), 1, 1)
+                    msvcrt.locking(f.fileno(), 0, 1)
+            return True
+        except OSError:
+            return False
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyCloseWriteDetector(CompletenessDetector):
+    """Linux: completo cuando el escritor cerró el archivo (IN_CLOSE_WRITE).
+
+    Un renombrado hacia la carpeta (IN_MOVED_TO, p. ej. .crdownload -> .pdf)
+    también cuenta como final, y un IN_MODIFY posterior lo vuelve a marcar
+    como en curso. Para archivos que ya estaban antes de empezar a vigilar
+    se consulta el detector de respaldo. Un mismo descriptor vigila todas
+    las carpetas indicadas.
+    """
+
+    def __init__(self, directory: Union[str, Sequence[str]],
+                 fallback: Optional[CompletenessDetector] = None):
+        self.directories = [directory] if isinstance(directory, str) else list(directory)
+        self.fallback = fallback or StableStatDetector()
+        self.recheck_after = self.fallback.recheck_after
+        self._lock = threading.Lock()
+        # Ruta -> True si está cerrada, False si sigue escribiéndose
+        self._state: Dict[str, bool] = {}
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        mask = IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_TO
+        # Descriptor de watch -> carpeta, para rearmar la ruta de cada evento
+        self._watches: Dict[int, str] = {}
+        for folder in self.directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(folder), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, 'inotify_add_watch', folder)
+            self._watches[wd] = folder
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._read_events, name='inotify', daemon=True)
+        self._thread.start()
+
+    def _read_events(self) -> None:
+        while True:
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            with self._lock:
+                while offset < len(data):
+                    wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                    offset += _EVENT_HEADER.size
+                    name = data[offset:offset + length].rstrip(b'\0')
+                    offset += length
+                    folder = self._watches.get(wd)
+                    if folder is None:
+                        continue
+                    path = os.path.join(folder, os.fsdecode(name))
+                    self._state[path] = bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        with self._lock:
+            state = self._state.get(path)
+        if state is None:
+            return self.fallback.is_complete(path, entry)
+        return state
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            self._state.pop(path, None)
+        self.fallback.forget(path)
+
+    def close(self) -> None:
+        os.write(self._wake_w, b'x')
+        self._thread.join()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+class CompositeDetector(CompletenessDetector):
+    """Completo solo si todos los detectores están de acuerdo (se evalúan en orden)."""
+
+    def __init__(self, detectors: Sequence[CompletenessDetector]):
+        self.detectors = list(detectors)
+        delays = [d.recheck_after for d in self.detectors if d.recheck_after is not None]
+        self.recheck_after = min(delays) if delays else None
+
+    def is_complete(self, path: str, entry: Optional[Entry] = None) -> bool:
+        return all(detector.is_complete(path, entry) for detector in self.detectors)
+
+    def forget(self, path: str) -> None:
+        for detector in self.detectors:
+            detector.forget(path)
+
+    def close(self) -> None:
+        for detector in self.detectors:
+            detector.close()
+
+COMPLETENESS_STRATEGIES = ('stable', 'inotify', 'lock', 'suffix')
+
+def build_detector(strategy: str = 'stable', temp_suffixes: Iterable[str] = DEFAULT_TEMP_SUFFIXES,
+                   stable_seconds: float = DEFAULT_STABLE_SECONDS,
+                   directory: Union[str, Sequence[str], None] = None) -> CompletenessDetector:
+    """Crea la estrategia indicada, siempre precedida por la regla de sufijos temporales.
+
+    'inotify' solo existe en Linux; en otros sistemas se usa 'stable'.
+    """
+    if strategy not in COMPLETENESS_STRATEGIES:
+        raise ValueError(f"Estrategia de completitud no válida: {strategy}")
+    detectors = [TempSuffixDetector(temp_suffixes)]
+    if strategy == 'inotify' and directory and sys.platform.startswith('linux'):
+        try:
+            detectors.append(InotifyCloseWriteDetector(directory, StableStatDetector(stable_seconds)))
+        except OSError:
+            # Sin inotify disponible (límite de watches, contenedor, ...)
+            detectors.append(StableStatDetector(stable_seconds))
+    elif strategy in ('stable', 'inotify'):
+        detectors.append(StableStatDetector(stable_seconds))
+    elif strategy == 'lock':
+        detectors.append(LockCheckDetector())
+    return CompositeDetector(detectors)
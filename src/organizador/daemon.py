@@ -0,0 +1,334 @@
+"""Núcleo asyncio del servicio: API HTTP, puente de eventos y temporizadores en un solo bucle."""
+import asyncio
+import json
+import logging
+import signal
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from organizador.events import DEFAULT_DEBOUNCE, DEFAULT_MAX_BATCH
+
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_MAX_PENDING_EVENTS = 10_000
+KEEPALIVE_TIMEOUT = 5.0
+MAX_BODY = 1024 * 1024
+# Orígenes que pueden llamar a la API: la extensión; sin Origin (curl, scripts) también se acepta
+DEFAULT_ALLOWED_ORIGINS = ('chrome-extension://',)
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 413: 'Payload Too Large',
+            415: 'Unsupported Media Type', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+Route = Callable[[Optional[object]], Awaitable[Tuple[int, object]]]
+
+class AsyncEventBridge:
+    """Versión asyncio de EventCoalescer: mismo push()/metrics(), seguro desde cualquier hilo.
+
+    Los hilos del watcher llaman a push(); la ruta entra al bucle con
+    call_soon_threadsafe y se agrupa en un dict acotado. Cuando las rutas
+    llevan `debounce` segundos quietas se entregan en lotes al handler, que
+    corre en un executor para no bloquear el bucle. Si la cola supera
+    `max_pending` se descartan eventos y se avisa a on_overflow para que se
+    haga una reconciliación completa.
+
+    Con `partition` (p. ej. la carpeta vigilada de cada ruta) cada grupo
+    tiene su propia cola y su propio límite, y los lotes se arman por
+    turnos, una ruta de cada grupo: una carpeta con miles de eventos no
+    retrasa a las demás ni les hace perder eventos. on_overflow recibe el
+    grupo desbordado (None sin partition).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, handler: Callable[[List[str]], None],
+                 debounce: float = DEFAULT_DEBOUNCE, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_pending: int = DEFAULT_MAX_PENDING_EVENTS,
+                 on_overflow: Optional[Callable[[Hashable], None]] = None,
+                 partition: Optional[Callable[[str], Hashable]] = None):
+        self._loop = loop
+        self._handler = handler
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._on_overflow = on_overflow
+        self._partition = partition
+        # Grupo -> (ruta -> último evento); cada cola en orden de llegada
+        self._pending: Dict[Hashable, Dict[str, float]] = {}
+        self._depth = 0
+        self._overflowed = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._received = 0
+        self._merged = 0
+        self._dropped = 0
+        self._dispatched = 0
+        self._batches = 0
+        self._max_depth = 0
+
+    def push(self, path: str) -> None:
+        self._loop.call_soon_threadsafe(self._add, path)
+
+    def _add(self, path: str) -> None:
+        self._received += 1
+        key = self._partition(path) if self._partition is not None else None
+        queue = self._pending.get(key)
+        if queue is None:
+            queue = {}
+        if path in queue:
+            self._merged += 1
+            del queue[path]
+        elif len(queue) >= self.max_pending:
+            self._dropped += 1
+            if key not in self._overflowed:
+                self._overflowed.add(key)
+                if self._on_overflow is not None:
+                    self._on_overflow(key)
+            return
+        else:
+            self._depth += 1
+        queue[path] = time.monotonic()
+        self._pending[key] = queue
+        self._max_depth = max(self._max_depth, self._depth)
+        self._wakeup.set()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            'depth': self._depth,
+            'max_depth': self._max_depth,
+            'partitions': len(self._pending),
+            'received': self._received,
+            'merged': self._merged,
+            'dropped': self._dropped,
+            'dispatched': self._dispatched,
+            'batches': self._batches,
+        }
+
+    def _take_batch(self, deadline: float) -> List[str]:
+        """Hasta max_batch rutas listas, una de cada grupo por vuelta."""
+        # Un iterador por cola: se recorre cada una una sola vez y se borra al final
+        turns = {key: iter(queue.items()) for key, queue in self._pending.items()}
+        taken: List[Tuple[Hashable, str]] = []
+        while turns and len(taken) < self.max_batch:
+            for key in list(turns):
+                item = next(turns[key], None)
+                if item is None or item[1] > deadline:
+                    del turns[key]
+                    continue
+                taken.append((key, item[0]))
+                if len(taken) >= self.max_batch:
+                    break
+        for key, path in taken:
+            queue = self._pending[key]
+            del queue[path]
+            if not queue:
+                del self._pending[key]
+            self._overflowed.discard(key)
+        if taken and taken[0][0] in self._pending:
+            # El grupo que abrió este lote pasa al final para el siguiente
+            first = taken[0][0]
+            self._pending[first] = self._pending.pop(first)
+        self._depth -= len(taken)
+        return [path for _, path in taken]
+
+    async def _run(self) -> None:
+        while True:
+            if not self._depth:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Cada cola conserva el orden de llegada: su primera ruta es la más antigua
+            oldest = min(next(iter(queue.values())) for queue in self._pending.values())
+            wait = oldest + self.debounce - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            batch = self._take_batch(time.monotonic() - self.debounce)
+            self._dispatched += len(batch)
+            self._batches += 1
+            try:
+                await self._loop.run_in_executor(None, self._handler, batch)
+            except Exception as e:
+                logging.error(f"Error procesando eventos: {e}")
+
+    def start(self) -> None:
+        self._task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+class LoopTimers:
+    """Versión asyncio de DeadlineScheduler sobre loop.call_later (también seguro entre hilos)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback: Callable[[Hashable], None]):
+        self._loop = loop
+        self._callback = callback
+        self._handles: Dict[Hashable, asyncio.TimerHandle] = {}
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        self._loop.call_soon_threadsafe(self._schedule, key, delay)
+
+    def _schedule(self, key: Hashable, delay: float) -> None:
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._handles[key] = self._loop.call_later(delay, self._fire, key)
+
+    def _fire(self, key: Hashable) -> None:
+        self._handles.pop(key, None)
+        self._callback(key)
+
+    def cancel(self, key: Hashable) -> None:
+        self._loop.call_soon_threadsafe(self._cancel, key)
+
+    def _cancel(self, key: Hashable) -> None:
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+class AsyncDaemon:
+    """Bucle de eventos del servicio con una API HTTP/1.1 mínima (keep-alive, JSON).
+
+    Las conexiones no ocupan hilos: miles de peticiones de la extensión
+    esperan en el bucle y el trabajo pesado (movimientos, hashes) se delega
+    en executors. stop() es seguro desde señales y otros hilos; serve()
+    vuelve tras cerrar el servidor para que el llamador libere lo suyo.
+
+    Cualquier página abierta en el navegador puede mandar peticiones a
+    localhost sin preflight de CORS si no son JSON; por eso los POST
+    exigen Content-Type: application/json y se rechaza todo Origin que no
+    empiece por uno de allowed_origins.
+    """
+
+    def __init__(self, host: str, port: int, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 allowed_origins: Tuple[str, ...] = DEFAULT_ALLOWED_ORIGINS):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.allowed_origins = tuple(allowed_origins)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._routes: Dict[Tuple[str, str], Route] = {}
+        self._stop: Optional[asyncio.Event] = None
+        self._connections: Optional[asyncio.Semaphore] = None
+
+    def route(self, method: str, path: str, handler: Route) -> None:
+        """Registra `async handler(payload) -> (status, respuesta)` para método y ruta."""
+        self._routes[(method.upper(), path.rstrip('/') or '/')] = handler
+
+    def stop(self) -> None:
+        if self.loop is not None and self._stop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set)
+
+    def _install_signal_handlers(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows: el bucle no admite add_signal_handler
+                signal.signal(sig, lambda *_: self.stop())
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        body: bytes) -> Tuple[int, object]:
+        handler = self._routes.get((method, target.split('?', 1)[0].rstrip('/') or '/'))
+        if handler is None:
+            return 404, {'error': 'Ruta no encontrada'}
+        origin = headers.get('origin')
+        if origin is not None and not origin.startswith(self.allowed_origins):
+            return 403, {'error': 'Origen no permitido'}
+        content_type = headers.get('content-type', '').split(';', 1)[0].strip().lower()
+        if method == 'POST' and content_type != 'application/json':
+            return 415, {'error': 'Se esperaba Content-Type: application/json'}
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return 400, {'error': 'JSON no válido'}
+        try:
+            return await handler(payload)
+        except Exception as e:
+            logging.error(f"Error en la API: {e}")
+            return 500, {'error': str(e)}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async with self._connections:
+            try:
+                while not self._stop.is_set():
+                    try:
+                        request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        break
+                    if not request_line:
+                        break
+                    try:
+                        method, target, version = request_line.decode('latin-1').split()
+                    except ValueError:
+                        await self._respond(writer, 400, {'error': 'Petición no válida'}, False)
+                        break
+
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        key, _, value = line.decode('latin-1').partition(':')
+                        headers[key.strip().lower()] = value.strip()
+
+                    length = int(headers.get('content-length') or 0)
+                    if length > MAX_BODY:
+                        await self._respond(writer, 413, {'error': 'Cuerpo demasiado grande'}, False)
+                        break
+                    body = await reader.readexactly(length) if length else b''
+
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                    status, payload = await self._dispatch(method.upper(), target, headers, body)
+                    await self._respond(writer, status, payload, keep_alive)
+                    if not keep_alive:
+                        break
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: object, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, startup: Optional[Callable[['AsyncDaemon'], Awaitable[None]]] = None,
+                    stopping: Optional[Callable[['AsyncDaemon'], Awaitable[None]]] = None) -> None:
+        """Atiende la API hasta que llegue SIGINT/SIGTERM o stop().
+
+        startup no debe quedarse esperando trabajo largo (p. ej. un
+        rescaneo): hasta que vuelve no se atiende la señal de parada. Al
+        parar se deja de aceptar conexiones y se llama a stopping antes de
+        esperar a las que siguen abiertas, para que libere lo que estas
+        esperan (movimientos encolados) y el cierre no se bloquee.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._connections = asyncio.Semaphore(self.max_connections)
+        self._install_signal_handlers()
+
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Con port=0 el sistema elige uno libre; se publica el real
+        self.port = server.sockets[0].getsockname()[1]
+        try:
+            if startup is not None:
+                await startup(self)
+            await self._stop.wait()
+        finally:
+            server.close()
+            if stopping is not None:
+                await stopping(self)
+            await server.wait_closed()
@@ -0,0 +1,203 @@
+"""Detección de descargas repetidas por contenido."""
+import hashlib
+import json
+import os
+import stat
+import threading
+from typing import Dict, List, Optional
+
+from organizador.naming import NameIndex
+from organizador.paths import user_data_dir
+
+DEDUP_MODES = ('delete', 'link', 'skip')
+
+# Bloques leídos al principio y al final para el hash parcial
+BLOCK_SIZE = 64 * 1024
+# Tamaño de lectura del hash completo
+CHUNK_SIZE = 1024 * 1024
+
+PARTIAL = 'partial'
+FULL = 'full'
+
+def _partial_digest(path: str, size: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(BLOCK_SIZE))
+        if size > 2 * BLOCK_SIZE:
+            f.seek(size - BLOCK_SIZE)
+        digest.update(f.read(BLOCK_SIZE))
+    return digest.hexdigest()
+
+def _full_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class HashCache:
+    """Hashes guardados en disco, válidos mientras no cambien tamaño ni fecha."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(user_data_dir(), 'hashes.json')
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries: Dict[str, dict] = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, path: str, size: int, mtime: float, kind: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry['size'] == size and entry['mtime'] == mtime:
+            return entry.get(kind)
+        return None
+
+    def put(self, path: str, size: int, mtime: float, kind: str, digest: str) -> None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if not entry or entry['size'] != size or entry['mtime'] != mtime:
+                entry = self._entries[path] = {'size': size, 'mtime': mtime}
+            entry[kind] = digest
+            self._dirty = True
+
+    def rename(self, old_path: str, new_path: str) -> None:
+        """Conserva los hashes cuando el archivo se mueve (la fecha no cambia)."""
+        with self._lock:
+            entry = self._entries.pop(old_path, None)
+            if entry is not None:
+                self._entries[new_path] = entry
+                self._dirty = True
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            if self._entries.pop(path, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries)
+            self._dirty = False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+class Deduplicator:
+    """Busca en la carpeta de destino un archivo idéntico al que llega.
+
+    Los candidatos se filtran primero por tamaño, después por un hash del
+    primer y último bloque, y solo si todo coincide se calcula el hash
+    completo. Los archivos de 0 bytes se ignoran (son también los
+    marcadores que deja NameIndex al reservar un nombre).
+    """
+
+    def __init__(self, mode: str = 'delete', cache: Optional[HashCache] = None):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Modo de deduplicación no válido: {mode}")
+        self.mode = mode
+        self.cache = cache if cache is not None else HashCache()
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, Dict[int, List[str]]] = {}
+
+    def _size_index(self, folder: str) -> Dict[int, List[str]]:
+        with self._lock:
+            index = self._sizes.get(folder)
+        if index is not None:
+            return index
+        index = {}
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        size = entry.stat().st_size
+                        if size:
+                            index.setdefault(size, []).append(entry.path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            return self._sizes.setdefault(folder, index)
+
+    def _digest(self, path: str, st: os.stat_result, kind: str) -> str:
+        digest = self.cache.get(path, st.st_size, st.st_mtime, kind)
+        if digest is None:
+            digest = _partial_digest(path, st.st_size) if kind == PARTIAL else _full_digest(path)
+            self.cache.put(path, st.st_size, st.st_mtime, kind, digest)
+        return digest
+
+    def known_hash(self, path: str) -> Optional[str]:
+        """Hash completo ya calculado de path, sin leer el archivo."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self.cache.get(path, st.st_size, st.st_mtime, FULL)
+
+    def find_duplicate(self, src: str, dest_folder: str) -> Optional[str]:
+        """Devuelve la ruta de un archivo idéntico en dest_folder, si lo hay."""
+        st = os.stat(src)
+        if not stat.S_ISREG(st.st_mode) or not st.st_size:
+            return None
+        candidates = list(self._size_index(dest_folder).get(st.st_size, ()))
+        if not candidates:
+            return None
+
+        partial = self._digest(src, st, PARTIAL)
+        for candidate in candidates:
+            try:
+                cst = os.stat(candidate)
+            except OSError:
+                continue
+            if cst.st_size != st.st_size or self._digest(candidate, cst, PARTIAL) != partial:
+                continue
+            # El hash parcial ya cubre todo el archivo si es pequeño
+            if st.st_size <= 2 * BLOCK_SIZE or self._digest(src, st, FULL) == self._digest(candidate, cst, FULL):
+                return candidate
+        return None
+
+    def resolve(self, src: str, existing: str, names: NameIndex) -> bool:
+        """Aplica el modo al recién llegado; False si hay que moverlo normalmente."""
+        if self.mode == 'skip':
+            return True
+        if self.mode == 'delete':
+            os.unlink(src)
+            self.cache.discard(src)
+            return True
+
+        # 'link': el nombre nuevo queda en destino como enlace duro al existente
+        dest_path = names.claim(os.path.dirname(existing), os.path.basename(src))
+        tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(existing, tmp_path)
+            os.replace(tmp_path, dest_path)
+        except OSError:
+            # Sistema de archivos sin enlaces duros
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            names.release(dest_path)
+            return False
+        names.settle(dest_path)
+        os.unlink(src)
+        self.cache.discard(src)
+        self.register(dest_path)
+        return True
+
+    def register(self, dest_path: str, src_path: Optional[str] = None) -> None:
+        """Actualiza el índice de tamaños y la caché tras un movimiento."""
+        if src_path is not None:
+            self.cache.rename(src_path, dest_path)
+        with self._lock:
+            index = self._sizes.get(os.path.dirname(dest_path))
+        if index is None:
+            return
+        try:
+            st = os.stat(dest_path)
+        except OSError:
+            return
+        if stat.S_ISREG(st.st_mode) and st.st_size:
+            with self._lock:
+                index.setdefault(st.st_size, []).append(dest_path)
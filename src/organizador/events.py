@@ -0,0 +1,100 @@
+"""Cola de eventos del watcher que agrupa repeticiones por ruta."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+DEFAULT_DEBOUNCE = 1.0
+DEFAULT_MAX_BATCH = 100
+
+class EventCoalescer:
+    """Agrupa los eventos por ruta y los entrega en lotes tras un periodo de calma.
+
+    Una descarga grande genera cientos de `on_modified`; aquí se quedan en
+    una sola entrada cuya espera se reinicia con cada evento. Un hilo
+    trabajador entrega al handler las rutas que llevan `debounce` segundos
+    sin eventos, en lotes de hasta `max_batch`.
+    """
+
+    def __init__(self, handler: Callable[[List[str]], None], debounce: float = DEFAULT_DEBOUNCE,
+                 max_batch: int = DEFAULT_MAX_BATCH):
+        self._handler = handler
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        # Ruta -> último evento; ordenado del más antiguo al más reciente
+        self._pending: 'OrderedDict[str, float]' = OrderedDict()
+        self._running = False
+        self._thread = None
+        self._received = 0
+        self._merged = 0
+        self._dispatched = 0
+        self._batches = 0
+        self._max_depth = 0
+
+    def push(self, path: str) -> None:
+        """Registra un evento; si la ruta ya estaba en cola solo se reinicia su espera."""
+        with self._cond:
+            self._received += 1
+            if path in self._pending:
+                self._merged += 1
+                self._pending.move_to_end(path)
+            self._pending[path] = time.monotonic()
+            self._max_depth = max(self._max_depth, len(self._pending))
+            self._cond.notify()
+
+    def metrics(self) -> Dict[str, int]:
+        """Profundidad de la cola y contadores acumulados."""
+        with self._cond:
+            return {
+                'depth': len(self._pending),
+                'max_depth': self._max_depth,
+                'received': self._received,
+                'merged': self._merged,
+                'dispatched': self._dispatched,
+                'batches': self._batches,
+            }
+
+    def _next_batch(self) -> List[str]:
+        with self._cond:
+            while self._running:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                oldest = next(iter(self._pending.values()))
+                wait = oldest + self.debounce - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                deadline = time.monotonic() - self.debounce
+                batch = []
+                for path, last_seen in self._pending.items():
+                    if last_seen > deadline or len(batch) >= self.max_batch:
+                        break
+                    batch.append(path)
+                for path in batch:
+                    del self._pending[path]
+                self._dispatched += len(batch)
+                self._batches += 1
+                return batch
+            return []
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._handler(batch)
+
+    def start(self) -> None:
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='event-queue', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
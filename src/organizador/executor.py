@@ -0,0 +1,119 @@
+"""Ejecutor de movimientos en paralelo con orden por carpeta de destino."""
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Hashable, Iterable, Tuple
+
+DEFAULT_WORKERS = 4
+
+class ExecutorClosed(RuntimeError):
+    """El movimiento no se hizo porque el ejecutor ya estaba detenido."""
+
+class MoveExecutor:
+    """Reparte los movimientos en un pool acotado de hilos.
+
+    Cada carpeta de destino tiene su propia cola: sus movimientos se hacen de
+    uno en uno y en orden, así la resolución de nombres duplicados dentro de
+    la categoría sigue siendo correcta. Destinos distintos avanzan en
+    paralelo, de modo que un ISO de varios GB en `compressed` no bloquea a
+    los documentos que vienen detrás. Tras cada movimiento la cola vuelve al
+    final del pool para que ningún destino acapare a los trabajadores.
+
+    Dentro de una cola, los movimientos se pueden separar por grupo (p. ej.
+    la carpeta vigilada de origen) y se atienden por turnos: si dos
+    carpetas vuelcan en el mismo destino, los miles de archivos de una no
+    dejan esperando al único de la otra.
+
+    shutdown() no deja a nadie esperando: los movimientos que aún no
+    empezaron terminan con ExecutorClosed y los que se encolen después
+    también.
+    """
+
+    def __init__(self, move_func: Callable[[str, str], bool], workers: int = DEFAULT_WORKERS):
+        self._move = move_func
+        self.workers = max(1, int(workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mover')
+        self._lock = threading.Lock()
+        # Destino -> grupo -> movimientos pendientes; el primer grupo es el del próximo turno
+        self._lanes: Dict[str, Dict[Hashable, Deque[Tuple[str, Future]]]] = {}
+        self._closed = False
+
+    def submit(self, src: str, dest_folder: str, group: Hashable = None) -> Future:
+        """Encola un movimiento; el Future se resuelve con lo que devuelva move_func."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(ExecutorClosed("El ejecutor de movimientos está detenido"))
+                return future
+            lane = self._lanes.get(dest_folder)
+            if lane is None:
+                self._lanes[dest_folder] = {group: deque([(src, future)])}
+                self._pool.submit(self._run_next, dest_folder)
+            elif group in lane:
+                lane[group].append((src, future))
+            else:
+                lane[group] = deque([(src, future)])
+        return future
+
+    def _run_next(self, dest_folder: str) -> None:
+        with self._lock:
+            lane = self._lanes[dest_folder]
+            if not lane:
+                # shutdown() vació la cola antes de que este turno empezara
+                del self._lanes[dest_folder]
+                return
+            group = next(iter(lane))
+            queue = lane.pop(group)
+            src, future = queue.popleft()
+            if queue:
+                # El grupo vuelve al final: el siguiente turno es de otro
+                lane[group] = queue
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._move(src, dest_folder))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._lanes[dest_folder] and not self._closed:
+                    self._pool.submit(self._run_next, dest_folder)
+                else:
+                    del self._lanes[dest_folder]
+
+    def run(self, moves: Iterable[Tuple[str, str]], group: Hashable = None) -> Tuple[int, int]:
+        """Ejecuta un lote de (origen, carpeta_destino) y devuelve (éxitos, fallos).
+
+        Cuenta como éxito cualquier resultado verdadero de move_func.
+        """
+        futures = [self.submit(src, dest, group) for src, dest in moves]
+        success = failed = 0
+        for future in futures:
+            try:
+                ok = future.result()
+            except Exception:
+                ok = False
+            if ok:
+                success += 1
+            else:
+                failed += 1
+        return success, failed
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Deja de aceptar movimientos, falla los pendientes y espera (o no) a los que corren."""
+        with self._lock:
+            self._closed = True
+            pending = [future for lane in self._lanes.values()
+                       for queue in lane.values() for _, future in queue]
+            for lane in self._lanes.values():
+                lane.clear()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ExecutorClosed("El ejecutor de movimientos se detuvo"))
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> 'MoveExecutor':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,214 @@
+"""Íconos de carpeta idempotentes: solo se escribe y se cambian atributos si algo falta."""
+import json
+import os
+import stat
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from organizador.paths import user_data_dir
+
+_FILE_ATTRIBUTE_READONLY = 0x1
+_FILE_ATTRIBUTE_HIDDEN = 0x2
+_FILE_ATTRIBUTE_SYSTEM = 0x4
+_FILE_ATTRIBUTE_NORMAL = 0x80
+
+class IconBackend:
+    """Cómo se declara el ícono de una carpeta en un sistema concreto."""
+
+    name = 'base'
+    filename = ''
+    encoding = 'utf-8'
+
+    def render(self, icon_path: str) -> str:
+        raise NotImplementedError
+
+    def attributes_ok(self, folder_st: os.stat_result, file_st: os.stat_result) -> bool:
+        """True si los atributos de carpeta y archivo ya son los correctos."""
+        return True
+
+    def before_write(self, file_paths: List[str]) -> None:
+        """Prepara archivos existentes para reescribirlos (p. ej. quitar oculto/sistema)."""
+
+    def apply_attributes(self, folders: List[str], file_paths: List[str]) -> None:
+        """Aplica de una vez los atributos a todas las carpetas y archivos tocados."""
+
+class WindowsBackend(IconBackend):
+    """desktop.ini oculto y de sistema, con la carpeta marcada como sistema.
+
+    Los atributos se cambian con SetFileAttributesW en el mismo proceso; si
+    no está disponible se lanza un único cmd con todos los attrib juntos,
+    en lugar de dos procesos por carpeta.
+    """
+
+    name = 'windows'
+    filename = 'desktop.ini'
+    # El Explorador lee desktop.ini como ANSI o UTF-16 con BOM: en UTF-8 una ruta con tildes se rompe
+    encoding = 'utf-16'
+
+    def __init__(self):
+        try:
+            import ctypes
+            self._kernel32 = ctypes.windll.kernel32
+        except (ImportError, AttributeError):
+            self._kernel32 = None
+
+    def render(self, icon_path: str) -> str:
+        return f"[.ShellClassInfo]\nIconFile={icon_path}\nIconIndex=0\nConfirmFileOp=0\n"
+
+    def attributes_ok(self, folder_st: os.stat_result, file_st: os.stat_result) -> bool:
+        folder_attrs = getattr(folder_st, 'st_file_attributes', None)
+        file_attrs = getattr(file_st, 'st_file_attributes', None)
+        if folder_attrs is None or file_attrs is None:
+            return True
+        hidden_system = _FILE_ATTRIBUTE_HIDDEN | _FILE_ATTRIBUTE_SYSTEM
+        return bool(folder_attrs & _FILE_ATTRIBUTE_SYSTEM) and (file_attrs & hidden_system) == hidden_system
+
+    def _set(self, path: str, add: int, replace: bool = False) -> bool:
+        if self._kernel32 is None:
+            return False
+        if replace:
+            attrs = add
+        else:
+            current = self._kernel32.GetFileAttributesW(path)
+            if current == 0xFFFFFFFF:
+                return False
+            attrs = current | add
+        return bool(self._kernel32.SetFileAttributesW(path, attrs))
+
+    def before_write(self, file_paths: List[str]) -> None:
+        # Un desktop.ini oculto y de sistema no se puede abrir para escritura
+        for path in file_paths:
+            if os.path.exists(path):
+                if not self._set(path, _FILE_ATTRIBUTE_NORMAL, replace=True):
+                    os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+
+    def apply_attributes(self, folders: List[str], file_paths: List[str]) -> None:
+        pending: List[Tuple[str, str]] = []
+        for folder in folders:
+            if not self._set(folder, _FILE_ATTRIBUTE_SYSTEM):
+                pending.append(('+s', folder))
+        for path in file_paths:
+            if not self._set(path, _FILE_ATTRIBUTE_HIDDEN | _FILE_ATTRIBUTE_SYSTEM):
+                pending.append(('+s +h', path))
+        if pending:
+            # Solo sin ctypes; subprocess no se importa en el camino habitual
+            import subprocess
+            command = ' & '.join(f'attrib {flags} "{path}"' for flags, path in pending)
+            subprocess.run(command, shell=True, check=False,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+class FreedesktopBackend(IconBackend):
+    """Archivo .directory que leen Dolphin y otros gestores de archivos en Linux."""
+
+    name = 'freedesktop'
+    filename = '.directory'
+
+    def render(self, icon_path: str) -> str:
+        return f"[Desktop Entry]\nIcon={icon_path}\n"
+
+def default_backend() -> IconBackend:
+    return WindowsBackend() if os.name == 'nt' else FreedesktopBackend()
+
+class IconProvisioner:
+    """Aplica íconos a carpetas recordando lo ya hecho.
+
+    Para cada carpeta se guarda la ruta del ícono, su fecha y la fecha y
+    tamaño del archivo de configuración escrito. Si al volver a ejecutar
+    todo coincide (dos stat por carpeta y, en Windows, los atributos que
+    ya trae el stat) no se hace nada: ni escrituras ni procesos. Lo que
+    falte se escribe y sus atributos se aplican en un solo lote.
+    """
+
+    def __init__(self, icons_dir: str, state_path: Optional[str] = None,
+                 backend: Optional[IconBackend] = None):
+        self.icons_dir = icons_dir
+        self.backend = backend or default_backend()
+        self.state_path = state_path or os.path.join(user_data_dir(), 'icons.json')
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, dict]] = None
+        self._icon_mtimes: Dict[str, Optional[float]] = {}
+
+    def _load(self) -> Dict[str, dict]:
+        if self._state is None:
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            pass
+
+    def icon_path(self, category: str) -> str:
+        return os.path.join(self.icons_dir, f"{category}.ico")
+
+    def _icon_mtime(self, icon_path: str) -> Optional[float]:
+        # Un stat por ícono y ejecución, no uno por carpeta
+        if icon_path not in self._icon_mtimes:
+            try:
+                self._icon_mtimes[icon_path] = os.stat(icon_path).st_mtime
+            except OSError:
+                self._icon_mtimes[icon_path] = None
+        return self._icon_mtimes[icon_path]
+
+    def _is_current(self, folder: str, icon_path: str, icon_mtime: float) -> bool:
+        record = self._load().get(os.path.normcase(os.path.abspath(folder)))
+        if (not record or record.get('backend') != self.backend.name
+                or record.get('encoding', 'utf-8') != self.backend.encoding
+                or record.get('icon') != icon_path or record.get('icon_mtime') != icon_mtime):
+            return False
+        try:
+            file_st = os.stat(os.path.join(folder, self.backend.filename))
+            folder_st = os.stat(folder)
+        except OSError:
+            return False
+        if file_st.st_mtime != record.get('file_mtime') or file_st.st_size != record.get('file_size'):
+            return False
+        return self.backend.attributes_ok(folder_st, file_st)
+
+    def ensure(self, folders: Mapping[str, str]) -> int:
+        """Deja cada carpeta {ruta: categoría} con su ícono; devuelve cuántas se tocaron."""
+        with self._lock:
+            todo: List[Tuple[str, str, float]] = []
+            for folder, category in folders.items():
+                icon_path = self.icon_path(category)
+                icon_mtime = self._icon_mtime(icon_path)
+                if icon_mtime is None:
+                    continue
+                if not self._is_current(folder, icon_path, icon_mtime):
+                    todo.append((folder, icon_path, icon_mtime))
+            if not todo:
+                return 0
+
+            file_paths = [os.path.join(folder, self.backend.filename) for folder, _, _ in todo]
+            self.backend.before_write(file_paths)
+            written = []
+            for (folder, icon_path, icon_mtime), file_path in zip(todo, file_paths):
+                try:
+                    with open(file_path, 'w', encoding=self.backend.encoding) as f:
+                        f.write(self.backend.render(icon_path))
+                except OSError:
+                    continue
+                written.append((folder, icon_path, icon_mtime, file_path))
+            self.backend.apply_attributes([w[0] for w in written], [w[3] for w in written])
+
+            state = self._load()
+            for folder, icon_path, icon_mtime, file_path in written:
+                try:
+                    file_st = os.stat(file_path)
+                except OSError:
+                    continue
+                state[os.path.normcase(os.path.abspath(folder))] = {
+                    'backend': self.backend.name, 'encoding': self.backend.encoding,
+                    'icon': icon_path, 'icon_mtime': icon_mtime,
+                    'file_mtime': file_st.st_mtime, 'file_size': file_st.st_size,
+                }
+            self._save()
+            return len(written)
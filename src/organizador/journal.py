@@ -0,0 +1,215 @@
+"""Diario de movimientos de solo escritura al final, para deshacer ejecuciones enteras."""
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from organizador.executor import DEFAULT_WORKERS, MoveExecutor
+from organizador.paths import user_data_dir
+from organizador.transfer import move_file
+
+# Registros acumulados o segundos transcurridos antes de un fsync
+SYNC_EVERY = 256
+SYNC_INTERVAL = 1.0
+
+RUN = 'run'
+MOVE = 'move'
+UNDONE = 'undone'
+
+CONFLICT_CHANGED = 'changed'
+CONFLICT_MISSING = 'missing'
+CONFLICT_OCCUPIED = 'occupied'
+
+# Distingue dos ejecuciones abiertas en el mismo milisegundo por el mismo proceso
+_RUN_COUNTER = itertools.count(1)
+
+class MoveJournal:
+    """Registro JSON Lines de cada ejecución y de cada movimiento.
+
+    Cada línea es un objeto con "type" (run, move o undone), "run" y
+    "time"; los movimientos guardan src, dest, size y mtime del archivo
+    movido. Las líneas se acumulan en memoria y se escriben con un único
+    write + fsync cada SYNC_EVERY registros o SYNC_INTERVAL segundos, y
+    siempre al cerrar. Una línea cortada por un corte de luz se ignora al
+    leer.
+    """
+
+    def __init__(self, path: Optional[str] = None, sync_every: int = SYNC_EVERY,
+                 sync_interval: float = SYNC_INTERVAL):
+        self.path = path or os.path.join(user_data_dir(), 'journal.jsonl')
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.run_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _append(self, record: Dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+
+    def _sync(self) -> None:
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def start_run(self, downloads: str, kind: str = 'organize') -> str:
+        """Abre una ejecución nueva; los movimientos siguientes quedan asociados a ella."""
+        now = time.time()
+        self.run_id = f"{int(now * 1000)}-{os.getpid()}-{next(_RUN_COUNTER)}"
+        self._append({'type': RUN, 'run': self.run_id, 'time': now, 'kind': kind, 'downloads': downloads})
+        return self.run_id
+
+    def record(self, src: str, dest: str, size: Optional[int] = None, mtime: Optional[float] = None) -> None:
+        """Anota un movimiento ya hecho; sin tamaño/fecha se toman del destino."""
+        if size is None or mtime is None:
+            try:
+                st = os.stat(dest)
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                return
+        self._append({'type': MOVE, 'run': self.run_id, 'time': time.time(),
+                      'src': src, 'dest': dest, 'size': size, 'mtime': mtime})
+
+    def record_undone(self, move: Dict) -> None:
+        self._append({'type': UNDONE, 'run': move['run'], 'time': time.time(),
+                      'src': move['src'], 'dest': move['dest']})
+
+    def flush(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+def open_journal(path: Optional[str] = None) -> Optional[MoveJournal]:
+    """Abre el diario o devuelve None si no se puede escribir."""
+    try:
+        return MoveJournal(path)
+    except OSError:
+        return None
+
+def read_journal(path: Optional[str] = None) -> Iterator[Dict]:
+    """Recorre el diario en orden; las líneas dañadas se saltan."""
+    path = path or os.path.join(user_data_dir(), 'journal.jsonl')
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and 'type' in record:
+                yield record
+
+def select_moves(records: Iterable[Dict], since: Optional[float] = None,
+                 until: Optional[float] = None) -> List[Dict]:
+    """Movimientos aún no deshechos de la última ejecución, o de un rango de fechas.
+
+    Sin since/until se elige la ejecución más reciente a la que le quede
+    algo por deshacer. El resultado va del más nuevo al más antiguo.
+    """
+    moves: Dict[Tuple[str, str], Dict] = {}
+    for record in records:
+        key = (record.get('src'), record.get('dest'))
+        if record['type'] == MOVE:
+            moves[key] = record
+        elif record['type'] == UNDONE:
+            moves.pop(key, None)
+    pending = sorted(moves.values(), key=lambda move: move['time'], reverse=True)
+    if since is None and until is None:
+        if not pending:
+            return []
+        last_run = pending[0]['run']
+        return [move for move in pending if move['run'] == last_run]
+    return [move for move in pending
+            if (since is None or move['time'] >= since) and (until is None or move['time'] <= until)]
+
+def check_undo(move: Dict) -> Optional[str]:
+    """Motivo por el que no se puede deshacer move, o None; solo usa stat."""
+    try:
+        st = os.stat(move['dest'])
+    except FileNotFoundError:
+        return CONFLICT_MISSING
+    if st.st_size != move['size'] or st.st_mtime != move['mtime']:
+        return CONFLICT_CHANGED
+    if os.path.lexists(move['src']):
+        return CONFLICT_OCCUPIED
+    return None
+
+def _move_back(dest: str, src: str) -> bool:
+    # Reserva exclusiva del nombre original: si algo lo ocupó entretanto, no se pisa
+    os.close(os.open(src, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    try:
+        move_file(dest, src)
+    except Exception:
+        try:
+            os.unlink(src)
+        except OSError:
+            pass
+        raise
+    return True
+
+def undo_moves(moves: List[Dict], journal: Optional[MoveJournal] = None, workers: int = DEFAULT_WORKERS,
+               on_conflict: Optional[Callable[[Dict, str], None]] = None,
+               on_restored: Optional[Callable[[Dict], None]] = None,
+               on_ready: Optional[Callable[[List[Dict]], None]] = None,
+               on_failed: Optional[Callable[[Dict], None]] = None) -> Tuple[int, int, int]:
+    """Devuelve cada archivo a su origen en paralelo; resultado (restaurados, conflictos, fallos).
+
+    Antes de mover se comprueba con stat que el destino conserva el tamaño
+    y la fecha registrados y que el origen está libre; los que no cumplen
+    se informan como conflicto y se dejan como están. Las carpetas de
+    origen se recrean todas juntas antes de empezar. on_ready recibe los
+    que se van a devolver antes de mover ninguno.
+    """
+    ready = []
+    conflicts = 0
+    for move in moves:
+        reason = check_undo(move)
+        if reason is None:
+            ready.append(move)
+        else:
+            conflicts += 1
+            if on_conflict:
+                on_conflict(move, reason)
+
+    for folder in sorted({os.path.dirname(move['src']) for move in ready}):
+        os.makedirs(folder, exist_ok=True)
+    if on_ready and ready:
+        on_ready(ready)
+
+    restored = failed = 0
+    with MoveExecutor(_move_back, workers) as executor:
+        futures = [(move, executor.submit(move['dest'], move['src'])) for move in ready]
+        for move, future in futures:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+                if on_failed:
+                    on_failed(move)
+                continue
+            restored += 1
+            if journal is not None:
+                journal.record_undone(move)
+            if on_restored:
+                on_restored(move)
+    if journal is not None:
+        journal.flush()
+    return restored, conflicts, failed
@@ -0,0 +1,113 @@
+"""Contadores e histogramas de latencia baratos para el camino caliente."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+# Límites superiores de los cubos, en segundos (100 µs a 60 s)
+BUCKETS: List[float] = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                        0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+class Histogram:
+    """Histograma de cubos fijos: observar es una búsqueda binaria y un incremento."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Cota superior del cuantil q según los cubos."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'avg': round(self.total / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': round(self.max, 6),
+        }
+
+class MetricsRegistry:
+    """Registro de contadores, histogramas y medidores calculados al consultar."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self.started = time.time()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Registra un valor que se lee en el momento de la consulta (p. ej. profundidad de cola)."""
+        with self._lock:
+            self._gauges[name] = func
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: h.snapshot() for name, h in self._histograms.items()}
+            gauges = dict(self._gauges)
+        values = {}
+        for name, func in gauges.items():
+            try:
+                values[name] = func()
+            except Exception:
+                values[name] = None
+        return {
+            'uptime': round(time.time() - self.started, 1),
+            'counters': counters,
+            'latency': histograms,
+            'gauges': values,
+        }
+
+    def summary(self) -> str:
+        """Resumen de una línea para el log periódico."""
+        snap = self.snapshot()
+        parts = [f"{name}={value}" for name, value in sorted(snap['counters'].items())]
+        parts += [f"{name}: n={h['count']} p50={h['p50'] * 1000:g}ms p95={h['p95'] * 1000:g}ms"
+                  for name, h in sorted(snap['latency'].items())]
+        parts += [f"{name}={value}" for name, value in sorted(snap['gauges'].items())]
+        return ' | '.join(parts)
+
+# Registro compartido por todo el proceso
+metrics = MetricsRegistry()
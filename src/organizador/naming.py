@@ -0,0 +1,160 @@
+"""Resolución de nombres duplicados en O(1) con reserva atómica del destino."""
+import os
+import stat
+import threading
+from typing import Dict, Optional, Set
+
+from organizador.transfer import move_file
+
+class _FolderNames:
+    """Nombres ocupados de una carpeta de destino, cargados la primera vez que se usan.
+
+    La lista se vuelve a leer si una reserva o un movimiento fallaron, o si
+    la fecha de modificación de la carpeta cambió sin reservas propias en
+    curso (alguien borró o creó algo). Lo que cambie mientras hay
+    movimientos propios pasa sin verse: si ocupó un nombre, O_EXCL lo
+    detecta igual; si lo liberó, solo queda un hueco en la numeración.
+    """
+
+    def __init__(self, path: str, reserve: bool = True):
+        self.path = path
+        self.reserve = reserve
+        self.lock = threading.Lock()
+        self.names: Optional[Set[str]] = None
+        # Último sufijo numérico usado por cada nombre original (invoice.pdf -> 7)
+        self.counters: Dict[str, int] = {}
+        self.mtime: Optional[int] = None
+        # Reservas hechas cuyo movimiento no terminó: cambian la fecha de la carpeta
+        self.pending = 0
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> None:
+        self.mtime = self._stat_mtime()
+        try:
+            self.names = {os.path.normcase(name) for name in os.listdir(self.path)}
+        except FileNotFoundError:
+            self.names = set()
+        self.counters = {}
+
+    def _is_stale(self) -> bool:
+        if self.names is None:
+            return True
+        # Planificando no se toca el disco; con reservas en curso la fecha cambia por ellas
+        return self.reserve and not self.pending and self._stat_mtime() != self.mtime
+
+    def claim(self, name: str) -> str:
+        base, ext = os.path.splitext(name)
+        with self.lock:
+            if self._is_stale():
+                self._load()
+            counter = self.counters.get(name, 0)
+            candidate = f"{base}_{counter}{ext}" if counter else name
+            while True:
+                key = os.path.normcase(candidate)
+                if key not in self.names:
+                    path = os.path.join(self.path, candidate)
+                    if not self.reserve:
+                        # Planificación: la reserva queda solo en memoria
+                        self.names.add(key)
+                        self.counters[name] = counter
+                        return path
+                    try:
+                        # Creación exclusiva: si otro proceso ganó el nombre, se prueba el siguiente
+                        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    except FileExistsError:
+                        self.names.add(key)
+                    except OSError:
+                        # Carpeta borrada, sin permisos...: la lista ya no vale
+                        self.names = None
+                        raise
+                    else:
+                        self.names.add(key)
+                        self.counters[name] = counter
+                        self.pending += 1
+                        return path
+                counter += 1
+                candidate = f"{base}_{counter}{ext}"
+
+    def settle(self) -> None:
+        """Un movimiento a un nombre reservado terminó: su cambio en la carpeta ya es conocido."""
+        with self.lock:
+            self.pending = max(0, self.pending - 1)
+            if not self.pending and self.names is not None:
+                self.mtime = self._stat_mtime()
+
+    def release(self, dest_path: str) -> None:
+        """Quita el marcador vacío de una reserva fallida y olvida la lista."""
+        try:
+            st = os.lstat(dest_path)
+            # Solo el marcador de O_EXCL: con contenido, el movimiento sí llegó a hacerse
+            if stat.S_ISREG(st.st_mode) and st.st_size == 0:
+                os.unlink(dest_path)
+        except OSError:
+            pass
+        with self.lock:
+            self.pending = max(0, self.pending - 1)
+            self.names = None
+
+class NameIndex:
+    """Índice de nombres por carpeta de destino compartido entre hilos.
+
+    Sustituye el bucle `name_1`, `name_2`, ... con `os.path.exists`: la
+    carpeta se lista una sola vez y cada reserva crea el destino con
+    O_EXCL, así dos movimientos concurrentes nunca eligen el mismo nombre.
+    Con reserve=False no se toca el disco: sirve para planificar.
+    """
+
+    def __init__(self, reserve: bool = True):
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._folders: Dict[str, _FolderNames] = {}
+
+    def _folder(self, dest_folder: str) -> _FolderNames:
+        key = os.path.normcase(os.path.abspath(dest_folder))
+        with self._lock:
+            folder = self._folders.get(key)
+            if folder is None:
+                folder = self._folders[key] = _FolderNames(dest_folder, self.reserve)
+            return folder
+
+    def claim(self, dest_folder: str, name: str) -> str:
+        """Reserva un nombre libre en dest_folder y devuelve la ruta reservada."""
+        return self._folder(dest_folder).claim(name)
+
+    def settle(self, dest_path: str) -> None:
+        """Indica que el destino reservado ya tiene su contenido final."""
+        self._folder(os.path.dirname(dest_path)).settle()
+
+    def release(self, dest_path: str) -> None:
+        """Libera una reserva cuyo movimiento falló y borra su marcador vacío."""
+        self._folder(os.path.dirname(dest_path)).release(dest_path)
+
+    def forget(self, dest_folder: str) -> None:
+        """Descarta el índice de una carpeta para que se vuelva a listar."""
+        with self._lock:
+            self._folders.pop(os.path.normcase(os.path.abspath(dest_folder)), None)
+
+    def move(self, src: str, dest_folder: str, name: Optional[str] = None) -> str:
+        """Mueve src a dest_folder con un nombre libre (name o el suyo) y devuelve la ruta final."""
+        folder = self._folder(dest_folder)
+        dest_path = folder.claim(name or os.path.basename(src))
+        try:
+            final_path = move_to_claimed(src, dest_path)
+        except BaseException:
+            folder.release(dest_path)
+            raise
+        if final_path != dest_path:
+            # Se reanudó una copia interrumpida con su nombre original
+            folder.release(dest_path)
+        else:
+            folder.settle()
+        return final_path
+
+def move_to_claimed(src: str, dest_path: str) -> str:
+    """Mueve src sobre el marcador reservado en dest_path y devuelve la ruta final."""
+    return move_file(src, dest_path)
@@ -0,0 +1,69 @@
+"""Rutas de datos persistentes del organizador y ubicación de la carpeta de descargas."""
+import functools
+import logging
+import os
+import sys
+from typing import Optional
+
+APP_NAME = 'DownloadOrganizer'
+
+def user_data_dir() -> str:
+    """Carpeta de datos del usuario (fuera de Descargas para no organizarla)."""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# Clave de la carpeta de descargas en "Shell Folders" (FOLDERID_Downloads)
+_DOWNLOADS_GUID = "{374DE290-123F-4565-9164-39C4925E467B}"
+
+def _windows_downloads() -> Optional[str]:
+    import winreg
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders") as key:
+            return winreg.QueryValueEx(key, _DOWNLOADS_GUID)[0]
+    except FileNotFoundError:
+        logging.warning("No se encontró la clave del registro.")
+    except OSError as e:
+        logging.error(f"Error al acceder al registro: {e}")
+    return None
+
+def _xdg_downloads() -> Optional[str]:
+    # XDG_DOWNLOAD_DIR="$HOME/Descargas" en ~/.config/user-dirs.dirs
+    config = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    try:
+        with open(os.path.join(config, 'user-dirs.dirs'), 'r', encoding='utf-8') as f:
+            for line in f:
+                name, _, value = line.strip().partition('=')
+                if name == 'XDG_DOWNLOAD_DIR':
+                    return os.path.expandvars(value.strip('"'))
+    except OSError:
+        pass
+    return None
+
+@functools.lru_cache(maxsize=None)
+def find_downloads_folder() -> str:
+    """Carpeta de descargas del usuario, resuelta una vez por proceso.
+
+    En Windows se consulta el registro (winreg solo se importa ahí), en
+    Linux el XDG_DOWNLOAD_DIR de user-dirs.dirs; si no hay nada o no existe
+    se prueba Downloads y Descargas en la carpeta del usuario.
+    """
+    if os.name == 'nt':
+        located = _windows_downloads()
+    elif sys.platform.startswith('linux'):
+        located = _xdg_downloads()
+    else:
+        located = None
+    if located and os.path.isdir(located):
+        return located
+
+    home = os.environ.get('USERPROFILE') or os.path.expanduser('~')
+    for folder in ['Downloads', 'Descargas']:
+        path = os.path.join(home, folder)
+        if os.path.exists(path):
+            return path
+    return os.path.join(home, 'Downloads')
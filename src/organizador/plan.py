@@ -0,0 +1,128 @@
+"""Plan de movimientos en JSON Lines: se calcula sin tocar el disco y se aplica en bloque.
+
+La primera línea es una cabecera {"plan": 1, "downloads": ..., "created": ...}
+y cada línea siguiente un movimiento {"src", "dest", "size", "mtime",
+"category"} con la ruta final ya resuelta, ordenadas por origen para que
+dos planes se puedan comparar con diff. Aplicar un plan es idempotente:
+los movimientos cuyo origen ya no existe y cuyo destino está completo se
+dan por hechos, así un plan interrumpido se reanuda volviendo a aplicarlo.
+"""
+import json
+import os
+import stat
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from organizador.executor import DEFAULT_WORKERS, MoveExecutor
+from organizador.naming import NameIndex
+from organizador.scanner import Entry
+
+PLAN_VERSION = 1
+
+class PlannedMove(NamedTuple):
+    src: str
+    dest: str
+    size: int
+    mtime: float
+    category: str
+
+class Planner:
+    """Resuelve nombres de destino en memoria, igual que haría el movimiento real."""
+
+    def __init__(self):
+        self.names = NameIndex(reserve=False)
+        self.moves: List[PlannedMove] = []
+
+    def add(self, entry: Entry, dest_folder: str, category: str) -> PlannedMove:
+        dest = self.names.claim(dest_folder, entry.name)
+        move = PlannedMove(entry.path, dest, entry.size, entry.mtime, category)
+        self.moves.append(move)
+        return move
+
+def write_plan(path: str, moves: Iterable[PlannedMove], downloads: str) -> int:
+    """Escribe el plan de forma atómica y devuelve cuántos movimientos tiene."""
+    moves = sorted(moves, key=lambda move: move.src)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        header = {'plan': PLAN_VERSION, 'downloads': downloads, 'created': time.time(), 'moves': len(moves)}
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for move in moves:
+            f.write(json.dumps(move._asdict(), ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return len(moves)
+
+def read_plan(path: str) -> Tuple[Dict, List[PlannedMove]]:
+    """Lee un plan; falla con ValueError si la cabecera o alguna línea no es válida."""
+    with open(path, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('plan') != PLAN_VERSION:
+            raise ValueError(f"{path} no es un plan de movimientos (versión {PLAN_VERSION})")
+        moves = []
+        for number, line in enumerate(f, start=2):
+            if not line.strip():
+                continue
+            try:
+                moves.append(PlannedMove(**json.loads(line)))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{path}:{number}: línea no válida: {e}")
+    return header, moves
+
+PENDING = 'pending'
+DONE = 'done'
+CHANGED = 'changed'
+MISSING = 'missing'
+TAKEN = 'taken'
+
+def check(move: PlannedMove) -> str:
+    """Estado de un movimiento frente al disco, sin modificar nada.
+
+    pending: listo para aplicarse; done: ya aplicado; changed: el origen
+    cambió desde que se planificó; missing: no hay origen ni destino;
+    taken: el destino ya existe con otro contenido (se usará otro nombre).
+    """
+    try:
+        st = os.stat(move.src)
+    except FileNotFoundError:
+        try:
+            dest = os.stat(move.dest)
+        except FileNotFoundError:
+            return MISSING
+        return DONE if stat.S_ISDIR(dest.st_mode) or dest.st_size == move.size else MISSING
+    if st.st_size != move.size or st.st_mtime != move.mtime:
+        return CHANGED
+    return TAKEN if os.path.lexists(move.dest) else PENDING
+
+def verify_plan(moves: Iterable[PlannedMove]) -> Dict[str, List[PlannedMove]]:
+    """Agrupa los movimientos por estado para revisar un plan antes de aplicarlo."""
+    report: Dict[str, List[PlannedMove]] = {}
+    for move in moves:
+        report.setdefault(check(move), []).append(move)
+    return report
+
+def apply_plan(moves: Iterable[PlannedMove], move_func: Callable[[str, str], bool],
+               workers: int = DEFAULT_WORKERS,
+               on_skip: Optional[Callable[[PlannedMove, str], None]] = None) -> Tuple[int, int, int]:
+    """Aplica el plan y devuelve (movidos, omitidos, fallidos).
+
+    Crea todas las carpetas de destino de una vez antes de empezar y luego
+    mueve en paralelo: los nombres ya están resueltos, así que cada
+    destino va por su propia cola. move_func recibe (origen, ruta_destino).
+    Los movimientos ya hechos o cuyo origen cambió se omiten.
+    """
+    pending = []
+    skipped = 0
+    for move in moves:
+        state = check(move)
+        if state in (PENDING, TAKEN):
+            pending.append(move)
+        else:
+            skipped += 1
+            if on_skip:
+                on_skip(move, state)
+
+    for folder in sorted({os.path.dirname(move.dest) for move in pending}):
+        os.makedirs(folder, exist_ok=True)
+
+    with MoveExecutor(move_func, workers) as executor:
+        done, failed = executor.run((move.src, move.dest) for move in pending)
+    return done, skipped, failed
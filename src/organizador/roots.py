@@ -0,0 +1,68 @@
+"""Varias carpetas vigiladas desde un mismo proceso, cada una con sus destinos."""
+import os
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Union
+
+RootSpec = Union[str, Mapping[str, object]]
+
+class WatchRoot:
+    """Carpeta de origen y dónde acaban sus categorías.
+
+    Por defecto las categorías se crean dentro de la propia carpeta, como
+    siempre en Descargas. `target` cambia la carpeta base (p. ej. una
+    carpeta de red de entrada que se ordena en otro disco) y `categories`
+    lleva categorías sueltas a otra ruta, absoluta o relativa a target.
+    """
+
+    def __init__(self, path: str, target: Optional[str] = None,
+                 categories: Optional[Mapping[str, str]] = None):
+        self.path = os.path.abspath(path)
+        self.target = os.path.abspath(target) if target else self.path
+        self.categories: Dict[str, str] = {
+            category: os.path.join(self.target, folder) for category, folder in (categories or {}).items()
+        }
+        self.key = os.path.normcase(self.path)
+
+    def category_folder(self, category: str) -> str:
+        return self.categories.get(category) or os.path.join(self.target, category)
+
+    def contains(self, path: str) -> bool:
+        """True si path está dentro de la carpeta (a cualquier profundidad)."""
+        path = os.path.normcase(os.path.abspath(path))
+        return path.startswith(self.key + os.sep) or path == self.key
+
+    def __repr__(self) -> str:
+        return f"WatchRoot({self.path!r})"
+
+def parse_roots(specs: Iterable[RootSpec]) -> List[WatchRoot]:
+    """Convierte la configuración en carpetas vigiladas, sin repetidas.
+
+    Cada elemento es una ruta o un dict {"path", "target", "categories"}.
+    Falla con ValueError si falta la ruta o hay claves desconocidas.
+    """
+    roots: Dict[str, WatchRoot] = {}
+    for spec in specs:
+        if isinstance(spec, str):
+            spec = {'path': spec}
+        if not isinstance(spec, Mapping) or not spec.get('path'):
+            raise ValueError(f"Carpeta vigilada sin 'path': {spec!r}")
+        unknown = set(spec) - {'path', 'target', 'categories'}
+        if unknown:
+            raise ValueError(f"Claves desconocidas en {spec['path']}: {', '.join(sorted(unknown))}")
+        root = WatchRoot(spec['path'], spec.get('target'), spec.get('categories'))
+        roots.setdefault(root.key, root)
+    return list(roots.values())
+
+def root_finder(roots: List[WatchRoot]) -> Callable[[str], Optional[WatchRoot]]:
+    """Función que devuelve la carpeta más interna que contiene una ruta, o None.
+
+    Las carpetas se prueban de la más larga a la más corta, así una
+    carpeta vigilada dentro de otra se queda con sus propios archivos.
+    """
+    ordered = sorted(roots, key=lambda root: len(root.key), reverse=True)
+
+    def find(path: str) -> Optional[WatchRoot]:
+        for root in ordered:
+            if root.contains(path):
+                return root
+        return None
+    return find
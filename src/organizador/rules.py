@@ -0,0 +1,389 @@
+"""Reglas declarativas de destino (nombre, origen, tamaño, antigüedad) compiladas una vez.
+
+Formato JSON (o TOML con la misma estructura), evaluado en orden; gana la
+primera regla que coincide y, si ninguna lo hace, el archivo va a su
+carpeta de categoría como siempre:
+
+    {"rules": [
+        {"name": "instaladores grandes",
+         "match": {"categories": ["programs"], "min_size": "1GB"},
+         "destination": "programs/large"},
+        {"match": {"glob": "invoice_*.pdf"}, "destination": "documents/invoices"},
+        {"match": {"older_than_days": 30}, "destination": "archive"}
+    ]}
+
+Condiciones de "match" (todas deben cumplirse):
+    glob / regex        patrón (o lista) sobre el nombre del archivo
+    extensions          lista de extensiones ('.iso', '.tar.gz')
+    source              patrón glob de la subcarpeta de origen ('.' = primer nivel)
+    categories          categorías detectadas (por extensión o contenido)
+    min_size, max_size  bytes o texto con unidad ('500MB', '1 GiB')
+    older_than_days, newer_than_days
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import re._parser as _sre_parse
+    from re._constants import LITERAL, MAX_REPEAT, MIN_REPEAT, SUBPATTERN
+except ImportError:
+    # Python < 3.11
+    import sre_parse as _sre_parse
+    from sre_constants import LITERAL, MAX_REPEAT, MIN_REPEAT, SUBPATTERN
+
+from organizador.paths import user_data_dir
+from organizador.scanner import Entry
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'kb': 1000, 'mb': 1000 ** 2, 'gb': 1000 ** 3, 'tb': 1000 ** 4,
+               'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4}
+_SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*$', re.IGNORECASE)
+_DAY = 86400
+
+class RuleError(ValueError):
+    """Archivo de reglas mal formado."""
+
+def default_rules_path() -> str:
+    return os.path.join(user_data_dir(), 'rules.json')
+
+def parse_size(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE_RE.match(str(value))
+    if not match or match.group(2).lower() not in _SIZE_UNITS:
+        raise RuleError(f"Tamaño no válido: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+def glob_to_regex(pattern: str) -> str:
+    """Traduce un glob a regex sin anclas: '*' y '?' no cruzan '/', '**' sí."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end + 1
+                continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+def _last_suffix(name: str) -> str:
+    """Última extensión en minúsculas ('.gz' para 'x.tar.gz'), '' si no tiene."""
+    dot = name.rfind('.')
+    return name[dot:].lower() if dot > 0 else ''
+
+def _literal_suffix(glob: str) -> Optional[str]:
+    """Extensión fija de un glob ('*.pdf' -> '.pdf'), o None si tiene comodines."""
+    dot = glob.rfind('.')
+    if dot <= 0:
+        # Sin punto, o solo el inicial ('.bashrc'): igual que _last_suffix, sin extensión
+        return None if any(c in glob for c in '*?[') else ''
+    suffix = glob[dot:]
+    return None if any(c in suffix for c in '*?[]/') else suffix
+
+def _glob_literal(glob: str) -> str:
+    """Tramo literal más largo de un glob: todo nombre que coincida lo contiene."""
+    return max(re.split(r'\*+|\?|\[[^\]]*\]?', glob), key=len)
+
+def _regex_literal(regex: str) -> str:
+    """Tramo literal más largo que toda coincidencia de regex debe contener ('' si no hay).
+
+    Solo se siguen concatenaciones, grupos y repeticiones de al menos una
+    vez; alternativas, clases y aserciones cortan el tramo.
+    """
+    def walk(items) -> Tuple[str, str]:
+        best, run = '', ''
+        for op, av in items:
+            if op is LITERAL:
+                run += chr(av)
+                continue
+            best, run = max(best, run, key=len), ''
+            inner = None
+            if op is SUBPATTERN:
+                inner = av[-1]
+            elif op in (MAX_REPEAT, MIN_REPEAT) and av[0] >= 1:
+                inner = av[2]
+            if inner is not None:
+                best = max(best, walk(inner)[0], key=len)
+        return max(best, run, key=len), run
+    try:
+        return walk(_sre_parse.parse(regex))[0].lower()
+    except Exception:
+        return ''
+
+def _as_list(value: Any) -> List:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+class Rule:
+    """Una regla ya validada: patrón (para el autómata) y predicados baratos."""
+
+    __slots__ = ('name', 'destination', 'pattern', 'literals', 'suffixes', 'initials', 'categories',
+                 'min_size', 'max_size', 'older_than', 'newer_than', '_matcher')
+
+    def __init__(self, spec: Mapping[str, Any], position: int):
+        self.name = spec.get('name') or f"regla {position + 1}"
+        self.destination = spec.get('destination')
+        if not isinstance(self.destination, str) or not self.destination.strip('/\\'):
+            raise RuleError(f"{self.name}: falta 'destination'")
+        if os.path.isabs(self.destination) or '..' in re.split(r'[/\\]', self.destination):
+            raise RuleError(f"{self.name}: 'destination' debe ser relativa a Descargas")
+        match = spec.get('match') or {}
+        unknown = set(match) - {'glob', 'regex', 'extensions', 'source', 'categories', 'min_size',
+                                'max_size', 'older_than_days', 'newer_than_days'}
+        if unknown:
+            raise RuleError(f"{self.name}: condiciones desconocidas {sorted(unknown)}")
+
+        globs = [g.lower() for g in _as_list(match.get('glob'))]
+        regexes = _as_list(match.get('regex'))
+        names = [glob_to_regex(g) for g in globs]
+        for regex in regexes:
+            try:
+                re.compile(regex)
+            except re.error as e:
+                raise RuleError(f"{self.name}: regex no válida {regex!r}: {e}")
+            names.append(f"(?:{regex})")
+        exts = [e.lower() if e.startswith('.') else f".{e.lower()}" for e in _as_list(match.get('extensions'))]
+        if exts:
+            ext_regex = '|'.join(re.escape(e) for e in exts)
+            # Nombre y extensión deben coincidir a la vez: el nombre va como anticipación
+            lookahead = f"(?=(?:{'|'.join(names)})\\Z)" if names else ''
+            names = [f"{lookahead}[^/]*(?:{ext_regex})"]
+        name_regex = '|'.join(names) if names else '[^/]*'
+
+        sources = _as_list(match.get('source'))
+        if sources:
+            folders = '|'.join('' if s in ('.', '') else f"{glob_to_regex(s.strip('/'))}/" for s in sources)
+            source_regex = f"(?:{folders})"
+        else:
+            source_regex = '(?:.*/)?'
+        # Se evalúa sobre la ruta relativa a Descargas con '/' como separador
+        self.pattern = f"{source_regex}(?:{name_regex})"
+
+        # Textos de los que el nombre debe contener al menos uno (None = sin filtro literal)
+        if names and not exts:
+            literals = [_glob_literal(g) for g in globs] + [_regex_literal(r) for r in regexes]
+        elif exts and not (globs or regexes):
+            literals = exts
+        elif exts:
+            # El nombre debe cumplir ambas: basta el filtro más selectivo
+            named = [_glob_literal(g) for g in globs] + [_regex_literal(r) for r in regexes]
+            literals = named if all(named) and min(map(len, named)) > min(map(len, exts)) else exts
+        else:
+            literals = []
+        self.literals = frozenset(literals) if literals and all(literals) else None
+        self._matcher = None
+
+        # Claves literales para el despacho previo (None = cualquiera)
+        self.suffixes = None
+        self.initials = None
+        if exts:
+            # '' también: un archivo oculto llamado igual que la extensión ('.jpg') no tiene extensión
+            self.suffixes = frozenset(e[e.rfind('.'):] for e in exts) | {''}
+        elif globs and not regexes:
+            suffixes = {_literal_suffix(g) for g in globs}
+            self.suffixes = None if None in suffixes else frozenset(suffixes)
+        if globs and not regexes:
+            initials = {g[:1] if g[:1] and g[:1] not in '*?[' else None for g in globs}
+            self.initials = None if None in initials else frozenset(initials)
+
+        self.categories = frozenset(_as_list(match.get('categories'))) or None
+        self.min_size = parse_size(match['min_size']) if 'min_size' in match else None
+        self.max_size = parse_size(match['max_size']) if 'max_size' in match else None
+        self.older_than = float(match['older_than_days']) * _DAY if 'older_than_days' in match else None
+        self.newer_than = float(match['newer_than_days']) * _DAY if 'newer_than_days' in match else None
+
+    def matches(self, subject: str) -> bool:
+        """True si la ruta relativa cumple el patrón (regex compilada la primera vez)."""
+        if self._matcher is None:
+            self._matcher = re.compile(self.pattern, re.IGNORECASE | re.DOTALL)
+        return self._matcher.fullmatch(subject) is not None
+
+    def accepts(self, entry: Entry, category: str, now: float) -> bool:
+        if self.categories is not None and category not in self.categories:
+            return False
+        if self.min_size is not None and entry.size < self.min_size:
+            return False
+        if self.max_size is not None and entry.size > self.max_size:
+            return False
+        age = now - entry.mtime
+        if self.older_than is not None and age < self.older_than:
+            return False
+        if self.newer_than is not None and age > self.newer_than:
+            return False
+        return True
+
+class LiteralIndex:
+    """Autómata de Aho-Corasick sobre los literales exigidos por las reglas.
+
+    Una sola pasada por el texto encuentra todos los literales que contiene
+    (y así las reglas que podrían coincidir), con un coste que depende del
+    largo del texto y de las coincidencias, no de cuántas reglas hay.
+    """
+
+    def __init__(self, literals: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[FrozenSet[int]] = [frozenset()]
+        for literal, index in literals:
+            node = 0
+            for char in literal:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._output.append(frozenset())
+                node = nxt
+            self._output[node] |= {index}
+        # Enlaces de fallo por niveles; cada nodo hereda las salidas de su sufijo
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] |= self._output[self._fail[child]]
+                queue.append(child)
+
+    def search(self, text: str) -> set:
+        """Índices de las reglas con algún literal presente en text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found |= output[node]
+        return found
+
+class RuleSet:
+    """Reglas compiladas: filtro de literales, despacho por extensión e inicial.
+
+    Cada regla declara los textos que su nombre debe contener (el tramo
+    literal más largo de su glob o regex, o su extensión). Un autómata de
+    Aho-Corasick con todos ellos encuentra en una pasada por la ruta las
+    reglas posibles; además cada regla declara, cuando su patrón lo
+    permite, la extensión literal y la inicial que exige. Solo las reglas
+    que pasan ambos filtros se prueban, en orden, con su regex y sus
+    predicados de tamaño/edad/categoría.
+
+    Las reglas sin ningún literal (p. ej. solo tamaño o antigüedad, o un
+    glob como '*') se prueban siempre: el coste por archivo crece con
+    ellas y con las candidatas, no con el total de reglas.
+    """
+
+    MAX_BUCKETS = 4096
+
+    def __init__(self, specs: Sequence[Mapping[str, Any]]):
+        self.rules = [Rule(spec, i) for i, spec in enumerate(specs)]
+        self._literals = LiteralIndex((literal, i) for i, rule in enumerate(self.rules)
+                                      for literal in rule.literals or ())
+        self._unfiltered = frozenset(i for i, rule in enumerate(self.rules) if rule.literals is None)
+        self._buckets: Dict[tuple, FrozenSet[int]] = {}
+
+    def _bucket(self, suffix: str, initial: str) -> FrozenSet[int]:
+        """Reglas compatibles con una (extensión, inicial)."""
+        key = (suffix, initial)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = frozenset(i for i, rule in enumerate(self.rules)
+                               if (rule.suffixes is None or suffix in rule.suffixes)
+                               and (rule.initials is None or initial in rule.initials))
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._buckets.clear()
+            self._buckets[key] = bucket
+        return bucket
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def destinations(self) -> List[str]:
+        """Carpetas de destino relativas a Descargas usadas por las reglas."""
+        return list(dict.fromkeys(rule.destination.replace('\\', '/').strip('/') for rule in self.rules))
+
+    def folders(self, downloads: str) -> List[str]:
+        """Carpetas que crean las reglas y su carpeta de primer nivel, para no reorganizarlas."""
+        folders = []
+        for destination in self.destinations():
+            parts = destination.split('/')
+            folders.append(os.path.join(downloads, parts[0]))
+            if len(parts) > 1:
+                folders.append(os.path.join(downloads, *parts))
+        return list(dict.fromkeys(folders))
+
+    def match(self, entry: Entry, relative_path: str, category: str,
+              now: Optional[float] = None) -> Optional[Rule]:
+        """Primera regla que acepta el archivo, o None."""
+        subject = relative_path.replace('\\', '/')
+        name = subject[subject.rfind('/') + 1:]
+        bucket = self._bucket(_last_suffix(name), name[:1].lower())
+        candidates = (self._literals.search(subject.lower()) | self._unfiltered) & bucket
+        now = time.time() if now is None else now
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if rule.matches(subject) and rule.accepts(entry, category, now):
+                return rule
+        return None
+
+    def route(self, entry: Entry, downloads: str, category: str,
+              now: Optional[float] = None, target: Optional[str] = None) -> Optional[str]:
+        """Carpeta de destino según las reglas, o None para usar la categoría.
+
+        Los patrones se comparan con la ruta relativa a downloads y el
+        destino se arma dentro de target (por defecto, downloads).
+        """
+        if not self.rules:
+            return None
+        relative = os.path.relpath(entry.path, downloads)
+        rule = self.match(entry, relative, category, now)
+        base = target or downloads
+        return os.path.join(base, *rule.destination.replace('\\', '/').strip('/').split('/')) if rule else None
+
+def _read(path: str) -> Dict[str, Any]:
+    if path.lower().endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            raise RuleError("Los archivos TOML necesitan Python 3.11 o superior")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_rules(path: Optional[str] = None) -> RuleSet:
+    """Carga y compila el archivo de reglas; si no existe, no hay reglas."""
+    path = path or default_rules_path()
+    try:
+        data = _read(path)
+    except FileNotFoundError:
+        return RuleSet([])
+    except ValueError as e:
+        raise RuleError(f"{path}: {e}")
+    specs = data.get('rules', []) if isinstance(data, dict) else data
+    if not isinstance(specs, list):
+        raise RuleError(f"{path}: 'rules' debe ser una lista")
+    return RuleSet(specs)
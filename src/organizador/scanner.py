@@ -0,0 +1,61 @@
+"""Escaneo de una carpeta en una sola pasada con os.scandir."""
+import os
+import stat
+from typing import Iterator, NamedTuple
+
+FILE = 'file'
+DIRECTORY = 'dir'
+OTHER = 'other'
+
+class Entry(NamedTuple):
+    """Elemento de una carpeta con los datos que necesitan el clasificador y el movedor."""
+    name: str
+    path: str
+    kind: str
+    size: int
+    mtime: float
+    # 0 donde el listado no lo trae gratis (Windows)
+    inode: int = 0
+
+    @property
+    def is_file(self) -> bool:
+        return self.kind == FILE
+
+    @property
+    def is_dir(self) -> bool:
+        return self.kind == DIRECTORY
+
+def _kind(mode: int) -> str:
+    if stat.S_ISREG(mode):
+        return FILE
+    if stat.S_ISDIR(mode):
+        return DIRECTORY
+    return OTHER
+
+def entry_from_path(path: str) -> Entry:
+    """Construye un Entry para una ruta suelta (p. ej. la de un evento del watcher)."""
+    st = os.stat(path)
+    return Entry(os.path.basename(path), path, _kind(st.st_mode), st.st_size, st.st_mtime, st.st_ino)
+
+def scan_directory(path: str) -> Iterator[Entry]:
+    """Recorre la carpeta una vez; cada elemento cuesta a lo sumo un stat.
+
+    En Windows scandir ya trae tamaño y fecha en el listado, así que no hay
+    llamadas extra; en POSIX se hace un único stat por elemento.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                # Desapareció entre el listado y el stat
+                continue
+            kind = _kind(st.st_mode)
+            inode = st.st_ino
+            if not inode and kind == DIRECTORY:
+                # En Windows el stat del listado no trae inodo; solo se pide para carpetas
+                try:
+                    inode = entry.inode()
+                except OSError:
+                    pass
+            yield Entry(entry.name, entry.path, kind, st.st_size, st.st_mtime, inode)
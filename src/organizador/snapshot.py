@@ -0,0 +1,92 @@
+"""Instantánea del último escaneo: al arrancar no se vuelve a listar una carpeta que no cambió."""
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional
+
+from organizador.paths import user_data_dir
+from organizador.scanner import Entry, entry_from_path, scan_directory
+
+SNAPSHOT_VERSION = 1
+
+# Resolución de la fecha de una carpeta: FAT guarda segundos pares, el resto
+# (NTFS, ext4, APFS) fracciones; se añade margen por el reloj grueso del kernel
+COARSE_GRANULARITY_NS = 2_000_000_000
+FINE_GRANULARITY_NS = 20_000_000
+
+def _granularity(mtime_ns: int) -> int:
+    return COARSE_GRANULARITY_NS if mtime_ns % 1_000_000_000 == 0 else FINE_GRANULARITY_NS
+
+class ScanSnapshot:
+    """Fecha de modificación de una carpeta y lo que contenía al guardarla.
+
+    Crear, borrar o renombrar algo dentro de una carpeta cambia su fecha,
+    así que si al volver a arrancar coincide con la guardada el listado
+    sigue siendo el mismo: basta un stat por elemento recordado (lo que
+    quedó sin mover: descargas a medias, errores, carpetas de categorías)
+    en lugar de recorrer la carpeta. Una fecha tomada dentro de la
+    resolución del sistema de archivos no es fiable y no se usa.
+    """
+
+    def __init__(self, folder: Optional[str] = None):
+        self.folder = folder or os.path.join(user_data_dir(), 'snapshots')
+
+    def _path(self, directory: str) -> str:
+        key = os.path.normcase(os.path.abspath(directory)).encode('utf-8', 'surrogatepass')
+        return os.path.join(self.folder, f"{hashlib.blake2b(key, digest_size=12).hexdigest()}.json")
+
+    def entries(self, directory: str) -> Optional[List[Entry]]:
+        """Elementos actuales de directory si no cambió desde record(), o None para escanear."""
+        try:
+            with open(self._path(directory), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            st = os.stat(directory)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(record, dict) or record.get('version') != SNAPSHOT_VERSION
+                or record.get('directory') != os.path.abspath(directory)
+                or record.get('mtime_ns') != st.st_mtime_ns
+                or st.st_mtime_ns + _granularity(st.st_mtime_ns) > record.get('taken_ns', 0)):
+            return None
+        entries = []
+        for name, _, _, _ in record.get('entries', ()):
+            try:
+                entries.append(entry_from_path(os.path.join(directory, name)))
+            except OSError:
+                continue
+        return entries
+
+    def record(self, directory: str) -> int:
+        """Guarda el contenido actual de directory; devuelve cuántos elementos tiene.
+
+        Si la carpeta se acaba de modificar se espera a que su fecha quede
+        fuera de la resolución del sistema de archivos (unos milisegundos
+        salvo en FAT, donde se guarda igual y el próximo arranque escanea).
+        """
+        st = os.stat(directory)
+        wait_ns = st.st_mtime_ns + _granularity(st.st_mtime_ns) - time.time_ns()
+        if 0 < wait_ns <= FINE_GRANULARITY_NS:
+            time.sleep(wait_ns / 1e9)
+        # La hora se toma antes del stat: un cambio posterior siempre cambia la fecha
+        taken_ns = time.time_ns()
+        st = os.stat(directory)
+        entries = [[entry.name, entry.kind, entry.size, entry.mtime] for entry in scan_directory(directory)]
+        record = {'version': SNAPSHOT_VERSION, 'directory': os.path.abspath(directory),
+                  'mtime_ns': st.st_mtime_ns, 'taken_ns': taken_ns, 'entries': entries}
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(directory)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return len(entries)
+
+    def forget(self, directory: str) -> None:
+        try:
+            os.unlink(self._path(directory))
+        except OSError:
+            pass
@@ -0,0 +1,159 @@
+"""Clasificación por contenido (bytes mágicos) para archivos sin extensión o mal etiquetados."""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from organizador.categories import DEFAULT_CATEGORY, EXTENSIONS, get_category
+from organizador.scanner import Entry
+
+# Bytes leídos del principio del archivo: alcanza para la cabecera tar (257)
+HEAD_SIZE = 512
+DEFAULT_CACHE_SIZE = 200_000
+
+SNIFF_MODES = ('unknown', 'all')
+
+# (partes (desplazamiento, bytes) que deben coincidir todas, categoría, débil)
+# Las firmas débiles son contenedores genéricos (zip, OLE) o prefijos muy
+# cortos: solo deciden cuando la extensión no dice nada.
+SIGNATURES: List[Tuple[Sequence[Tuple[int, bytes]], str, bool]] = [
+    # Documentos
+    (((0, b'%PDF-'),), 'documents', False),
+    (((0, b'{\\rtf'),), 'documents', False),
+    (((0, b'PK\x03\x04'), (30, b'[Content_Types].xml')), 'documents', False),
+    (((0, b'PK\x03\x04'), (30, b'mimetypeapplication/vnd.oasis.opendocument')), 'documents', False),
+    (((0, b'PK\x03\x04'), (30, b'mimetypeapplication/epub+zip')), 'documents', False),
+    (((0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'),), 'documents', True),
+    # Imágenes
+    (((0, b'\x89PNG\r\n\x1a\n'),), 'images', False),
+    (((0, b'\xff\xd8\xff'),), 'images', False),
+    (((0, b'GIF87a'),), 'images', False),
+    (((0, b'GIF89a'),), 'images', False),
+    (((0, b'RIFF'), (8, b'WEBP')), 'images', False),
+    (((0, b'II*\x00'),), 'images', False),
+    (((0, b'MM\x00*'),), 'images', False),
+    (((4, b'ftypheic'),), 'images', False),
+    (((4, b'ftypavif'),), 'images', False),
+    (((0, b'BM'),), 'images', True),
+    (((0, b'\x00\x00\x01\x00'),), 'images', True),
+    # Música (antes que vídeo: ftypM4A es más específico que ftyp)
+    (((4, b'ftypM4A'),), 'music', False),
+    (((0, b'ID3'),), 'music', False),
+    (((0, b'fLaC'),), 'music', False),
+    (((0, b'OggS'),), 'music', False),
+    (((0, b'RIFF'), (8, b'WAVE')), 'music', False),
+    (((0, b'MThd'),), 'music', False),
+    (((0, b'\xff\xfb'),), 'music', True),
+    (((0, b'\xff\xf3'),), 'music', True),
+    (((0, b'\xff\xf1'),), 'music', True),
+    # Vídeos
+    (((4, b'ftyp'),), 'videos', False),
+    (((0, b'\x1a\x45\xdf\xa3'),), 'videos', False),
+    (((0, b'RIFF'), (8, b'AVI ')), 'videos', False),
+    (((0, b'FLV\x01'),), 'videos', False),
+    (((0, b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'),), 'videos', False),
+    (((0, b'\x00\x00\x01\xba'),), 'videos', False),
+    # Programas
+    (((0, b'PK\x03\x04'), (30, b'META-INF/')), 'programs', False),
+    (((0, b'\x7fELF'),), 'programs', False),
+    (((0, b'\xcf\xfa\xed\xfe'),), 'programs', False),
+    (((0, b'\xfe\xed\xfa\xcf'),), 'programs', False),
+    (((0, b'MZ'),), 'programs', True),
+    (((0, b'#!'),), 'programs', True),
+    # Comprimidos
+    (((0, b"7z\xbc\xaf'\x1c"),), 'compressed', False),
+    (((0, b'Rar!\x1a\x07'),), 'compressed', False),
+    (((0, b'\x1f\x8b'),), 'compressed', False),
+    (((0, b'BZh'),), 'compressed', False),
+    (((0, b'\xfd7zXZ\x00'),), 'compressed', False),
+    (((0, b'\x28\xb5\x2f\xfd'),), 'compressed', False),
+    (((257, b'ustar'),), 'compressed', False),
+    (((0, b'PK\x03\x04'),), 'compressed', True),
+]
+
+class SignatureTable:
+    """Firmas agrupadas por (desplazamiento, dos primeros bytes).
+
+    Probar un archivo cuesta una consulta de diccionario por cada
+    desplazamiento distinto (tres) y solo compara las pocas firmas que
+    comparten prefijo, en el orden de SIGNATURES.
+    """
+
+    KEY_SIZE = 2
+
+    def __init__(self, signatures=SIGNATURES):
+        self._table: Dict[Tuple[int, bytes], List[Tuple[Sequence[Tuple[int, bytes]], str, bool, int]]] = {}
+        for order, (parts, category, weak) in enumerate(signatures):
+            offset, magic = parts[0]
+            key = (offset, magic[:self.KEY_SIZE])
+            self._table.setdefault(key, []).append((parts, category, weak, order))
+        self._offsets = sorted({offset for offset, _ in self._table})
+
+    def match(self, head: bytes) -> Optional[Tuple[str, bool]]:
+        """Devuelve (categoría, débil) de la primera firma que coincide."""
+        best = None
+        for offset in self._offsets:
+            candidates = self._table.get((offset, head[offset:offset + self.KEY_SIZE]))
+            if not candidates:
+                continue
+            for parts, category, weak, order in candidates:
+                if best is not None and order > best[2]:
+                    break
+                if all(head.startswith(magic, at) for at, magic in parts):
+                    best = (category, weak, order)
+                    break
+        return (best[0], best[1]) if best else None
+
+class ContentSniffer:
+    """Refina la categoría por extensión leyendo la cabecera del archivo una sola vez.
+
+    En modo 'unknown' solo se miran los archivos que irían a 'others'; en
+    modo 'all' el contenido también corrige extensiones equivocadas salvo
+    que la firma sea débil. El resultado se guarda por (inodo, tamaño,
+    fecha), así reescanear la misma carpeta no vuelve a abrir nada.
+    """
+
+    def __init__(self, mode: str = 'unknown', cache_size: int = DEFAULT_CACHE_SIZE):
+        if mode not in SNIFF_MODES:
+            raise ValueError(f"Modo de detección desconocido: {mode}")
+        self.mode = mode
+        self.cache_size = cache_size
+        self.table = SignatureTable()
+        self._lock = threading.Lock()
+        self._cache: 'OrderedDict[tuple, Optional[Tuple[str, bool]]]' = OrderedDict()
+
+    def sniff(self, path: str, size: int, mtime: float, inode: int = 0) -> Optional[Tuple[str, bool]]:
+        """(categoría, débil) según el contenido, o None si no se reconoce."""
+        key = (inode or path, size, mtime)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(HEAD_SIZE)
+        except OSError:
+            return None
+        result = self.table.match(head)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def refine(self, entry: Entry, category: str) -> str:
+        """Categoría final de entry dada la categoría por extensión."""
+        if self.mode == 'unknown' and category != DEFAULT_CATEGORY:
+            return category
+        result = self.sniff(entry.path, entry.size, entry.mtime, entry.inode)
+        if result is None:
+            return category
+        sniffed, weak = result
+        if sniffed not in EXTENSIONS or (weak and category != DEFAULT_CATEGORY):
+            return category
+        return sniffed
+
+def classify(entry: Entry, sniffer: Optional[ContentSniffer] = None) -> str:
+    """Categoría de un archivo: por extensión y, si hay sniffer, por contenido."""
+    category = get_category(entry.name)
+    if sniffer is None or not entry.is_file or not entry.size:
+        return category
+    return sniffer.refine(entry, category)
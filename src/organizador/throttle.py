@@ -0,0 +1,204 @@
+"""Límites de ancho de banda, de operaciones y prioridad baja para organizar en segundo plano."""
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from organizador.metrics import metrics
+
+# Bloque mínimo de copia con límite de ancho de banda, y fracción de segundo
+# que cubre cada bloque: pedidos pequeños reparten la espera de forma pareja
+MIN_CHUNK = 64 * 1024
+CHUNKS_PER_SECOND = 10
+# Límites más bajos que se aceptan: por debajo los movimientos quedan parados en la práctica
+MIN_BANDWIDTH = 64 * 1024
+MIN_OPERATIONS = 0.1
+# Espera máxima de una sola vez: se vuelve a mirar el límite y si se está cerrando
+MAX_WAIT = 1.0
+
+class TokenBucket:
+    """Cubo de fichas: `rate` unidades por segundo con ráfagas de hasta `burst`.
+
+    take(n) descuenta al momento y, si el saldo queda en negativo, espera
+    a que se repongan las fichas que debe; así un pedido mayor que la
+    ráfaga también respeta el promedio y varios hilos esperan por orden de
+    llegada. La espera es sobre una condición, en tramos de hasta MAX_WAIT:
+    configure() y close() despiertan a todos y cada hilo vuelve a calcular
+    con el límite nuevo. Sin rate no hay límite y take() ni siquiera toma
+    el lock.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._cond = threading.Condition()
+        self.rate: Optional[float] = None
+        self.burst = 0.0
+        self._tokens = 0.0
+        # Fichas repuestas desde el inicio: cada hilo espera a que cubran su deuda
+        self._credited = 0.0
+        self._stamp = time.monotonic()
+        self._closed = False
+        self.configure(rate, burst)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate is not None:
+            added = min(self.burst - self._tokens, (now - self._stamp) * self.rate)
+            if added > 0:
+                self._tokens += added
+                self._credited += added
+        self._stamp = now
+
+    def configure(self, rate: Optional[float], burst: Optional[float] = None) -> None:
+        """Cambia el límite en caliente; la ráfaga por defecto es un segundo de rate.
+
+        Se conserva el saldo actual (recortado a la ráfaga nueva): volver a
+        configurar no regala fichas.
+        """
+        with self._cond:
+            self._refill()
+            previous = self.rate
+            self.rate = float(rate) if rate and rate > 0 else None
+            self.burst = float(burst) if burst else (self.rate or 0.0)
+            self._tokens = self.burst if previous is None else min(self._tokens, self.burst)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Libera a los hilos que esperan y deja de limitar (al detener el proceso)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def take(self, amount: float = 1) -> float:
+        """Consume amount fichas esperando si hace falta; devuelve los segundos esperados."""
+        if self.rate is None or self._closed:
+            return 0.0
+        with self._cond:
+            if self.rate is None:
+                return 0.0
+            self._refill()
+            self._tokens -= amount
+            owed = -self._tokens
+            if owed <= 0:
+                return 0.0
+            start = time.monotonic()
+            mark = self._credited
+            while owed > self._credited - mark and self.rate is not None and not self._closed:
+                self._cond.wait(min(MAX_WAIT, (owed - (self._credited - mark)) / self.rate))
+                self._refill()
+            return time.monotonic() - start
+
+# Constantes de ioprio_set(2) en Linux
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_CLASS_NONE = 0
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_SYSCALLS = {'x86_64': 251, 'amd64': 251, 'i386': 289, 'i686': 289,
+                    'aarch64': 30, 'arm64': 30, 'armv7l': 314, 'ppc64le': 273}
+# Modo de fondo de SetThreadPriority en Windows: CPU y E/S a la vez
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_THREAD_MODE_BACKGROUND_END = 0x00020000
+# Cuánto se sube el nice del hilo en POSIX
+BACKGROUND_NICE = 10
+
+def _linux_ioprio(ioprio_class: int) -> bool:
+    number = _IOPRIO_SYSCALLS.get(platform.machine().lower())
+    if number is None:
+        return False
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    # who=0 es el hilo que llama: la prioridad de E/S en Linux es por hilo
+    return libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, ioprio_class << _IOPRIO_CLASS_SHIFT) == 0
+
+def set_background_priority(enabled: bool) -> bool:
+    """Baja (o restaura) la prioridad de CPU y de E/S del hilo actual.
+
+    Windows usa el modo de fondo del hilo; Linux sube el nice del hilo y
+    pasa su E/S a la clase idle. Devolver la prioridad de CPU a la normal
+    puede necesitar privilegios en POSIX; en ese caso solo se restaura la
+    E/S. Devuelve False si no se pudo aplicar nada.
+    """
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mode = _THREAD_MODE_BACKGROUND_BEGIN if enabled else _THREAD_MODE_BACKGROUND_END
+        return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), mode))
+    if not sys.platform.startswith('linux'):
+        return False
+    applied = _linux_ioprio(_IOPRIO_CLASS_IDLE if enabled else _IOPRIO_CLASS_NONE)
+    tid = threading.get_native_id()
+    try:
+        current = os.getpriority(os.PRIO_PROCESS, tid)
+        target = current + BACKGROUND_NICE if enabled else current - BACKGROUND_NICE
+        os.setpriority(os.PRIO_PROCESS, tid, min(target, 19))
+        applied = True
+    except OSError:
+        pass
+    return applied
+
+class Throttle:
+    """Límites compartidos por todos los movimientos del proceso, ajustables en caliente.
+
+    - bandwidth: bytes por segundo de las copias entre unidades y del
+      archivado (los renombrados en la misma unidad no mueven datos y no
+      cuentan).
+    - operations: movimientos por segundo, de cualquier tipo.
+    - background: prioridad de CPU y E/S baja en los hilos que mueven.
+      Se aplica en el propio hilo al empezar su siguiente movimiento, así
+      que un cambio en caliente llega a todos los trabajadores sin
+      reiniciarlos.
+
+    Sin configurar no limita nada y cuesta una comparación por llamada.
+    """
+
+    def __init__(self):
+        self.bandwidth = TokenBucket()
+        self.operations = TokenBucket()
+        self.background = False
+        self._local = threading.local()
+
+    def configure(self, bandwidth: Optional[float] = None, operations: Optional[float] = None,
+                  background: bool = False) -> Dict[str, object]:
+        """Fija los tres límites (None/0 = sin límite) y devuelve la configuración resultante."""
+        self.bandwidth.configure(bandwidth)
+        self.operations.configure(operations)
+        self.background = bool(background)
+        return self.settings()
+
+    def close(self) -> None:
+        """Deja de limitar y despierta a los hilos que esperan, para que el cierre no se bloquee."""
+        self.bandwidth.close()
+        self.operations.close()
+
+    def settings(self) -> Dict[str, object]:
+        return {
+            'bandwidth': self.bandwidth.rate,
+            'operations': self.operations.rate,
+            'background': self.background,
+        }
+
+    def operation(self) -> None:
+        """Antes de cada movimiento: prioridad del hilo al día y espera del límite de operaciones."""
+        if getattr(self._local, 'background', False) != self.background:
+            self._local.background = self.background
+            set_background_priority(self.background)
+        waited = self.operations.take(1)
+        if waited:
+            metrics.observe('throttle.operations', waited)
+
+    def chunk_size(self, default: int) -> int:
+        """Tamaño de bloque de copia: con límite, una fracción de segundo de ancho de banda."""
+        rate = self.bandwidth.rate
+        if rate is None:
+            return default
+        return max(MIN_CHUNK, min(default, int(rate / CHUNKS_PER_SECOND)))
+
+    def transferred(self, size: int) -> None:
+        """Tras copiar size bytes: espera lo que haga falta para no pasar del ancho de banda."""
+        waited = self.bandwidth.take(size)
+        if waited:
+            metrics.observe('throttle.bandwidth', waited)
+
+# Límites compartidos por todo el proceso; sin configurar no limitan nada
+throttle = Throttle()
@@ -0,0 +1,86 @@
+"""Planificador de plazos con un montículo: solo despierta cuando vence el próximo."""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Tuple
+
+class DeadlineScheduler:
+    """Temporizadores por clave sobre un heap, con rearme y cancelación en O(log n).
+
+    Volver a programar una clave no busca la entrada anterior en el heap:
+    se guarda el número de secuencia vigente y las entradas obsoletas se
+    descartan al salir. El hilo duerme hasta el plazo más cercano, así que
+    con cientos de descargas en curso no consume CPU mientras nada vence.
+    """
+
+    def __init__(self, callback: Callable[[Hashable], None]):
+        self._callback = callback
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._current: Dict[Hashable, int] = {}
+        self._seq = itertools.count()
+        self._running = False
+        self._thread = None
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        """Programa (o reprograma) la clave para dentro de `delay` segundos."""
+        with self._cond:
+            seq = next(self._seq)
+            self._current[key] = seq
+            deadline = time.monotonic() + delay
+            heapq.heappush(self._heap, (deadline, seq, key))
+            # Solo hace falta despertar al hilo si este es el nuevo primer plazo
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+
+    def cancel(self, key: Hashable) -> None:
+        with self._cond:
+            self._current.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._cond:
+            return key in self._current
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._current)
+
+    def _next_due(self):
+        with self._cond:
+            while self._running:
+                # Descartar entradas reprogramadas o canceladas
+                while self._heap and self._current.get(self._heap[0][2]) != self._heap[0][1]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                deadline, _, key = self._heap[0]
+                wait = deadline - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                del self._current[key]
+                return key, True
+            return None, False
+
+    def _run(self) -> None:
+        while True:
+            key, due = self._next_due()
+            if not due:
+                return
+            self._callback(key)
+
+    def start(self) -> None:
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='deadline-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
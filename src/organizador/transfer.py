@@ -0,0 +1,206 @@
+"""Motor de movimiento: renombrado atómico en la misma unidad y copia reanudable entre unidades."""
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import time
+from typing import Callable, Optional
+
+from organizador.metrics import metrics
+from organizador.throttle import throttle
+
+# Bloque de cada llamada de copia sin pasar por espacio de usuario
+COPY_CHUNK = 64 * 1024 * 1024
+# Búfer del camino de respaldo con read/write
+BUFFER_SIZE = 8 * 1024 * 1024
+PARTIAL_SUFFIX = '.part'
+CLAIM_SUFFIX = '.claim'
+
+ProgressCallback = Callable[[int, int], None]
+
+def same_device(src: str, dest_folder: str) -> bool:
+    """True si src y dest_folder están en el mismo sistema de archivos."""
+    try:
+        return os.stat(src).st_dev == os.stat(dest_folder).st_dev
+    except OSError:
+        return False
+
+def _source_key(src: str, st: os.stat_result) -> str:
+    """Identifica el origen (ruta, tamaño, mtime) para reconocer su copia parcial."""
+    ident = f"{os.path.abspath(src)}\0{st.st_size}\0{st.st_mtime_ns}".encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(ident, digest_size=8).hexdigest()
+
+def _write_claim(claim_path: str, dest_path: str) -> None:
+    with open(claim_path, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(dest_path))
+
+def _resume_target(partial: str, claim_path: str, dest_path: str) -> str:
+    """Destino final: el nombre reservado por un intento interrumpido si sigue vacío, o dest_path.
+
+    La copia parcial lleva un nombre fijo por clave ('.<clave>.part'), así
+    que se busca con un solo stat; el nombre que reservó el intento
+    anterior se guarda al lado en '.<clave>.claim'.
+    """
+    try:
+        os.lstat(partial)
+    except FileNotFoundError:
+        _write_claim(claim_path, dest_path)
+        return dest_path
+    try:
+        with open(claim_path, 'r', encoding='utf-8') as f:
+            previous = os.path.join(os.path.dirname(dest_path), os.path.basename(f.read()))
+        if previous != dest_path and os.path.getsize(previous) == 0:
+            return previous
+    except (OSError, ValueError):
+        pass
+    _write_claim(claim_path, dest_path)
+    return dest_path
+
+def _discard(partial: str, claim_path: str, final_path: str, dest_path: str) -> None:
+    """El origen ya no existe: nadie reanudará la copia, se borra lo que dejó."""
+    if os.path.isdir(partial) and not os.path.islink(partial):
+        shutil.rmtree(partial, ignore_errors=True)
+    for path in (partial, claim_path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    try:
+        # El marcador vacío del intento anterior; el de dest_path lo libera NameIndex
+        if final_path != dest_path and os.path.getsize(final_path) == 0:
+            os.unlink(final_path)
+    except OSError:
+        pass
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int,
+                progress: Optional[ProgressCallback]) -> None:
+    """Copia src_fd[offset:size] al final de dst_fd por el camino más barato disponible."""
+    use_range = hasattr(os, 'copy_file_range')
+    use_sendfile = hasattr(os, 'sendfile')
+    while offset < size:
+        count = min(throttle.chunk_size(COPY_CHUNK), size - offset)
+        copied = 0
+        if use_range:
+            try:
+                copied = os.copy_file_range(src_fd, dst_fd, count, offset)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                    raise
+                use_range = False
+                continue
+        elif use_sendfile:
+            try:
+                copied = os.sendfile(dst_fd, src_fd, offset, count)
+            except OSError as e:
+                if e.errno not in (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+                use_sendfile = False
+                continue
+        else:
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            data = os.read(src_fd, min(count, BUFFER_SIZE))
+            copied = os.write(dst_fd, data) if data else 0
+        if not copied:
+            raise OSError(errno.EIO, f"Copia truncada en el byte {offset} de {size}")
+        offset += copied
+        throttle.transferred(copied)
+        if progress:
+            progress(offset, size)
+
+def copy_resumable(src: str, partial_path: str,
+                   progress: Optional[ProgressCallback] = None) -> None:
+    """Copia src en partial_path continuando desde los bytes que ya tenga."""
+    st = os.stat(src)
+    # Sin O_APPEND: copy_file_range lo rechaza; se escribe desde la posición actual
+    dst_fd = os.open(partial_path, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        with open(src, 'rb') as fsrc:
+            offset = os.fstat(dst_fd).st_size
+            if offset > st.st_size:
+                # No corresponde al origen actual: se empieza de cero
+                os.ftruncate(dst_fd, 0)
+                offset = 0
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            _copy_range(fsrc.fileno(), dst_fd, offset, st.st_size, progress)
+        os.fsync(dst_fd)
+    finally:
+        os.close(dst_fd)
+    shutil.copystat(src, partial_path)
+
+def _copy_tree(src: str, dest: str) -> None:
+    """Copia una carpeta omitiendo los archivos que ya estén completos en dest."""
+    def copy_file(s: str, d: str) -> str:
+        try:
+            ss, ds = os.stat(s), os.stat(d)
+            if ss.st_size == ds.st_size and int(ss.st_mtime) == int(ds.st_mtime):
+                return d
+        except OSError:
+            pass
+        copy_resumable(s, d)
+        return d
+    shutil.copytree(src, dest, symlinks=True, copy_function=copy_file, dirs_exist_ok=True)
+
+def _move_across(src: str, dest_path: str, progress: Optional[ProgressCallback]) -> str:
+    dest_folder = os.path.dirname(dest_path)
+    st = os.lstat(src)
+    key = _source_key(src, st)
+    partial = os.path.join(dest_folder, f".{key}{PARTIAL_SUFFIX}")
+    claim_path = os.path.join(dest_folder, f".{key}{CLAIM_SUFFIX}")
+    # Reanudación: se vuelve al nombre reservado por el intento interrumpido
+    final_path = _resume_target(partial, claim_path, dest_path)
+
+    try:
+        if stat.S_ISDIR(st.st_mode):
+            _copy_tree(src, partial)
+            # Una carpeta no puede reemplazar al marcador de archivo
+            os.unlink(final_path)
+            os.rename(partial, final_path)
+        else:
+            copy_resumable(src, partial, progress)
+            # El destino sólo aparece completo: la copia a medias nunca lleva el nombre final
+            os.replace(partial, final_path)
+    except OSError:
+        if not os.path.lexists(src):
+            _discard(partial, claim_path, final_path, dest_path)
+        raise
+    try:
+        os.unlink(claim_path)
+    except OSError:
+        pass
+    if stat.S_ISDIR(st.st_mode):
+        shutil.rmtree(src)
+    else:
+        os.unlink(src)
+    return final_path
+
+def move_file(src: str, dest_path: str,
+              progress: Optional[ProgressCallback] = None) -> str:
+    """Mueve src sobre el marcador reservado en dest_path y devuelve la ruta final.
+
+    En la misma unidad es un único os.replace. Entre unidades se copia con
+    copy_file_range/sendfile a '.<clave>.part', se sincroniza y se
+    renombra atómicamente; si el proceso muere a mitad, el siguiente intento
+    con el mismo origen continúa desde el último byte escrito. La ruta final
+    puede diferir de dest_path cuando se reanuda una copia anterior.
+    Respeta los límites de organizador.throttle (operaciones por segundo y,
+    en las copias, ancho de banda).
+    """
+    throttle.operation()
+    start = time.perf_counter()
+    try:
+        os.replace(src, dest_path)
+        metrics.observe('move.rename', time.perf_counter() - start)
+        return dest_path
+    except OSError:
+        if not os.path.isdir(src) and same_device(src, os.path.dirname(dest_path)):
+            raise
+    if os.path.isdir(src) and same_device(src, os.path.dirname(dest_path)):
+        # Una carpeta no puede reemplazar al marcador de archivo: se quita y se renombra
+        os.unlink(dest_path)
+        os.rename(src, dest_path)
+        metrics.observe('move.rename', time.perf_counter() - start)
+        return dest_path
+    final_path = _move_across(src, dest_path, progress)
+    metrics.observe('move.copy', time.perf_counter() - start)
+    return final_path
@@ -0,0 +1,72 @@
+"""Recorrido recursivo en paralelo y limpieza de carpetas vacías para el modo recursivo."""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Collection, Iterable, Iterator, List, Set
+
+from organizador.executor import DEFAULT_WORKERS
+from organizador.scanner import Entry, scan_directory
+
+DEFAULT_MAX_DEPTH = 8
+
+def folder_ids(paths: Iterable[str]) -> Set[int]:
+    """Inodos de las carpetas indicadas que existen (p. ej. las de categorías)."""
+    ids = set()
+    for path in paths:
+        try:
+            ids.add(os.stat(path).st_ino)
+        except OSError:
+            pass
+    return ids
+
+def _scan(path: str) -> List[Entry]:
+    try:
+        return list(scan_directory(path))
+    except OSError:
+        # Borrada o sin permisos mientras se recorría
+        return []
+
+def walk_tree(root: str, max_depth: int = DEFAULT_MAX_DEPTH, workers: int = DEFAULT_WORKERS,
+              skip: Collection[int] = ()) -> Iterator[Entry]:
+    """Recorre root hasta max_depth niveles listando varias carpetas a la vez.
+
+    Devuelve archivos y carpetas en el orden en que terminan los listados.
+    Las carpetas cuyo inodo está en skip no se devuelven ni se recorren, así
+    una carpeta 'music' dentro de un zip extraído se trata como cualquier
+    otra y la carpeta de categoría real nunca se vuelve a clasificar. Los
+    enlaces simbólicos a carpetas no se siguen.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='walk') as pool:
+        pending = {pool.submit(_scan, root): 0}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                for entry in future.result():
+                    if entry.is_dir:
+                        if entry.inode in skip:
+                            continue
+                        if depth < max_depth and not os.path.islink(entry.path):
+                            pending[pool.submit(_scan, entry.path)] = depth + 1
+                    yield entry
+
+def prune_empty_dirs(paths: Iterable[str], root: str) -> int:
+    """Borra las carpetas vacías entre cada ruta y root, de la más profunda a la menos.
+
+    Solo se prueban las carpetas de las que salió algo; rmdir falla sin
+    efecto en las que no están vacías. Devuelve cuántas se borraron.
+    """
+    root = os.path.abspath(root)
+    candidates: Set[str] = set()
+    for path in paths:
+        folder = os.path.dirname(os.path.abspath(path))
+        while folder != root and folder.startswith(root + os.sep) and folder not in candidates:
+            candidates.add(folder)
+            folder = os.path.dirname(folder)
+    removed = 0
+    for folder in sorted(candidates, key=len, reverse=True):
+        try:
+            os.rmdir(folder)
+            removed += 1
+        except OSError:
+            pass
+    return removed
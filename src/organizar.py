@@ -1,22 +1,45 @@
+import argparse
 import os
-import shutil
-import winreg
-from typing import Tuple, Dict, List
- 
-# Constantes
-EXTENSIONS: Dict[str, List[str]] = {
-    'videos': ['.avi', '.flv', '.m4v', '.mkv', '.mov', '.mp4', '.wmv', '.webm', '.3gp'],
-    'documents': ['.csv', '.doc', '.docx', '.odt', '.pdf', '.ppt', '.pptx', '.txt', '.xlsx'],
-    'music': ['.aac', '.flac', '.m4a', '.midi', '.mp3', '.ogg', '.wav', '.wma'],
-    'programs': ['.app', '.bat', '.cmd', '.dll', '.exe', '.jar', '.msi', '.py'],
-    'compressed': ['.7z', '.bz2', '.gz', '.iso', '.rar', '.tar', '.xz', '.zip'],
-    'images': ['.bmp', '.gif', '.ico', '.jpeg', '.jpg', '.png', '.svg', '.tiff', '.webp'],
-    'others': []
-}
+from typing import Iterable, List, Optional, Tuple
+
+from organizador.archive import COMPRESSIONS, compact_folder, extract_file, find_archived
+from organizador.catalog import open_catalog
+from organizador.categories import EXTENSIONS
+from organizador.dedup import DEDUP_MODES, Deduplicator
+from organizador.executor import DEFAULT_WORKERS, MoveExecutor
+from organizador.icons import IconProvisioner
+from organizador.journal import open_journal, read_journal, select_moves, undo_moves
+from organizador.naming import NameIndex
+from organizador.paths import find_downloads_folder
+from organizador.plan import DONE, Planner, PlannedMove, apply_plan, read_plan, verify_plan, write_plan
+from organizador.rules import RuleError, load_rules, parse_size
+from organizador.scanner import Entry, scan_directory
+from organizador.snapshot import ScanSnapshot
+from organizador.sniffing import SNIFF_MODES, ContentSniffer, classify
+from organizador.throttle import MIN_BANDWIDTH, MIN_OPERATIONS, set_background_priority, throttle
+from organizador.tree import DEFAULT_MAX_DEPTH, folder_ids, prune_empty_dirs, walk_tree
 
 CONFIG = { 
     'enable_icons': True,
-    'move_folders': True
+    'move_folders': True,
+    'workers': DEFAULT_WORKERS,
+    # None, 'delete', 'link' o 'skip' para descargas repetidas
+    'dedup': None,
+    # Catálogo SQLite de movimientos en la carpeta de datos del usuario
+    'catalog': True,
+    # None, 'unknown' (solo lo que iría a 'others') o 'all': clasificar también por contenido
+    'sniff': None,
+    # Recorrer también las subcarpetas (p. ej. zips extraídos) en lugar de moverlas enteras
+    'recursive': False,
+    'max_depth': DEFAULT_MAX_DEPTH,
+    # Archivo de reglas de destino (JSON o TOML); None usa rules.json en la carpeta de datos
+    'rules': None,
+    # Diario de movimientos para poder deshacer (--undo)
+    'journal': True,
+    # Recordar el último listado de descargas para no repetirlo si la carpeta no cambió
+    'snapshot': True,
+    # Compresión de los zips de --archive ('lzma', 'deflate' o 'store')
+    'archive_compression': 'lzma'
 }
 
 COLORS = {
@@ -27,123 +50,354 @@ COLORS = {
     'reset': '\033[0m'
 }
 
-def print_colored(message: str, color: str) -> None:
-    print(f"{COLORS.get(color, '')}{message}{COLORS['reset']}")
+# Carpetas de destino que ya se sabe que existen
+prepared_folders = set()
 
-def find_downloads_folder() -> str:
-    """Encuentra la carpeta de descargas del usuario"""
-    try:
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders") as key:
-            downloads_path = winreg.QueryValueEx(key, "{374DE290-123F-4565-9164-39C4925E467B}")[0]
-            if os.path.exists(downloads_path):
-                return downloads_path
-    except Exception:
-        pass
-    
-    # Fallback a rutas comunes
-    user_profile = os.environ.get('USERPROFILE', '')
-    for folder in ['Downloads', 'Descargas']:
-        path = os.path.join(user_profile, folder)
-        if os.path.exists(path):
-            return path
-    return os.path.join(user_profile, 'Downloads')
-
-def get_category(filename: str) -> str:
-    """Determina la categoría de un archivo por su extensión"""
-    ext = os.path.splitext(filename.lower())[1]
-    return next((cat for cat, exts in EXTENSIONS.items() if ext in exts), 'others')
-
-def setup_folder_icon(folder_path: str, category: str) -> bool:
-    """Configura el ícono de una carpeta"""
-    if not CONFIG['enable_icons']:
-        return False
+# Nombres ocupados en cada carpeta de destino
+name_index = NameIndex()
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    icon_path = os.path.join(script_dir, "icons", f"{category}.ico")
-    ini_path = os.path.join(folder_path, "desktop.ini")
+# Deduplicador por contenido, activo solo si CONFIG['dedup'] tiene un modo
+deduplicator = None
 
-    if not os.path.exists(icon_path):
-        return False
+# Catálogo persistente; se abre en main()
+catalog = None
 
-    try:
-        os.system(f'attrib +s "{folder_path}"')
-        with open(ini_path, 'w') as f:
-            f.write(f"[.ShellClassInfo]\nIconFile={icon_path}\nIconIndex=0\nConfirmFileOp=0\n")
-        os.system(f'attrib +s +h "{ini_path}"')
-        return True
-    except Exception:
-        return False
+# Clasificador por contenido, activo solo si CONFIG['sniff'] tiene un modo
+sniffer = None
+
+# Reglas de destino compiladas; se cargan en main()
+rules = None
+
+# Diario de movimientos; se abre en main()
+journal = None
 
-def move_item(src: str, dest_folder: str) -> bool:
+# Instantánea del último escaneo (solo sin --recursive); se crea en main()
+snapshot = None
+
+# Íconos de las carpetas de categorías, aplicados solo cuando faltan
+icons = IconProvisioner(os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons"))
+
+def print_colored(message: str, color: str) -> None:
+    print(f"{COLORS.get(color, '')}{message}{COLORS['reset']}")
+
+def move_item(src: str, dest_folder: str, dest_name: Optional[str] = None) -> bool:
     """Mueve un archivo o carpeta manejando duplicados"""
-    if not os.path.exists(dest_folder):
-        os.makedirs(dest_folder)
+    if dest_folder not in prepared_folders:
+        os.makedirs(dest_folder, exist_ok=True)
+        prepared_folders.add(dest_folder)
 
     name = os.path.basename(src)
-    dest_path = os.path.join(dest_folder, name)
-
-    # Manejo de duplicados
-    if os.path.exists(dest_path):
-        base, ext = os.path.splitext(name)
-        counter = 1
-        while os.path.exists(dest_path):
-            dest_path = os.path.join(dest_folder, f"{base}_{counter}{ext}")
-            counter += 1
+    category = os.path.basename(dest_folder)
 
     try:
-        shutil.move(src, dest_path)
+        # Descarga repetida: mismo contenido que un archivo ya organizado
+        if deduplicator is not None:
+            st = os.stat(src)
+            duplicate = deduplicator.find_duplicate(src, dest_folder)
+            if duplicate and deduplicator.resolve(src, duplicate, name_index):
+                print_colored(f"♻️ Duplicado ({deduplicator.mode}): {name} = {os.path.basename(duplicate)}", 'info')
+                if catalog is not None:
+                    catalog.record(src, duplicate, st.st_size, st.st_mtime, category, action=deduplicator.mode)
+                return True
+
+        # Manejo de duplicados: nombre libre reservado de forma atómica
+        dest_path = name_index.move(src, dest_folder, dest_name)
+        if journal is not None:
+            journal.record(src, dest_path)
+        if deduplicator is not None:
+            deduplicator.register(dest_path, src)
+        if catalog is not None:
+            catalog.record_move(src, dest_path, category, deduplicator and deduplicator.known_hash(dest_path))
         print_colored(f"✅ Movido: {name} -> {os.path.basename(dest_folder)}", 'success')
         return True
     except Exception as e:
         print_colored(f"❌ Error al mover {name}: {e}", 'error')
         return False
 
-def organize_downloads() -> Tuple[int, int]:
-    """Organiza los archivos de la carpeta de descargas"""
-    downloads = find_downloads_folder()
-    print_colored(f"📂 Organizando: {downloads}", 'info')
-    
-    success = failed = 0
-
-    # Crear carpetas de categorías
+def prepare_category_folders(downloads: str) -> None:
+    """Crea las carpetas de categorías y les pone su ícono."""
+    folders = {}
     for category in EXTENSIONS:
         category_path = os.path.join(downloads, category)
         os.makedirs(category_path, exist_ok=True)
-        setup_folder_icon(category_path, category)
-
-    # Procesar archivos y carpetas
-    for item in os.listdir(downloads):
-        item_path = os.path.join(downloads, item)
-        
-        # Ignorar carpetas de categorías
-        if item in EXTENSIONS:
+        prepared_folders.add(category_path)
+        folders[category_path] = category
+    if CONFIG['enable_icons']:
+        icons.ensure(folders)
+
+def collect_moves(downloads: str) -> List[Tuple[Entry, str, str]]:
+    """Recorre descargas y decide (elemento, carpeta_destino, categoría) sin mover nada."""
+    moves = []
+    managed = [os.path.join(downloads, category) for category in EXTENSIONS]
+    if rules is not None:
+        managed += rules.folders(downloads)
+    category_ids = folder_ids(managed)
+    entries = None
+    if CONFIG['recursive']:
+        entries = walk_tree(downloads, CONFIG['max_depth'], CONFIG['workers'], skip=category_ids)
+    elif snapshot is not None:
+        # Sin cambios desde la última ejecución: solo se revisa lo que quedó
+        entries = snapshot.entries(downloads)
+    if entries is None:
+        entries = scan_directory(downloads)
+
+    # Procesar archivos y carpetas (un solo stat por elemento)
+    for entry in entries:
+        # Ignorar carpetas de categorías (por inodo: una 'music' anidada no lo es)
+        if entry.is_dir and entry.inode in category_ids:
             continue
 
-        if os.path.isfile(item_path):
-            category = get_category(item)
+        if entry.is_file:
+            # Ya procesado en una ejecución anterior (mismo tamaño y fecha)
+            if catalog is not None and catalog.is_processed(entry.path, entry.size, entry.mtime):
+                continue
+            category = classify(entry, sniffer)
+            dest = (rules and rules.route(entry, downloads, category)) or os.path.join(downloads, category)
+        elif entry.is_dir and CONFIG['move_folders'] and not CONFIG['recursive']:
+            category = 'others'
             dest = os.path.join(downloads, category)
-        elif os.path.isdir(item_path) and CONFIG['move_folders']:
-            dest = os.path.join(downloads, 'others')
         else:
             continue
 
-        if move_item(item_path, dest):
-            success += 1
-        else:
-            failed += 1
+        moves.append((entry, dest, category))
+    return moves
+
+def finish_run(downloads: str, sources: Iterable[str]) -> None:
+    """Limpieza común al terminar de mover: carpetas vacías, caché y catálogo."""
+    if CONFIG['recursive']:
+        prune_empty_dirs(sources, downloads)
+    if deduplicator is not None:
+        deduplicator.cache.save()
+    if catalog is not None:
+        catalog.flush()
+    if journal is not None:
+        journal.flush()
+
+def organize_downloads() -> Tuple[int, int]:
+    """Organiza los archivos de la carpeta de descargas"""
+    downloads = find_downloads_folder()
+    print_colored(f"📂 Organizando: {downloads}", 'info')
+    prepare_category_folders(downloads)
+    moves = [(entry.path, dest) for entry, dest, _ in collect_moves(downloads)]
+    if journal is not None:
+        journal.start_run(downloads)
+
+    # Mover en paralelo; cada categoría conserva su orden
+    with MoveExecutor(move_item, CONFIG['workers']) as executor:
+        result = executor.run(moves)
+
+    finish_run(downloads, (src for src, _ in moves))
+    if snapshot is not None:
+        snapshot.record(downloads)
+    return result
+
+def write_move_plan(plan_path: str) -> int:
+    """Primera fase: escanea, clasifica y resuelve nombres en memoria; solo escribe el plan."""
+    downloads = find_downloads_folder()
+    planner = Planner()
+    for entry, dest, category in collect_moves(downloads):
+        planner.add(entry, dest, category)
+    return write_plan(plan_path, planner.moves, downloads)
 
-    return success, failed
+def apply_move_plan(plan_path: str) -> Tuple[int, int, int]:
+    """Segunda fase: ejecuta (o reanuda) un plan escrito con --plan."""
+    header, moves = read_plan(plan_path)
+    downloads = header['downloads']
+    if journal is not None:
+        journal.start_run(downloads, kind='plan')
+
+    def skip(move: PlannedMove, state: str) -> None:
+        if state != DONE:
+            print_colored(f"⚠️ Omitido ({state}): {os.path.basename(move.src)}", 'warning')
+
+    def move_planned(src: str, dest_path: str) -> bool:
+        return move_item(src, os.path.dirname(dest_path), os.path.basename(dest_path))
+
+    result = apply_plan(moves, move_planned, CONFIG['workers'], on_skip=skip)
+    finish_run(downloads, (move.src for move in moves))
+    return result
+
+def archive_old_files(days: float) -> Tuple[int, int]:
+    """Pasa a zips mensuales los archivos de las categorías llegados hace más de days días."""
+    downloads = find_downloads_folder()
+    files = freed = 0
+    for category in EXTENSIONS:
+        folder = os.path.join(downloads, category)
+        count, size = compact_folder(folder, days, CONFIG['archive_compression'], category,
+                                     arrivals=catalog and catalog.moved_at)
+        if count:
+            print_colored(f"🗜️ {category}: {count} archivos archivados", 'info')
+        files += count
+        freed += size
+    return files, freed
+
+def extract_archived(name: str) -> Optional[str]:
+    """Saca un archivo archivado de vuelta a su carpeta de categoría."""
+    downloads = find_downloads_folder()
+    for category in EXTENSIONS:
+        folder = os.path.join(downloads, category)
+        if find_archived(folder, name) is not None:
+            return extract_file(folder, name, names=name_index)
+    return None
+
+def parse_time(value: str) -> float:
+    """Fecha ISO ('2024-05-01', '2024-05-01T10:30') o segundos desde 1970."""
+    try:
+        return float(value)
+    except ValueError:
+        from datetime import datetime
+        return datetime.fromisoformat(value).timestamp()
+
+def undo_moves_in_range(since: Optional[float] = None, until: Optional[float] = None) -> Tuple[int, int, int]:
+    """Deshace la última ejecución (o lo movido entre since y until) en paralelo.
+
+    Los archivos devueltos quedan retenidos en el catálogo: ni esta
+    herramienta ni el servicio los reorganizan hasta --release.
+    """
+    moves = select_moves(read_journal(journal.path), since, until)
+    print_colored(f"↩️ Deshaciendo {len(moves)} movimientos...", 'info')
+
+    def conflict(move: dict, reason: str) -> None:
+        print_colored(f"⚠️ No se deshace ({reason}): {move['dest']}", 'warning')
+
+    def ready(moves: List[dict]) -> None:
+        if catalog is not None:
+            catalog.hold([(move['src'], move['dest']) for move in moves])
+
+    def failed(move: dict) -> None:
+        if catalog is not None:
+            catalog.hold([(move['src'], move['dest'])], action='move')
+
+    return undo_moves(moves, journal, CONFIG['workers'], on_conflict=conflict, on_ready=ready, on_failed=failed)
+
+def release_undone(path: Optional[str] = None) -> int:
+    """Suelta los archivos retenidos por --undo (todos o el de path) para que vuelvan a organizarse."""
+    if not path:
+        return catalog.release()
+    path = os.path.abspath(path)
+    return catalog.release([(source, dest) for source, dest in catalog.find_by_name(os.path.basename(path))
+                            if source == path])
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Organiza la carpeta de descargas por categorías")
+    parser.add_argument('--workers', type=int, default=CONFIG['workers'],
+                        help=f"hilos para mover archivos en paralelo (por defecto {CONFIG['workers']})")
+    parser.add_argument('--dedup', choices=DEDUP_MODES, default=CONFIG['dedup'],
+                        help="qué hacer con descargas idénticas a un archivo ya organizado")
+    parser.add_argument('--sniff', choices=SNIFF_MODES, default=CONFIG['sniff'],
+                        help="clasificar por contenido los archivos sin extensión conocida ('unknown') o todos ('all')")
+    parser.add_argument('--rules', default=CONFIG['rules'],
+                        help="archivo de reglas de destino (JSON o TOML)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--plan', metavar='ARCHIVO',
+                      help="no mover nada: escribir el plan de movimientos en JSON Lines")
+    mode.add_argument('--verify', metavar='ARCHIVO', help="comprobar un plan contra el disco sin aplicarlo")
+    mode.add_argument('--apply', metavar='ARCHIVO', help="aplicar (o reanudar) un plan")
+    mode.add_argument('--undo', action='store_true',
+                      help="deshacer la última ejecución, o lo movido entre --since y --until")
+    mode.add_argument('--release', nargs='?', const='', metavar='RUTA',
+                      help="volver a organizar los archivos devueltos con --undo (todos, o solo RUTA)")
+    mode.add_argument('--archive', type=float, metavar='DIAS',
+                      help="archivar en zips mensuales los archivos de las categorías llegados hace más de DIAS días")
+    mode.add_argument('--extract', metavar='NOMBRE', help="sacar un archivo archivado a su carpeta de categoría")
+    parser.add_argument('--compression', choices=sorted(COMPRESSIONS), default=CONFIG['archive_compression'],
+                        help="compresión de los zips de --archive")
+    parser.add_argument('--since', type=parse_time, help="con --undo: desde esta fecha (ISO)")
+    parser.add_argument('--until', type=parse_time, help="con --undo: hasta esta fecha (ISO)")
+    parser.add_argument('--recursive', action='store_true', default=CONFIG['recursive'],
+                        help="organizar también los archivos de las subcarpetas y borrar las que queden vacías")
+    parser.add_argument('--max-depth', type=int, default=CONFIG['max_depth'],
+                        help=f"niveles de subcarpetas a recorrer con --recursive (por defecto {CONFIG['max_depth']})")
+    parser.add_argument('--bandwidth', type=parse_size, metavar='BYTES',
+                        help="bytes por segundo de las copias entre unidades (p. ej. 20MB)")
+    parser.add_argument('--max-ops', type=float, metavar='N', help="movimientos por segundo como máximo")
+    parser.add_argument('--background', action='store_true',
+                        help="mover con prioridad baja de CPU y disco")
+    args = parser.parse_args(argv)
+    if args.bandwidth and args.bandwidth < MIN_BANDWIDTH:
+        parser.error(f"--bandwidth debe ser al menos {MIN_BANDWIDTH} bytes por segundo")
+    if args.max_ops and args.max_ops < MIN_OPERATIONS:
+        parser.error(f"--max-ops debe ser al menos {MIN_OPERATIONS}")
+    return args
 
 def main():
     """Función principal"""
+    global deduplicator, catalog, sniffer, rules, journal, snapshot
+    args = parse_args()
+    CONFIG['workers'] = max(1, args.workers)
+    CONFIG['dedup'] = args.dedup
+    CONFIG['sniff'] = args.sniff
+    CONFIG['recursive'] = args.recursive
+    CONFIG['max_depth'] = max(0, args.max_depth)
+    CONFIG['rules'] = args.rules
+    CONFIG['archive_compression'] = args.compression
+    throttle.configure(args.bandwidth, args.max_ops, args.background)
+    try:
+        rules = load_rules(CONFIG['rules'])
+    except (RuleError, OSError) as e:
+        print_colored(f"❌ Error en las reglas: {e}", 'error')
+        return
+    if CONFIG['sniff']:
+        sniffer = ContentSniffer(CONFIG['sniff'])
+    if CONFIG['dedup']:
+        deduplicator = Deduplicator(CONFIG['dedup'])
+    if CONFIG['catalog']:
+        catalog = open_catalog()
+    if CONFIG['journal'] or args.undo:
+        journal = open_journal()
+    if CONFIG['snapshot'] and not CONFIG['recursive']:
+        snapshot = ScanSnapshot()
     try:
-        print_colored("🚀 Iniciando organización...", 'info')
-        success, failed = organize_downloads()
-        print_colored(f"🎉 Completado: {success} elementos organizados", 'success')
+        if args.undo:
+            if journal is None:
+                print_colored("❌ No se pudo abrir el diario de movimientos", 'error')
+                return
+            restored, conflicts, failed = undo_moves_in_range(args.since, args.until)
+            print_colored(f"🎉 Restaurados: {restored}, conflictos: {conflicts}", 'success')
+            if failed > 0:
+                print_colored(f"⚠️ {failed} errores", 'error')
+            return
+        if args.release is not None:
+            if catalog is None:
+                print_colored("❌ No se pudo abrir el catálogo", 'error')
+                return
+            print_colored(f"🔓 Liberados: {release_undone(args.release)}", 'info')
+        if args.archive is not None:
+            if args.background:
+                set_background_priority(True)
+            files, freed = archive_old_files(args.archive)
+            print_colored(f"🎉 Archivados: {files} archivos ({freed / 1e6:.1f} MB)", 'success')
+            return
+        if args.extract:
+            path = extract_archived(args.extract)
+            if path is None:
+                print_colored(f"❌ {args.extract} no está archivado", 'error')
+            else:
+                print_colored(f"📤 Extraído: {path}", 'success')
+            return
+        if args.plan:
+            count = write_move_plan(args.plan)
+            print_colored(f"📝 Plan con {count} movimientos escrito en {args.plan}", 'success')
+            return
+        if args.verify:
+            _, moves = read_plan(args.verify)
+            for state, items in sorted(verify_plan(moves).items()):
+                print_colored(f"{state}: {len(items)}", 'info')
+            return
+        if args.apply:
+            success, skipped, failed = apply_move_plan(args.apply)
+            print_colored(f"🎉 Plan aplicado: {success} movidos, {skipped} omitidos", 'success')
+        else:
+            print_colored("🚀 Iniciando organización...", 'info')
+            success, failed = organize_downloads()
+            print_colored(f"🎉 Completado: {success} elementos organizados", 'success')
         if failed > 0:
             print_colored(f"⚠️ {failed} errores", 'error')
     except Exception as e:
         print_colored(f"❌ Error: {e}", 'error')
+    finally:
+        if journal is not None:
+            journal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+"""Archivado mensual: fecha de llegada, extracción y reconstrucción del índice."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.archive import (INDEX_NAME, archive_dir, compact_folder,  # noqa: E402
+                                 extract_file, find_archived, read_index)
+
+DAY = 86400
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = os.path.join(tempfile.mkdtemp(prefix='organizador-archivo-'), 'documents')
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.folder), True)
+        os.makedirs(self.folder)
+        self.now = time.time()
+
+    def make_file(self, name: str, age_days: float) -> str:
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(name * 10)
+        old = self.now - age_days * DAY
+        os.utime(path, (old, old))
+        return path
+
+    def test_arrival_comes_from_the_catalog(self):
+        # Descargado hoy con fecha del servidor de hace un año: no ha llegado hace 30 días
+        recent = self.make_file('reciente.pdf', 365)
+        # Sin registro se usa la fecha del archivo
+        old = self.make_file('viejo.pdf', 90)
+        moved = {recent: self.now - DAY}
+        files, _ = compact_folder(self.folder, 30, 'deflate', now=self.now, arrivals=moved.get)
+        self.assertEqual(files, 1)
+        self.assertTrue(os.path.exists(recent))
+        self.assertFalse(os.path.exists(old))
+        item = find_archived(self.folder, 'viejo.pdf')
+        self.assertEqual(item.archive, time.strftime('%Y-%m', time.localtime(self.now - 90 * DAY)) + '.zip')
+
+    def test_extract_round_trip(self):
+        path = self.make_file('contrato.pdf', 60)
+        compact_folder(self.folder, 30, 'deflate', now=self.now)
+        self.assertFalse(os.path.exists(path))
+        restored = extract_file(self.folder, 'contrato.pdf')
+        with open(restored) as f:
+            self.assertEqual(f.read(), 'contrato.pdf' * 10)
+
+    def test_missing_index_is_rebuilt_from_the_zips(self):
+        self.make_file('a.pdf', 60)
+        compact_folder(self.folder, 30, 'deflate', now=self.now)
+        os.remove(os.path.join(archive_dir(self.folder), INDEX_NAME))
+        self.assertEqual([item.name for item in read_index(self.folder)], ['a.pdf'])
+        # Lo archivado después se suma a lo recuperado, no lo reemplaza
+        os.remove(os.path.join(archive_dir(self.folder), INDEX_NAME))
+        self.make_file('b.pdf', 60)
+        compact_folder(self.folder, 30, 'deflate', now=self.now)
+        self.assertEqual(sorted(item.name for item in read_index(self.folder)), ['a.pdf', 'b.pdf'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Catálogo: consultas por nombre, hash y categoría, y "ya procesado" según el disco."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.catalog import Catalog  # noqa: E402
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='organizador-catalogo-')
+        self.addCleanup(shutil.rmtree, self.folder, True)
+        self.catalog = Catalog(os.path.join(self.folder, 'catalog.sqlite3'))
+        self.addCleanup(self.catalog.close)
+
+    def move(self, name: str, category: str, content: str = 'x', hash=None):
+        source = os.path.join(self.folder, name)
+        dest = os.path.join(self.folder, category, name)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, 'w') as f:
+            f.write(content)
+        self.catalog.record_move(source, dest, category, hash)
+        st = os.stat(dest)
+        return source, dest, st
+
+    def test_moved_back_by_hand_is_organized_again(self):
+        source, dest, st = self.move('informe.pdf', 'documents')
+        self.assertTrue(self.catalog.is_processed(source, st.st_size, st.st_mtime))
+        os.replace(dest, source)
+        self.assertFalse(self.catalog.is_processed(source, st.st_size, st.st_mtime))
+
+    def test_undone_moves_stay_held_until_released(self):
+        source, dest, st = self.move('foto.jpg', 'images')
+        self.catalog.hold([(source, dest)])
+        os.replace(dest, source)
+        self.assertTrue(self.catalog.is_processed(source, st.st_size, st.st_mtime))
+        self.assertEqual(self.catalog.stats(), {})
+        self.assertEqual(self.catalog.release([(source, dest)]), 1)
+        self.assertFalse(self.catalog.is_processed(source, st.st_size, st.st_mtime))
+
+    def test_lookups_and_stats(self):
+        first = self.move('a.pdf', 'documents', 'uno', hash='h1')
+        self.move('b.pdf', 'documents', 'dos')
+        self.move('c.jpg', 'images', 'tres', hash='h1')
+        self.assertEqual(self.catalog.find_by_name('a.pdf'), [(first[0], first[1])])
+        self.assertEqual(len(self.catalog.find_by_hash('h1')), 2)
+        self.assertAlmostEqual(self.catalog.moved_at(first[1]), time.time(), delta=60)
+        self.assertIsNone(self.catalog.moved_at(first[0]))
+        self.assertEqual(self.catalog.stats(), {'documents': (2, 6), 'images': (1, 4)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Detección de descargas terminadas sin abrir el archivo."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.completeness import (InotifyCloseWriteDetector, StableStatDetector,  # noqa: E402
+                                      build_detector)
+
+class CompletenessTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='organizador-completo-')
+        self.addCleanup(shutil.rmtree, self.folder, True)
+
+    def write(self, name: str, data: str = 'x', age: float = 0) -> str:
+        path = os.path.join(self.folder, name)
+        with open(path, 'a') as f:
+            f.write(data)
+        if age:
+            old = time.time() - age
+            os.utime(path, (old, old))
+        return path
+
+    def test_temporary_suffixes_are_incomplete(self):
+        detector = build_detector('suffix')
+        self.assertFalse(detector.is_complete(self.write('video.mp4.crdownload', age=3600)))
+        self.assertTrue(detector.is_complete(self.write('video.mp4', age=3600)))
+
+    def test_stable_waits_for_size_and_date_to_settle(self):
+        detector = StableStatDetector(0.2)
+        path = self.write('informe.pdf')
+        self.assertFalse(detector.is_complete(path))
+        time.sleep(0.1)
+        # Sigue creciendo: la ventana vuelve a empezar
+        self.write('informe.pdf', 'más')
+        self.assertFalse(detector.is_complete(path))
+        time.sleep(0.25)
+        self.assertTrue(detector.is_complete(path))
+
+    def test_old_files_are_complete_at_once(self):
+        detector = StableStatDetector(60)
+        self.assertTrue(detector.is_complete(self.write('viejo.zip', age=3600)))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify solo existe en Linux")
+    def test_inotify_close_write(self):
+        detector = InotifyCloseWriteDetector(self.folder, StableStatDetector(60))
+        self.addCleanup(detector.close)
+        path = os.path.join(self.folder, 'descarga.iso')
+        f = open(path, 'w')
+        f.write('datos')
+        f.flush()
+        deadline = time.monotonic() + 5
+        while detector.is_complete(path) is not False and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(detector.is_complete(path))
+        f.close()
+        while not detector.is_complete(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(detector.is_complete(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+"""Prueba de humo del servicio: API asyncio, puente de eventos y ejecutor por carriles."""
+import asyncio
+import importlib.util
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, '..', 'src')
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(SRC, 'extension_organizador'))
+
+# El catálogo y el diario se abren al importar server: a una carpeta temporal
+DATA_DIR = tempfile.mkdtemp(prefix='organizador-datos-')
+os.environ['XDG_DATA_HOME'] = DATA_DIR
+os.environ['LOCALAPPDATA'] = DATA_DIR
+
+import server  # noqa: E402
+from organizador.daemon import AsyncDaemon, AsyncEventBridge  # noqa: E402
+from organizador.executor import MoveExecutor  # noqa: E402
+
+ORIGIN = 'chrome-extension://abcdefghijklmnop'
+
+async def request(port: int, method: str, path: str, payload=None, headers=None):
+    """Una petición HTTP/1.1 con Connection: close; devuelve (estado, JSON)."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    head = {'Host': 'localhost', 'Content-Length': str(len(body)), 'Connection': 'close'}
+    head.update(headers or {})
+    lines = ''.join(f"{key}: {value}\r\n" for key, value in head.items())
+    writer.write(f"{method} {path} HTTP/1.1\r\n{lines}\r\n".encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b'\r\n')
+    return int(status_line.split()[1]), json.loads(rest.partition(b'\r\n\r\n')[2])
+
+class DaemonApiTest(unittest.TestCase):
+    def setUp(self):
+        self.downloads = tempfile.mkdtemp(prefix='organizador-descargas-')
+        self.roots = server.parse_roots([self.downloads])
+
+    def make_file(self, name: str) -> str:
+        path = os.path.join(self.downloads, name)
+        with open(path, 'w') as f:
+            f.write(name)
+        # Fuera del plazo de estabilidad del detector por defecto
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+        return path
+
+    def serve(self, client):
+        """Arranca AsyncDaemon en un puerto libre, ejecuta client(port) y lo detiene."""
+        daemon = AsyncDaemon('127.0.0.1', 0)
+        server.register_api(daemon, self.roots)
+        results, tasks = [], []
+
+        async def startup(daemon):
+            async def run():
+                try:
+                    results.append(await client(daemon.port))
+                finally:
+                    daemon.stop()
+            # Con una referencia: una tarea suelta puede recogerla el recolector a medias
+            tasks.append(asyncio.get_running_loop().create_task(run()))
+
+        asyncio.run(asyncio.wait_for(daemon.serve(startup), 30))
+        return results[0]
+
+    def test_batch_moves_files(self):
+        paths = [self.make_file('informe.pdf'), self.make_file('foto.jpg')]
+        outside = os.path.join(tempfile.gettempdir(), 'fuera.txt')
+
+        async def client(port):
+            return await request(port, 'POST', '/batch', {'file_paths': paths + [outside]},
+                                 {'Content-Type': 'application/json', 'Origin': ORIGIN})
+
+        status, payload = self.serve(client)
+        self.assertEqual(status, 200)
+        results = payload['results']
+        self.assertEqual(len(results), 3)
+        for path, result in zip(paths, results[:2]):
+            self.assertTrue(os.path.isfile(result['destination']))
+            self.assertFalse(os.path.exists(path))
+        self.assertIn('documents', results[0]['destination'])
+        self.assertIn('error', results[2])
+
+    def test_rejects_cross_site_requests(self):
+        path = self.make_file('contrato.pdf')
+
+        async def client(port):
+            return [
+                await request(port, 'POST', '/batch', {'file_paths': [path]},
+                              {'Content-Type': 'text/plain', 'Origin': ORIGIN}),
+                await request(port, 'POST', '/throttle', {'operations': 1},
+                              {'Content-Type': 'application/json', 'Origin': 'https://example.com'}),
+            ]
+
+        (plain, _), (foreign, _) = self.serve(client)
+        self.assertEqual(plain, 415)
+        self.assertEqual(foreign, 403)
+        self.assertTrue(os.path.exists(path))
+
+class WatcherTest(unittest.TestCase):
+    def test_batch_does_not_wait_for_moves(self):
+        downloads = [tempfile.mkdtemp(prefix='organizador-descargas-') for _ in range(2)]
+        handler = server.DownloadEventHandler(server.parse_roots(downloads))
+        old = time.time() - 3600
+        paths = []
+        for folder, name in zip(downloads, ('lento.iso', 'nota.txt')):
+            path = os.path.join(folder, name)
+            with open(path, 'w') as f:
+                f.write(name)
+            os.utime(path, (old, old))
+            paths.append(path)
+        release = threading.Event()
+        moved = []
+
+        def move(src, dest):
+            if src.endswith('.iso'):
+                release.wait(5)
+            moved.append(src)
+            return dest
+
+        shared, server.move_executor = server.move_executor, MoveExecutor(move, workers=2)
+        try:
+            start = time.monotonic()
+            futures = handler.process_batch(paths)
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertEqual(len(futures), 2)
+            # La otra carpeta no espera a la copia lenta
+            futures[1].result(timeout=5)
+            self.assertEqual(moved, [paths[1]])
+            # Un evento repetido de un archivo en cola no lo vuelve a encolar
+            self.assertIsNone(handler.handle_file_event(paths[0]))
+            release.set()
+            futures[0].result(timeout=5)
+        finally:
+            release.set()
+            server.move_executor.shutdown()
+            server.move_executor = shared
+
+    def test_undone_files_are_left_alone(self):
+        downloads = tempfile.mkdtemp(prefix='organizador-descargas-')
+        handler = server.DownloadEventHandler(server.parse_roots([downloads]))
+        src = os.path.join(downloads, 'devuelto.pdf')
+        dest = os.path.join(downloads, 'documents', 'devuelto.pdf')
+        os.makedirs(os.path.dirname(dest))
+        with open(dest, 'w') as f:
+            f.write('x')
+        old = time.time() - 3600
+        os.utime(dest, (old, old))
+        server.catalog.record_move(src, dest, 'documents')
+        # Lo que hace --undo desde otro proceso: retener y devolver
+        server.catalog.hold([(src, dest)])
+        os.replace(dest, src)
+        self.assertIsNone(handler.handle_file_event(src))
+        self.assertTrue(os.path.exists(src))
+        server.catalog.release([(src, dest)])
+        handler.handle_file_event(src).result(timeout=5)
+        self.assertTrue(os.path.exists(dest))
+
+# Servicio completo en otro proceso: un movimiento cada 10 s hace que el rescaneo siga en curso
+DAEMON_SCRIPT = """
+import sys
+sys.path.insert(0, {src!r})
+sys.path.insert(0, {extension!r})
+import server
+server.CONFIG.update(roots=[{downloads!r}], api_port={port}, operations_limit=0.1,
+                     snapshot=False, enable_icons=False)
+server.main()
+"""
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@unittest.skipIf(os.name == 'nt' or importlib.util.find_spec('watchdog') is None,
+                 "necesita watchdog y señales POSIX")
+class DaemonShutdownTest(unittest.TestCase):
+    def test_sigterm_during_throttled_rescan(self):
+        downloads = tempfile.mkdtemp(prefix='organizador-descargas-')
+        old = time.time() - 3600
+        for i in range(10):
+            path = os.path.join(downloads, f"doc{i}.pdf")
+            with open(path, 'w') as f:
+                f.write(str(i))
+            os.utime(path, (old, old))
+        port = free_port()
+        script = DAEMON_SCRIPT.format(src=os.path.abspath(SRC), downloads=downloads, port=port,
+                                      extension=os.path.abspath(os.path.join(SRC, 'extension_organizador')))
+        env = dict(os.environ, XDG_DATA_HOME=tempfile.mkdtemp(prefix='organizador-datos-'))
+        process = subprocess.Popen([sys.executable, '-c', script], env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 20
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    self.assertLess(time.monotonic(), deadline, "el servicio no arrancó")
+                    time.sleep(0.1)
+            time.sleep(1)
+            process.send_signal(signal.SIGTERM)
+            self.assertEqual(process.wait(timeout=15), 0)
+        finally:
+            if process.poll() is None:
+                process.kill()
+        # El rescaneo quedó a medias: la parada no esperó a que terminara
+        left = [name for name in os.listdir(downloads) if name.endswith('.pdf')]
+        self.assertTrue(left)
+
+class EventBridgeTest(unittest.TestCase):
+    def test_batches_alternate_between_partitions(self):
+        batches = []
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            bridge = AsyncEventBridge(loop, batches.append, debounce=0.01, max_batch=4,
+                                      partition=lambda path: path.split('/')[0])
+            for i in range(3):
+                bridge.push(f"a/{i}")
+            bridge.push('b/0')
+            bridge.start()
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if sum(map(len, batches)) == 4:
+                    break
+            bridge.stop()
+            return bridge.metrics()
+
+        metrics = asyncio.run(run())
+        self.assertEqual(batches[0][:2], ['a/0', 'b/0'])
+        self.assertEqual(metrics['dispatched'], 4)
+
+def tearDownModule():
+    server.move_executor.shutdown(wait=True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Duplicados por contenido: hash parcial y completo, caché y modos de resolución."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.dedup import BLOCK_SIZE, FULL, Deduplicator, HashCache  # noqa: E402
+from organizador.naming import NameIndex  # noqa: E402
+
+class DeduplicatorTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-duplicados-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.dest = os.path.join(self.root, 'documents')
+        os.makedirs(self.dest)
+        self.cache_path = os.path.join(self.root, 'hashes.json')
+
+    def write(self, path: str, data: bytes) -> str:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def dedup(self, mode: str = 'delete') -> Deduplicator:
+        return Deduplicator(mode, HashCache(self.cache_path))
+
+    def test_finds_identical_content(self):
+        existing = self.write(os.path.join(self.dest, 'informe.pdf'), b'igual' * 100)
+        self.write(os.path.join(self.dest, 'otro.pdf'), b'disti' * 100)
+        src = self.write(os.path.join(self.root, 'informe (1).pdf'), b'igual' * 100)
+        self.assertEqual(self.dedup().find_duplicate(src, self.dest), existing)
+
+    def test_large_files_differing_in_the_middle(self):
+        size = 4 * BLOCK_SIZE
+        data = bytearray(size)
+        self.write(os.path.join(self.dest, 'disco.iso'), bytes(data))
+        data[size // 2] = 1
+        src = self.write(os.path.join(self.root, 'disco.iso'), bytes(data))
+        dedup = self.dedup()
+        self.assertIsNone(dedup.find_duplicate(src, self.dest))
+        # El hash completo quedó en la caché y sobrevive a un reinicio
+        self.assertIsNotNone(dedup.known_hash(src))
+        dedup.cache.save()
+        st = os.stat(src)
+        self.assertIsNotNone(HashCache(self.cache_path).get(src, st.st_size, st.st_mtime, FULL))
+
+    def test_empty_files_are_never_duplicates(self):
+        self.write(os.path.join(self.dest, 'vacío.txt'), b'')
+        src = self.write(os.path.join(self.root, 'vacío.txt'), b'')
+        self.assertIsNone(self.dedup().find_duplicate(src, self.dest))
+
+    def test_resolve_modes(self):
+        existing = self.write(os.path.join(self.dest, 'foto.jpg'), b'pixel' * 50)
+        src = self.write(os.path.join(self.root, 'foto.jpg'), b'pixel' * 50)
+        self.assertTrue(self.dedup('skip').resolve(src, existing, NameIndex()))
+        self.assertTrue(os.path.exists(src))
+        self.assertTrue(self.dedup('link').resolve(src, existing, NameIndex()))
+        self.assertFalse(os.path.exists(src))
+        linked = os.path.join(self.dest, 'foto_1.jpg')
+        self.assertTrue(os.path.samefile(linked, existing))
+        src = self.write(os.path.join(self.root, 'foto.jpg'), b'pixel' * 50)
+        self.assertTrue(self.dedup('delete').resolve(src, existing, NameIndex()))
+        self.assertFalse(os.path.exists(src))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Ejecutor por carriles: orden por destino, turnos entre grupos y cierre sin futuros colgados."""
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.executor import ExecutorClosed, MoveExecutor  # noqa: E402
+
+class MoveExecutorTest(unittest.TestCase):
+    def test_lane_alternates_groups(self):
+        done = []
+        gate = threading.Event()
+
+        def move(src, dest):
+            if src == 'bloqueo':
+                gate.wait(5)
+            done.append(src)
+            return True
+
+        # Un solo trabajador ocupado: el carril 'docs' se llena antes de empezar
+        executor = MoveExecutor(move, workers=1)
+        blocker = executor.submit('bloqueo', 'otra')
+        futures = [executor.submit(f"a{i}", 'docs', 'A') for i in range(3)]
+        futures.append(executor.submit('b0', 'docs', 'B'))
+        gate.set()
+        for future in [blocker] + futures:
+            self.assertTrue(future.result(timeout=5))
+        executor.shutdown()
+        self.assertEqual(done, ['bloqueo', 'a0', 'b0', 'a1', 'a2'])
+
+    def test_shutdown_fails_pending_moves(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def move(src, dest):
+            started.set()
+            release.wait(5)
+            return True
+
+        executor = MoveExecutor(move, workers=2)
+        futures = [executor.submit(f"f{i}", 'docs') for i in range(3)]
+        self.assertTrue(started.wait(5))
+        closer = threading.Thread(target=executor.shutdown)
+        closer.start()
+        for future in futures[1:]:
+            with self.assertRaises(ExecutorClosed):
+                future.result(timeout=3)
+        release.set()
+        closer.join(5)
+        self.assertTrue(futures[0].result(timeout=3))
+        self.assertFalse(closer.is_alive())
+
+    def test_submit_after_shutdown(self):
+        executor = MoveExecutor(lambda src, dest: True)
+        executor.shutdown()
+        with self.assertRaises(ExecutorClosed):
+            executor.submit('x', 'docs').result(timeout=1)
+        self.assertEqual(executor.run([('x', 'docs')]), (0, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Íconos de carpeta: se escriben una vez, se rehacen si algo cambia y con la codificación de cada sistema."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.icons import FreedesktopBackend, IconProvisioner, WindowsBackend  # noqa: E402
+
+class OfflineWindowsBackend(WindowsBackend):
+    """desktop.ini sin tocar atributos: sirve para comprobar el contenido fuera de Windows."""
+
+    def before_write(self, file_paths):
+        pass
+
+    def apply_attributes(self, folders, file_paths):
+        pass
+
+class IconProvisionerTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-íconos-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.icons = os.path.join(self.root, 'íconos')
+        os.makedirs(self.icons)
+        self.folders = {}
+        for category in ('documents', 'images', 'music'):
+            folder = os.path.join(self.root, category)
+            os.makedirs(folder)
+            self.folders[folder] = category
+        # Sin ícono para music: esa carpeta se deja como está
+        for category in ('documents', 'images'):
+            with open(os.path.join(self.icons, f"{category}.ico"), 'wb') as f:
+                f.write(b'\0')
+
+    def provisioner(self, backend):
+        return IconProvisioner(self.icons, os.path.join(self.root, 'icons.json'), backend)
+
+    def test_freedesktop_is_idempotent(self):
+        icons = self.provisioner(FreedesktopBackend())
+        self.assertEqual(icons.ensure(self.folders), 2)
+        path = os.path.join(self.root, 'documents', '.directory')
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), f"[Desktop Entry]\nIcon={icons.icon_path('documents')}\n")
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'music', '.directory')))
+        # Otra ejecución con el estado guardado no escribe nada
+        self.assertEqual(self.provisioner(FreedesktopBackend()).ensure(self.folders), 0)
+
+    def test_freedesktop_rewrites_what_changed(self):
+        icons = self.provisioner(FreedesktopBackend())
+        icons.ensure(self.folders)
+        os.remove(os.path.join(self.root, 'images', '.directory'))
+        with open(os.path.join(self.root, 'documents', '.directory'), 'a', encoding='utf-8') as f:
+            f.write('Comment=editado\n')
+        self.assertEqual(self.provisioner(FreedesktopBackend()).ensure(self.folders), 2)
+        # Un ícono nuevo (otra fecha) también obliga a reescribir
+        later = time.time() + 10
+        os.utime(os.path.join(self.icons, 'images.ico'), (later, later))
+        self.assertEqual(self.provisioner(FreedesktopBackend()).ensure(self.folders), 1)
+
+    def test_desktop_ini_is_utf16(self):
+        icons = self.provisioner(OfflineWindowsBackend())
+        icons.ensure(self.folders)
+        with open(os.path.join(self.root, 'images', 'desktop.ini'), 'rb') as f:
+            data = f.read()
+        self.assertIn(data[:2], (b'\xff\xfe', b'\xfe\xff'))
+        self.assertIn(f"IconFile={icons.icon_path('images')}", data.decode('utf-16'))
+
+if __name__ == '__main__':
+    unittest.main()
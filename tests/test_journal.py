@@ -0,0 +1,79 @@
+"""Diario y deshacer: ida y vuelta, conflictos y archivos retenidos en el catálogo."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.catalog import Catalog  # noqa: E402
+from organizador.journal import (CONFLICT_CHANGED, MoveJournal, read_journal,  # noqa: E402
+                                 select_moves, undo_moves)
+
+class UndoTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='organizador-diario-')
+        self.addCleanup(shutil.rmtree, self.folder, True)
+        self.downloads = os.path.join(self.folder, 'Descargas')
+        os.makedirs(os.path.join(self.downloads, 'documents'))
+        self.journal = MoveJournal(os.path.join(self.folder, 'journal.jsonl'))
+        self.addCleanup(self.journal.close)
+        self.catalog = Catalog(os.path.join(self.folder, 'catalog.sqlite3'))
+        self.addCleanup(self.catalog.close)
+
+    def organize(self, *names):
+        """Crea los archivos en Descargas y los mueve como lo haría una ejecución."""
+        self.journal.start_run(self.downloads)
+        moved = []
+        for name in names:
+            src = os.path.join(self.downloads, name)
+            dest = os.path.join(self.downloads, 'documents', name)
+            with open(src, 'w') as f:
+                f.write(name)
+            os.replace(src, dest)
+            self.journal.record(src, dest)
+            self.catalog.record_move(src, dest, 'documents')
+            moved.append((src, dest))
+        self.journal.flush()
+        return moved
+
+    def undo(self):
+        moves = select_moves(read_journal(self.journal.path))
+        conflicts = []
+        result = undo_moves(
+            moves, self.journal, workers=2,
+            on_conflict=lambda move, reason: conflicts.append(reason),
+            on_ready=lambda ready: self.catalog.hold([(m['src'], m['dest']) for m in ready]))
+        return result, conflicts
+
+    def test_round_trip_keeps_files_held(self):
+        self.organize('viejo.pdf')
+        moved = self.organize('a.pdf', 'b.pdf')
+        (restored, conflicts, failed), _ = self.undo()
+        self.assertEqual((restored, conflicts, failed), (2, 0, 0))
+        for src, dest in moved:
+            self.assertTrue(os.path.isfile(src))
+            self.assertFalse(os.path.exists(dest))
+            st = os.stat(src)
+            # Retenido: ni el servicio ni la próxima ejecución lo vuelven a mover
+            self.assertTrue(self.catalog.is_processed(src, st.st_size, st.st_mtime))
+        # Lo deshecho no se vuelve a elegir; queda la ejecución anterior
+        self.assertEqual([m['src'] for m in select_moves(read_journal(self.journal.path))],
+                         [os.path.join(self.downloads, 'viejo.pdf')])
+        self.assertEqual(self.catalog.release(), 2)
+        src = moved[0][0]
+        st = os.stat(src)
+        self.assertFalse(self.catalog.is_processed(src, st.st_size, st.st_mtime))
+
+    def test_changed_destination_is_a_conflict(self):
+        (src, dest), = self.organize('c.pdf')
+        with open(dest, 'a') as f:
+            f.write('editado')
+        (restored, conflicts, failed), reasons = self.undo()
+        self.assertEqual((restored, conflicts), (0, 1))
+        self.assertEqual(reasons, [CONFLICT_CHANGED])
+        self.assertFalse(os.path.exists(src))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Nombres repetidos: reservas únicas entre hilos y una lista que sigue a la carpeta."""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador import naming  # noqa: E402
+from organizador.naming import NameIndex  # noqa: E402
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-nombres-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.dest = os.path.join(self.root, 'documents')
+        os.makedirs(self.dest)
+
+    def download(self, name: str, content: str = 'x') -> str:
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_collisions_get_a_suffix(self):
+        with open(os.path.join(self.dest, 'informe.pdf'), 'w') as f:
+            f.write('existente')
+        names = NameIndex()
+        first = names.move(self.download('informe.pdf', 'uno'), self.dest)
+        second = names.move(self.download('informe.pdf', 'dos'), self.dest)
+        self.assertEqual([os.path.basename(first), os.path.basename(second)], ['informe_1.pdf', 'informe_2.pdf'])
+        with open(second) as f:
+            self.assertEqual(f.read(), 'dos')
+
+    def test_concurrent_claims_are_unique(self):
+        names = NameIndex()
+        claimed = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(20):
+                path = names.claim(self.dest, 'foto.jpg')
+                with lock:
+                    claimed.append(path)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(claimed)), 80)
+
+    def test_names_freed_outside_are_reused(self):
+        names = NameIndex()
+        first = names.move(self.download('nota.txt'), self.dest)
+        second = names.move(self.download('nota.txt'), self.dest)
+        self.assertEqual(os.path.basename(second), 'nota_1.txt')
+        # El usuario borra ambos: la carpeta cambió y la lista se vuelve a leer
+        os.remove(first)
+        os.remove(second)
+        self.assertEqual(os.path.basename(names.move(self.download('nota.txt'), self.dest)), 'nota.txt')
+
+    def test_failed_move_removes_the_placeholder(self):
+        names = NameIndex()
+        src = self.download('roto.zip')
+        with mock.patch.object(naming, 'move_to_claimed', side_effect=OSError('disco lleno')):
+            with self.assertRaises(OSError):
+                names.move(src, self.dest)
+        self.assertEqual(os.listdir(self.dest), [])
+        self.assertEqual(os.path.basename(names.move(src, self.dest)), 'roto.zip')
+
+    def test_planning_does_not_touch_the_disk(self):
+        names = NameIndex(reserve=False)
+        paths = [names.claim(self.dest, 'a.pdf') for _ in range(3)]
+        self.assertEqual([os.path.basename(p) for p in paths], ['a.pdf', 'a_1.pdf', 'a_2.pdf'])
+        self.assertEqual(os.listdir(self.dest), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Planes de movimientos: nombres resueltos sin tocar el disco, verificación y aplicación reanudable."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.plan import (CHANGED, DONE, MISSING, PENDING, TAKEN, Planner,  # noqa: E402
+                              apply_plan, read_plan, verify_plan, write_plan)
+from organizador.scanner import entry_from_path  # noqa: E402
+
+def move(src: str, dest: str) -> bool:
+    os.replace(src, dest)
+    return True
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-plan-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.downloads = os.path.join(self.root, 'Descargas')
+        self.sub = os.path.join(self.downloads, 'viaje')
+        os.makedirs(self.sub)
+        self.documents = os.path.join(self.downloads, 'documents')
+
+    def download(self, folder: str, name: str) -> str:
+        path = os.path.join(folder, name)
+        with open(path, 'w') as f:
+            f.write(path)
+        return path
+
+    def plan(self, *paths):
+        planner = Planner()
+        for path in paths:
+            planner.add(entry_from_path(path), self.documents, 'documents')
+        plan_path = os.path.join(self.root, 'plan.jsonl')
+        write_plan(plan_path, planner.moves, self.downloads)
+        return plan_path
+
+    def test_plan_resolves_names_without_touching_the_disk(self):
+        plan_path = self.plan(self.download(self.downloads, 'a.pdf'), self.download(self.sub, 'a.pdf'))
+        self.assertFalse(os.path.exists(self.documents))
+        header, moves = read_plan(plan_path)
+        self.assertEqual(header['moves'], 2)
+        self.assertEqual(sorted(os.path.basename(m.dest) for m in moves), ['a.pdf', 'a_1.pdf'])
+        self.assertEqual(set(verify_plan(moves)), {PENDING})
+
+    def test_verify_reports_each_state(self):
+        paths = [self.download(self.downloads, f"{name}.pdf") for name in 'abcd']
+        _, moves = read_plan(self.plan(*paths))
+        by_src = {m.src: m for m in moves}
+        os.makedirs(self.documents)
+        move(paths[0], by_src[paths[0]].dest)
+        with open(paths[1], 'a') as f:
+            f.write('editado')
+        os.remove(paths[2])
+        self.download(self.documents, 'd.pdf')
+        report = {state: [os.path.basename(m.src) for m in items] for state, items in verify_plan(moves).items()}
+        self.assertEqual(report, {DONE: ['a.pdf'], CHANGED: ['b.pdf'], MISSING: ['c.pdf'], TAKEN: ['d.pdf']})
+
+    def test_apply_is_idempotent(self):
+        paths = [self.download(self.downloads, f"{i}.txt") for i in range(5)]
+        _, moves = read_plan(self.plan(*paths))
+        self.assertEqual(apply_plan(moves[:2], move, workers=2), (2, 0, 0))
+        # Reanudar: lo ya hecho se omite y se termina el resto
+        self.assertEqual(apply_plan(moves, move, workers=2), (3, 2, 0))
+        self.assertEqual(sorted(os.listdir(self.documents)), [f"{i}.txt" for i in range(5)])
+
+    def test_rejects_foreign_files(self):
+        path = os.path.join(self.root, 'otro.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"version": 2}\n')
+        with self.assertRaises(ValueError):
+            read_plan(path)
+
+if __name__ == '__main__':
+    unittest.main()
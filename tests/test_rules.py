@@ -0,0 +1,77 @@
+"""Reglas compiladas: mismo resultado que evaluarlas en orden, con o sin literal fijo."""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.rules import LiteralIndex, RuleError, RuleSet  # noqa: E402
+from organizador.scanner import FILE, Entry  # noqa: E402
+
+NOW = time.time()
+
+def entry(name: str, size: int = 1000, age_days: float = 0) -> Entry:
+    return Entry(os.path.basename(name), os.path.join('/d', name), FILE, size, NOW - age_days * 86400)
+
+def destination(rules: RuleSet, name: str, category: str = 'documents', **kwargs):
+    rule = rules.match(entry(name, **kwargs), name, category, NOW)
+    return rule.destination if rule else None
+
+class RuleSetTest(unittest.TestCase):
+    def test_first_matching_rule_wins(self):
+        rules = RuleSet([
+            {'match': {'glob': 'invoice_*.pdf'}, 'destination': 'facturas'},
+            {'match': {'extensions': ['pdf']}, 'destination': 'pdf'},
+            {'match': {'older_than_days': 30}, 'destination': 'archivo'},
+        ])
+        self.assertEqual(destination(rules, 'Invoice_2024.PDF'), 'facturas')
+        self.assertEqual(destination(rules, 'contrato.pdf'), 'pdf')
+        self.assertEqual(destination(rules, 'foto.jpg', age_days=40), 'archivo')
+        self.assertIsNone(destination(rules, 'foto.jpg'))
+
+    def test_leading_wildcard_and_regex_rules(self):
+        rules = RuleSet([
+            {'match': {'glob': '*_factura_*'}, 'destination': 'facturas'},
+            {'match': {'regex': r'.*extracto-\d{4}\.csv'}, 'destination': 'bancos'},
+            {'match': {'regex': r'(?:scan|escaneo)\d+\.jpg'}, 'destination': 'escaneos'},
+        ])
+        self.assertEqual(destination(rules, '2024_factura_luz.pdf'), 'facturas')
+        self.assertEqual(destination(rules, 'mi-EXTRACTO-2024.csv'), 'bancos')
+        self.assertIsNone(destination(rules, 'extracto-24.csv'))
+        # Una alternativa no aporta literal: la regla se prueba siempre
+        self.assertEqual(destination(rules, 'escaneo12.jpg'), 'escaneos')
+
+    def test_predicates_fall_through_to_later_rules(self):
+        rules = RuleSet([
+            {'match': {'glob': '*.iso', 'min_size': '1GB'}, 'destination': 'grandes'},
+            {'match': {'categories': ['programs']}, 'destination': 'programas'},
+        ])
+        self.assertEqual(destination(rules, 'linux.iso', 'programs', size=2 * 10 ** 9), 'grandes')
+        self.assertEqual(destination(rules, 'linux.iso', 'programs'), 'programas')
+
+    def test_source_and_dotfiles(self):
+        rules = RuleSet([
+            {'match': {'source': 'trabajo/*', 'extensions': ['.jpg']}, 'destination': 'trabajo'},
+            {'match': {'extensions': ['.jpg']}, 'destination': 'fotos'},
+        ])
+        self.assertEqual(destination(rules, 'trabajo/mayo/a.jpg'), 'trabajo')
+        self.assertEqual(destination(rules, 'a.jpg'), 'fotos')
+        # Un archivo oculto sin extensión también termina en '.jpg'
+        self.assertEqual(destination(rules, '.jpg'), 'fotos')
+
+    def test_invalid_rules(self):
+        with self.assertRaises(RuleError):
+            RuleSet([{'match': {'glob': '*'}, 'destination': '../fuera'}])
+        with self.assertRaises(RuleError):
+            RuleSet([{'match': {'regex': '('}, 'destination': 'x'}])
+
+class LiteralIndexTest(unittest.TestCase):
+    def test_finds_overlapping_literals(self):
+        index = LiteralIndex([('he', 0), ('she', 1), ('hers', 2), ('his', 3), ('.pdf', 4)])
+        self.assertEqual(index.search('ushers.pdf'), {0, 1, 2, 4})
+        self.assertEqual(index.search('this'), {3})
+        self.assertEqual(index.search('nada'), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Instantánea del escaneo: se reutiliza mientras la carpeta no cambie."""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.snapshot import ScanSnapshot  # noqa: E402
+
+class ScanSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-instantánea-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.downloads = os.path.join(self.root, 'Descargas')
+        os.makedirs(self.downloads)
+        for name in ('a.crdownload', 'b.pdf'):
+            with open(os.path.join(self.downloads, name), 'w') as f:
+                f.write(name)
+        self.snapshot = ScanSnapshot(os.path.join(self.root, 'snapshots'))
+
+    def age_folder(self):
+        # Fuera de la resolución del sistema de archivos: la fecha es fiable
+        old = time.time() - 60
+        os.utime(self.downloads, (old, old))
+
+    def test_unchanged_folder_reuses_the_listing(self):
+        self.age_folder()
+        self.assertEqual(self.snapshot.record(self.downloads), 2)
+        entries = self.snapshot.entries(self.downloads)
+        self.assertEqual(sorted(entry.name for entry in entries), ['a.crdownload', 'b.pdf'])
+        # Escribir en un archivo no cambia la carpeta; lo recordado se lee con stat
+        with open(os.path.join(self.downloads, 'b.pdf'), 'a') as f:
+            f.write('mas')
+        sizes = {entry.name: entry.size for entry in self.snapshot.entries(self.downloads)}
+        self.assertEqual(sizes['b.pdf'], len('b.pdfmas'))
+
+    def test_changed_folder_needs_a_scan(self):
+        self.age_folder()
+        self.snapshot.record(self.downloads)
+        with open(os.path.join(self.downloads, 'nuevo.zip'), 'w') as f:
+            f.write('zip')
+        self.assertIsNone(self.snapshot.entries(self.downloads))
+
+    def test_recent_folder_date_is_not_trusted(self):
+        self.snapshot.record(self.downloads)
+        # Guardada hace nada: una fecha igual no prueba que no haya cambios
+        now = time.time()
+        os.utime(self.downloads, (now + 1, now + 1))
+        self.assertIsNone(self.snapshot.entries(self.downloads))
+        self.snapshot.forget(self.downloads)
+        self.assertIsNone(self.snapshot.entries(self.downloads))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Cubo de fichas: una configuración absurda no puede dejar hilos bloqueados."""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador.throttle import TokenBucket  # noqa: E402
+
+class TokenBucketTest(unittest.TestCase):
+    def start_waiter(self, bucket: TokenBucket) -> threading.Thread:
+        waiter = threading.Thread(target=bucket.take, daemon=True)
+        waiter.start()
+        time.sleep(0.1)
+        self.assertTrue(waiter.is_alive())
+        return waiter
+
+    def test_configure_wakes_waiters(self):
+        bucket = TokenBucket(0.001)
+        waiter = self.start_waiter(bucket)
+        bucket.configure(1000)
+        waiter.join(2)
+        self.assertFalse(waiter.is_alive())
+
+    def test_close_releases_waiters(self):
+        bucket = TokenBucket(0.001)
+        waiter = self.start_waiter(bucket)
+        bucket.close()
+        waiter.join(2)
+        self.assertFalse(waiter.is_alive())
+
+    def test_reconfiguring_keeps_the_debt(self):
+        bucket = TokenBucket(10)
+        bucket.take(10)
+        for _ in range(5):
+            bucket.configure(10)
+        self.assertGreater(bucket.take(5), 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Copia entre unidades: reanudar desde el último byte y volver al nombre ya reservado."""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from organizador import transfer  # noqa: E402
+from organizador.transfer import CLAIM_SUFFIX, PARTIAL_SUFFIX, copy_resumable  # noqa: E402
+
+CONTENT = bytes(range(256)) * 4096
+
+class TransferTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='organizador-copia-')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.dest = os.path.join(self.root, 'documents')
+        os.makedirs(self.dest)
+        self.src = os.path.join(self.root, 'grande.bin')
+        with open(self.src, 'wb') as f:
+            f.write(CONTENT)
+
+    def leftovers(self, key: str):
+        """Copia parcial y reserva de un intento anterior interrumpido a la mitad."""
+        partial = os.path.join(self.dest, f".{key}{PARTIAL_SUFFIX}")
+        with open(partial, 'wb') as f:
+            f.write(CONTENT[:len(CONTENT) // 2])
+        return partial, os.path.join(self.dest, f".{key}{CLAIM_SUFFIX}")
+
+    def test_copy_continues_from_the_partial(self):
+        partial, _ = self.leftovers('x')
+        offsets = []
+        copy_resumable(self.src, partial, lambda done, total: offsets.append(done))
+        with open(partial, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertGreater(offsets[0], len(CONTENT) // 2)
+        self.assertEqual(os.stat(partial).st_mtime, os.stat(self.src).st_mtime)
+
+    def test_resume_goes_back_to_the_reserved_name(self):
+        key = transfer._source_key(self.src, os.lstat(self.src))
+        partial, claim = self.leftovers(key)
+        # El intento anterior reservó grande.bin; este reservó grande_1.bin
+        for name in ('grande.bin', 'grande_1.bin'):
+            open(os.path.join(self.dest, name), 'w').close()
+        with open(claim, 'w', encoding='utf-8') as f:
+            f.write('grande.bin')
+        final = transfer._move_across(self.src, os.path.join(self.dest, 'grande_1.bin'), None)
+        self.assertEqual(os.path.basename(final), 'grande.bin')
+        with open(final, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertFalse(os.path.exists(self.src))
+        self.assertFalse(os.path.exists(partial))
+        self.assertFalse(os.path.exists(claim))
+
+    def test_vanished_source_discards_the_partial(self):
+        key = transfer._source_key(self.src, os.lstat(self.src))
+        partial, claim = self.leftovers(key)
+        dest_path = os.path.join(self.dest, 'grande.bin')
+        open(dest_path, 'w').close()
+
+        def copy_then_vanish(src, partial_path, progress=None):
+            os.unlink(src)
+            raise FileNotFoundError(src)
+
+        with mock.patch.object(transfer, 'copy_resumable', copy_then_vanish):
+            with self.assertRaises(FileNotFoundError):
+                transfer._move_across(self.src, dest_path, None)
+        self.assertFalse(os.path.exists(partial))
+        self.assertFalse(os.path.exists(claim))
+
+if __name__ == '__main__':
+    unittest.main()